@@ -0,0 +1,54 @@
+"""Add denormalized current phase summary to study plans
+
+Revision ID: 002_study_plan_phase_summary
+Revises: 001_create_users
+Create Date: 2026-10-16 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '002_study_plan_phase_summary'
+down_revision: Union[str, None] = '001_create_users'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+PHASE_SUMMARY_COLUMNS = [
+    sa.Column('current_phase_name', sa.String(100), nullable=True),
+    sa.Column('current_phase_index', sa.Integer(), nullable=True),
+    sa.Column('phase_progress', sa.Float(), nullable=True, server_default='0'),
+]
+
+
+def upgrade() -> None:
+    # Databases created by create_all() at startup may already have them
+    existing = {
+        column['name']
+        for column in sa.inspect(op.get_bind()).get_columns('user_study_plans')
+    }
+    for column in PHASE_SUMMARY_COLUMNS:
+        if column.name not in existing:
+            op.add_column('user_study_plans', column)
+
+    # Backfill plans created before the summary was stored
+    op.execute(
+        """
+        UPDATE user_study_plans
+        SET current_phase_name = p.name,
+            current_phase_index = p."order",
+            phase_progress = COALESCE(p.progress_percentage, 0)
+        FROM study_phases AS p
+        WHERE p.id = user_study_plans.current_phase_id
+          AND user_study_plans.current_phase_name IS NULL
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('user_study_plans', 'phase_progress')
+    op.drop_column('user_study_plans', 'current_phase_index')
+    op.drop_column('user_study_plans', 'current_phase_name')
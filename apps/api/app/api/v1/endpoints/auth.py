@@ -3,10 +3,9 @@ Authentication Endpoints
 Login, Register, Token Refresh, Logout
 """
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.ext.asyncio import AsyncSession
+from pydantic import TypeAdapter
 
-from app.core.database import get_db
-from app.core.dependencies import get_current_user
+from app.core.dependencies import get_current_user, get_auth_service
 from app.models.user import User
 from app.schemas.user import UserCreate, UserResponse
 from app.schemas.auth import (
@@ -20,6 +19,8 @@ from app.services.auth_service import AuthService
 
 router = APIRouter()
 
+_USER = TypeAdapter(UserResponse)
+
 
 @router.post(
     "/register",
@@ -29,7 +30,7 @@ router = APIRouter()
 )
 async def register(
     user_data: UserCreate,
-    db: AsyncSession = Depends(get_db)
+    auth_service: AuthService = Depends(get_auth_service)
 ):
     """
     Register a new user account.
@@ -42,8 +43,6 @@ async def register(
     
     Returns user data and JWT tokens.
     """
-    auth_service = AuthService(db)
-    
     try:
         user, tokens = await auth_service.register(user_data)
     except ValueError as e:
@@ -54,7 +53,7 @@ async def register(
         )
     
     return {
-        "user": UserResponse.model_validate(user),
+        "user": _USER.validate_python(user, from_attributes=True),
         "tokens": tokens
     }
 
@@ -66,7 +65,7 @@ async def register(
 )
 async def login(
     login_data: LoginRequest,
-    db: AsyncSession = Depends(get_db)
+    auth_service: AuthService = Depends(get_auth_service)
 ):
     """
     Authenticate user and get access tokens.
@@ -76,8 +75,6 @@ async def login(
     
     Returns user data and JWT tokens (access + refresh).
     """
-    auth_service = AuthService(db)
-    
     result = await auth_service.login(login_data.email, login_data.password)
     
     if not result:
@@ -90,7 +87,7 @@ async def login(
     user, tokens = result
     
     return {
-        "user": UserResponse.model_validate(user),
+        "user": _USER.validate_python(user, from_attributes=True),
         "tokens": tokens
     }
 
@@ -102,7 +99,7 @@ async def login(
 )
 async def refresh_token(
     token_data: RefreshTokenRequest,
-    db: AsyncSession = Depends(get_db)
+    auth_service: AuthService = Depends(get_auth_service)
 ):
     """
     Get new access token using refresh token.
@@ -111,8 +108,6 @@ async def refresh_token(
     
     Returns new access and refresh tokens.
     """
-    auth_service = AuthService(db)
-    
     tokens = await auth_service.refresh_tokens(token_data.refresh_token)
     
     if not tokens:
@@ -132,7 +127,7 @@ async def refresh_token(
 )
 async def logout(
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    auth_service: AuthService = Depends(get_auth_service)
 ):
     """
     Logout current user.
@@ -140,7 +135,6 @@ async def logout(
     Requires valid access token in Authorization header.
     Future: Will invalidate tokens via Redis blacklist.
     """
-    auth_service = AuthService(db)
     await auth_service.logout(current_user)
     
     return MessageResponse(
@@ -162,4 +156,4 @@ async def get_current_user_info(
     
     Requires valid access token in Authorization header.
     """
-    return UserResponse.model_validate(current_user)
+    return _USER.validate_python(current_user, from_attributes=True)
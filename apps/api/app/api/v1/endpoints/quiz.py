@@ -2,8 +2,10 @@
 Quiz API Endpoints
 Generate, take, and evaluate quizzes.
 """
+from datetime import datetime
 from typing import Optional, List
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel, Field
 from sqlalchemy.ext.asyncio import AsyncSession
 import logging
@@ -13,10 +15,21 @@ from app.core.database import get_db
 from app.core.dependencies import get_current_user
 from app.models.user import User
 from app.models.quiz import Quiz, QuizQuestion, QuestionAnswer, QuizAttempt
+from app.services.quiz_service import QuizService, QuizEvaluator
+from app.services.ai.quiz_generator import create_quiz_generator, QuestionDifficulty
+from app.services.document_service import DocumentService
 
-router = APIRouter()
+# orjson encodes the nested result dicts and datetimes natively in C
+router = APIRouter(default_response_class=ORJSONResponse)
 logger = logging.getLogger(__name__)
 
+DIFFICULTY_MAP = {
+    "easy": QuestionDifficulty.EASY,
+    "medium": QuestionDifficulty.MEDIUM,
+    "hard": QuestionDifficulty.HARD,
+    "expert": QuestionDifficulty.EXPERT,
+}
+
 
 # ==================== Request/Response Schemas ====================
 
@@ -127,7 +140,7 @@ class AttemptHistoryItem(BaseModel):
     attempt_number: int
     score_percentage: Optional[float] = None
     passed: Optional[bool] = None
-    completed_at: Optional[str] = None
+    completed_at: Optional[datetime] = None
     time_spent_seconds: Optional[int] = None
 
 
@@ -209,93 +222,6 @@ async def get_quick_quiz(
 
 # ==================== Quiz Generation Endpoints ====================
 
-
-# ==================== Quiz Attempt Endpoints ====================
-
-@router.post("/attempts/{attempt_id}/answer", response_model=SubmitAnswerResponse)
-async def submit_answer(
-    attempt_id: str,
-    request: SubmitAnswerRequest,
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
-):
-    """Submit an answer to a question"""
-    from app.services.quiz_service import QuizEvaluator
-    
-    evaluator = QuizEvaluator(db)
-    
-    try:
-        answer = await evaluator.submit_answer(
-            attempt_id=attempt_id,
-            question_id=request.question_id,
-            selected_option=request.selected_option,
-            time_spent_seconds=request.time_spent_seconds,
-        )
-        return answer
-        
-    except ValueError as e:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=str(e)
-        )
-
-
-@router.post("/attempts/{attempt_id}/complete", response_model=CompleteAttemptResponse)
-async def complete_attempt(
-    attempt_id: str,
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
-):
-    """Complete a quiz attempt and get results"""
-    from app.services.quiz_service import QuizEvaluator
-    
-    evaluator = QuizEvaluator(db)
-    
-    try:
-        result = await evaluator.complete_attempt(attempt_id)
-        await db.commit()
-        
-        return CompleteAttemptResponse(**result.to_dict())
-        
-    except ValueError as e:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=str(e)
-        )
-
-
-@router.post("/attempt/{attempt_id}/submit", response_model=CompleteAttemptResponse, include_in_schema=False)
-async def complete_attempt_legacy(
-    attempt_id: str,
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
-):
-    """Legacy endpoint alias"""
-    return await complete_attempt(attempt_id, db, current_user)
-
-
-@router.get("/attempts/{attempt_id}/result", response_model=CompleteAttemptResponse)
-async def get_attempt_result(
-    attempt_id: str,
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
-):
-    """Get result of a completed attempt"""
-    from app.services.quiz_service import QuizEvaluator
-    
-    evaluator = QuizEvaluator(db)
-    
-    try:
-        result = await evaluator.get_attempt_result(attempt_id)
-        return CompleteAttemptResponse(**result.to_dict())
-        
-    except ValueError as e:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=str(e)
-        )
-
-
 @router.post("/generate", response_model=QuizDetailSchema)
 async def generate_quiz(
     request: GenerateQuizRequest,
@@ -308,10 +234,7 @@ async def generate_quiz(
     The AI will create MCQs based on the provided study material.
     """
     try:
-        from app.services.ai.quiz_generator import create_quiz_generator, QuestionDifficulty
-        from app.services.quiz_service import QuizService
-        
-        # ... (diff map) ...
+        difficulty = DIFFICULTY_MAP.get(request.difficulty, QuestionDifficulty.MEDIUM)
         
         # Generate questions with real LLM
         generator = await create_quiz_generator()
@@ -342,8 +265,6 @@ async def generate_quiz(
             source_content=request.content[:2000],
         )
         
-        await db.commit()
-        
         return QuizDetailSchema(
             id=quiz.id,
             title=quiz.title,
@@ -374,7 +295,6 @@ async def generate_quiz(
         raise
     except Exception as e:
         logger.error(f"Quiz generation failed: {e}")
-        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Quiz generation failed: {str(e)}"
@@ -389,10 +309,6 @@ async def generate_quiz_from_document(
 ):
     """Generate a quiz from an uploaded document's content"""
     try:
-        from app.services.document_service import DocumentService
-        from app.services.ai.quiz_generator import create_quiz_generator, QuestionDifficulty
-        from app.services.quiz_service import QuizService
-        
         # Get document
         doc_service = DocumentService(db)
         doc = await doc_service.get_document(request.document_id)
@@ -421,13 +337,7 @@ async def generate_quiz_from_document(
         content = "\n\n".join([c.content for c in chunks])
         
         # Generate quiz
-        diff_map = {
-            "easy": QuestionDifficulty.EASY,
-            "medium": QuestionDifficulty.MEDIUM,
-            "hard": QuestionDifficulty.HARD,
-            "expert": QuestionDifficulty.EXPERT,
-        }
-        difficulty = diff_map.get(request.difficulty, QuestionDifficulty.MEDIUM)
+        difficulty = DIFFICULTY_MAP.get(request.difficulty, QuestionDifficulty.MEDIUM)
         
         generator = await create_quiz_generator()
         result = await generator.generate_quiz(
@@ -454,8 +364,6 @@ async def generate_quiz_from_document(
             source_content=content[:2000],
         )
         
-        await db.commit()
-        
         return QuizDetailSchema(
             id=quiz.id,
             title=quiz.title,
@@ -486,7 +394,6 @@ async def generate_quiz_from_document(
         raise
     except Exception as e:
         logger.error(f"Quiz generation from document failed: {e}")
-        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Quiz generation failed: {str(e)}"
@@ -503,8 +410,6 @@ async def list_quizzes(
     current_user: User = Depends(get_current_user),
 ):
     """List available quizzes"""
-    from app.services.quiz_service import QuizService
-    
     quiz_service = QuizService(db)
     quizzes, _ = await quiz_service.get_user_quizzes(current_user.id, page, limit)
     
@@ -534,8 +439,6 @@ async def get_quiz(
     current_user: User = Depends(get_current_user),
 ):
     """Get quiz details with questions"""
-    from app.services.quiz_service import QuizService
-    
     quiz_service = QuizService(db)
     quiz = await quiz_service.get_quiz(quiz_id)
     
@@ -579,8 +482,6 @@ async def publish_quiz(
     current_user: User = Depends(get_current_user),
 ):
     """Publish a quiz to make it available"""
-    from app.services.quiz_service import QuizService
-    
     quiz_service = QuizService(db)
     quiz = await quiz_service.get_quiz(quiz_id)
     
@@ -597,7 +498,6 @@ async def publish_quiz(
         )
     
     quiz = await quiz_service.publish_quiz(quiz_id)
-    await db.commit()
     
     return QuizSchema(
         id=quiz.id,
@@ -624,8 +524,6 @@ async def start_quiz_attempt(
     current_user: User = Depends(get_current_user),
 ):
     """Start a new quiz attempt"""
-    from app.services.quiz_service import QuizService, QuizEvaluator
-    
     quiz_service = QuizService(db)
     quiz = await quiz_service.get_quiz(quiz_id)
     
@@ -637,7 +535,6 @@ async def start_quiz_attempt(
     
     evaluator = QuizEvaluator(db)
     attempt = await evaluator.start_attempt(quiz_id, current_user.id)
-    await db.commit()
     
     return StartAttemptResponse(
         attempt_id=attempt.id,
@@ -667,8 +564,6 @@ async def submit_answer(
     current_user: User = Depends(get_current_user),
 ):
     """Submit an answer for a question"""
-    from app.services.quiz_service import QuizEvaluator
-    
     evaluator = QuizEvaluator(db)
     
     try:
@@ -678,7 +573,6 @@ async def submit_answer(
             selected_option=request.selected_option,
             time_spent_seconds=request.time_spent_seconds,
         )
-        await db.commit()
         
         return SubmitAnswerResponse(
             question_id=request.question_id,
@@ -699,13 +593,10 @@ async def complete_attempt(
     current_user: User = Depends(get_current_user),
 ):
     """Complete a quiz attempt and get results"""
-    from app.services.quiz_service import QuizEvaluator
-    
     evaluator = QuizEvaluator(db)
     
     try:
         result = await evaluator.complete_attempt(attempt_id)
-        await db.commit()
         
         return CompleteAttemptResponse(**result.to_dict())
         
@@ -716,6 +607,16 @@ async def complete_attempt(
         )
 
 
+@router.post("/attempt/{attempt_id}/submit", response_model=CompleteAttemptResponse, include_in_schema=False)
+async def complete_attempt_legacy(
+    attempt_id: str,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Legacy endpoint alias"""
+    return await complete_attempt(attempt_id, db, current_user)
+
+
 @router.get("/attempts/{attempt_id}/result", response_model=CompleteAttemptResponse)
 async def get_attempt_result(
     attempt_id: str,
@@ -723,8 +624,6 @@ async def get_attempt_result(
     current_user: User = Depends(get_current_user),
 ):
     """Get result of a completed attempt"""
-    from app.services.quiz_service import QuizEvaluator
-    
     evaluator = QuizEvaluator(db)
     
     try:
@@ -747,8 +646,6 @@ async def get_my_analytics(
     current_user: User = Depends(get_current_user),
 ):
     """Get current user's quiz analytics"""
-    from app.services.quiz_service import QuizEvaluator
-    
     evaluator = QuizEvaluator(db)
     analytics = await evaluator.get_user_analytics(current_user.id, days)
     
@@ -764,8 +661,6 @@ async def get_attempt_history(
     current_user: User = Depends(get_current_user),
 ):
     """Get user's quiz attempt history"""
-    from app.services.quiz_service import QuizEvaluator
-    
     evaluator = QuizEvaluator(db)
     attempts, _ = await evaluator.get_attempt_history(
         current_user.id, quiz_id, page, limit
@@ -779,7 +674,7 @@ async def get_attempt_history(
             attempt_number=a.attempt_number,
             score_percentage=a.score_percentage,
             passed=a.passed,
-            completed_at=a.completed_at.isoformat() if a.completed_at else None,
+            completed_at=a.completed_at,
             time_spent_seconds=a.time_spent_seconds,
         )
         for a in attempts
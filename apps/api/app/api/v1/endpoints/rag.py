@@ -1,17 +1,50 @@
 """
 RAG API Endpoints
 Query interface for the RAG pipeline.
+
+Query handlers spend nearly all their time in embedding and LLM network
+I/O, so they must not hold a pooled database connection while doing it:
+finish any DB work first, then call _release_db() before the RAG calls.
+Keep the DB phase of every endpoint here short when reviewing changes.
 """
-from typing import Optional, List
-from fastapi import APIRouter, Depends, HTTPException, status
-from pydantic import BaseModel, Field
+import asyncio
+from datetime import datetime, timezone
+from typing import AsyncIterator, Optional, List
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from pydantic import BaseModel, ConfigDict, Field
 from sqlalchemy.ext.asyncio import AsyncSession
+import json
+import logging
 
-from app.core.database import get_db
-from app.core.dependencies import get_current_user, get_optional_user
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal, get_db
+from app.core.dependencies import get_current_user, get_current_admin_user, get_optional_user
+from app.models.document import IndexJobStatus, RagIndexJob
 from app.models.user import User
 
+# RAG needs numpy/sentence-transformers/faiss; resolve it once at import
+try:
+    from app.services.document_service import DocumentService
+    from app.services.rag import (
+        ANALYTICAL_PROMPT_TEMPLATE,
+        create_rag_pipeline,
+        get_embedding_pipeline,
+        get_query_cache,
+    )
+    _RAG_AVAILABLE = True
+    _RAG_IMPORT_ERROR = None
+except ImportError as e:
+    _RAG_AVAILABLE = False
+    _RAG_IMPORT_ERROR = str(e)
+
 router = APIRouter()
+logger = logging.getLogger(__name__)
+
+# Chunks fetched from the database per indexing page
+INDEX_PAGE_SIZE = 200
+# Chunks per embedding batch; batches are encoded concurrently
+INDEX_EMBED_BATCH_SIZE = 64
 
 
 # ==================== Schemas ====================
@@ -30,7 +63,7 @@ class RAGQueryRequest(BaseModel):
 class ConversationalQueryRequest(BaseModel):
     """Request for conversational RAG"""
     question: str = Field(..., min_length=3, max_length=2000)
-    history: List[dict] = []  # [{"role": "user/assistant", "content": "..."}]
+    history: List[dict] = Field(default_factory=list, max_length=50)  # [{"role": "user/assistant", "content": "..."}]
     syllabus_tags: Optional[List[str]] = None
 
 
@@ -45,6 +78,8 @@ class CitationResponse(BaseModel):
 
 class RAGQueryResponse(BaseModel):
     """Response from RAG query"""
+    model_config = ConfigDict(extra="forbid", frozen=True)
+    
     answer: str
     citations: List[CitationResponse]
     query: str
@@ -59,14 +94,116 @@ class IndexDocumentRequest(BaseModel):
     syllabus_tags: Optional[List[str]] = None
 
 
+class ReindexRequest(BaseModel):
+    """Request to rebuild the vector index"""
+    index_type: str = Field("hnsw", pattern="^(flat|hnsw|ivf|binary_hnsw)$")
+
+
 class IndexStatusResponse(BaseModel):
     """Status of indexing operation"""
+    job_id: Optional[str] = None
     document_id: str
     chunks_indexed: int
     status: str
     message: str
 
 
+# ==================== Dependencies ====================
+
+async def get_rag_embedding_pipeline():
+    """
+    Provide the process-wide embedding pipeline.
+    The model and FAISS index are loaded once at startup, not per request.
+    Every RAG endpoint depends on this, so it is where unavailability is reported.
+    """
+    if not _RAG_AVAILABLE:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"RAG dependencies not installed: {_RAG_IMPORT_ERROR}. Install with: pip install sentence-transformers faiss-cpu"
+        )
+    try:
+        return await get_embedding_pipeline()
+    except ImportError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"RAG dependencies not installed: {str(e)}. Install with: pip install sentence-transformers faiss-cpu"
+        )
+
+
+# ==================== Helpers ====================
+
+async def _release_db(db: AsyncSession) -> None:
+    """
+    Return the request's database connection to the pool.
+    
+    FastAPI shares one session per request, so this is the same session
+    get_current_user loaded the user with. Closing it ends its transaction
+    (loaded objects stay usable since nothing is expired), and get_db's
+    final commit is then a no-op.
+    """
+    await db.close()
+
+
+def _trim_history(history: List[dict]) -> List[dict]:
+    """
+    Bound conversation history sent to the LLM.
+    
+    Keeps the last CHAT_HISTORY_TURNS messages, then drops the oldest ones
+    until the total content fits CHAT_HISTORY_MAX_CHARS. The last 2 messages
+    are always kept.
+    """
+    history = history[-settings.CHAT_HISTORY_TURNS:]
+    
+    total = 0
+    keep = 0
+    for message in reversed(history):
+        total += len(str(message.get("content", "")))
+        if total > settings.CHAT_HISTORY_MAX_CHARS and keep >= 2:
+            break
+        keep += 1
+    
+    return history[len(history) - keep:]
+
+
+def _to_response(response) -> RAGQueryResponse:
+    """
+    Build the API response from a pipeline RAGResponse.
+    The pipeline output is trusted, so models are built without validation.
+    """
+    citations = []
+    for c in response.citations:
+        snippet = c.content_snippet
+        if len(snippet) > 200:
+            snippet = snippet[:200] + "..."
+        citations.append(CitationResponse.model_construct(
+            chunk_id=c.chunk_id,
+            source=c.source,
+            snippet=snippet,
+            relevance_score=c.relevance_score,
+            page_number=c.page_number,
+        ))
+    
+    return RAGQueryResponse.model_construct(
+        answer=response.answer,
+        citations=citations,
+        query=response.query,
+        context_chunks=response.context_chunks,
+        model=response.model,
+        confidence=response.confidence,
+    )
+
+
+async def _sse(events: AsyncIterator[dict]) -> AsyncIterator[str]:
+    """Encode pipeline stream events as Server-Sent Events"""
+    try:
+        async for event in events:
+            yield f"data: {json.dumps(event)}\n\n"
+    except Exception as e:
+        # Headers are already sent, so report failures in-band
+        logger.error(f"RAG stream failed: {e}")
+        yield f"data: {json.dumps({'type': 'error', 'detail': str(e)})}\n\n"
+
+
 # ==================== API Endpoints ====================
 
 @router.post("/query", response_model=RAGQueryResponse)
@@ -74,6 +211,7 @@ async def rag_query(
     request: RAGQueryRequest,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
+    embedding_pipeline=Depends(get_rag_embedding_pipeline),
 ):
     """
     Query the RAG system with a question.
@@ -88,20 +226,29 @@ async def rag_query(
     - **standard**: Direct Q&A format
     - **analytical**: UPSC-style analysis with multiple dimensions
     """
+    # Authentication was the only DB work; don't hold a connection over RAG I/O
+    await _release_db(db)
+    
     try:
-        from app.services.rag import (
-            EmbeddingPipeline,
-            create_rag_pipeline,
-            LLMProvider,
-        )
-        from app.core.config import settings
+        # Determine user filter
+        user_id = current_user.id if request.include_user_docs else None
         
-        # Initialize RAG pipeline
-        # In production, these would be singleton/cached instances
-        embedding_pipeline = EmbeddingPipeline(
-            model_name="all-MiniLM-L6-v2",
-            storage_path="data/vectors",
-        )
+        # Serve repeated / near-duplicate questions from the query cache
+        query_cache = get_query_cache()
+        cache_scope = "|".join([
+            user_id or "",
+            ",".join(sorted(request.document_ids or [])),
+            ",".join(sorted(request.syllabus_tags or [])),
+            request.query_type,
+            str(request.temperature),
+            str(request.top_k),
+        ])
+        cache_key = query_cache.make_key(request.question, cache_scope)
+        question_embedding = await embedding_pipeline.embed_query(request.question)
+        
+        cached = query_cache.get(cache_key, cache_scope, question_embedding)
+        if cached is not None:
+            return ORJSONResponse(cached)
         
         rag_pipeline = create_rag_pipeline(
             embedding_pipeline=embedding_pipeline,
@@ -110,15 +257,13 @@ async def rag_query(
             top_k=request.top_k,
         )
         
-        # Determine user filter
-        user_id = current_user.id if request.include_user_docs else None
-        
         # Execute query
         if request.query_type == "analytical":
             response = await rag_pipeline.analytical_query(
                 topic=request.question,
                 user_id=user_id,
                 syllabus_tags=request.syllabus_tags,
+                query_embedding=question_embedding,
             )
         else:
             response = await rag_pipeline.query(
@@ -127,31 +272,15 @@ async def rag_query(
                 document_ids=request.document_ids,
                 syllabus_tags=request.syllabus_tags,
                 temperature=request.temperature,
+                query_embedding=question_embedding,
             )
         
-        return RAGQueryResponse(
-            answer=response.answer,
-            citations=[
-                CitationResponse(
-                    chunk_id=c.chunk_id,
-                    source=c.source,
-                    snippet=c.content_snippet[:200] + "..." if len(c.content_snippet) > 200 else c.content_snippet,
-                    relevance_score=c.relevance_score,
-                    page_number=c.page_number,
-                )
-                for c in response.citations
-            ],
-            query=response.query,
-            context_chunks=response.context_chunks,
-            model=response.model,
-            confidence=response.confidence,
-        )
+        content = _to_response(response).model_dump()
+        
+        await query_cache.put(cache_key, cache_scope, question_embedding, content)
+        
+        return ORJSONResponse(content)
         
-    except ImportError as e:
-        raise HTTPException(
-            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-            detail=f"RAG dependencies not installed: {str(e)}. Install with: pip install sentence-transformers faiss-cpu"
-        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -159,11 +288,57 @@ async def rag_query(
         )
 
 
+@router.post("/query/stream")
+async def rag_query_stream(
+    request: RAGQueryRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    embedding_pipeline=Depends(get_rag_embedding_pipeline),
+):
+    """
+    Streaming variant of `/query` using Server-Sent Events.
+    
+    Emits `citation` events once retrieval finishes, then `token` events
+    as the answer is generated, then a final `done` event.
+    """
+    await _release_db(db)
+    
+    rag_pipeline = create_rag_pipeline(
+        embedding_pipeline=embedding_pipeline,
+        llm_provider=settings.LLM_PROVIDER,
+        model=settings.LLM_MODEL,
+        top_k=request.top_k,
+    )
+    
+    user_id = current_user.id if request.include_user_docs else None
+    
+    if request.query_type == "analytical":
+        events = rag_pipeline.astream(
+            question=request.question,
+            user_id=user_id,
+            syllabus_tags=request.syllabus_tags,
+            prompt_template=ANALYTICAL_PROMPT_TEMPLATE,
+            max_tokens=2048,
+            temperature=0.5,
+        )
+    else:
+        events = rag_pipeline.astream(
+            question=request.question,
+            user_id=user_id,
+            document_ids=request.document_ids,
+            syllabus_tags=request.syllabus_tags,
+            temperature=request.temperature,
+        )
+    
+    return StreamingResponse(_sse(events), media_type="text/event-stream")
+
+
 @router.post("/chat", response_model=RAGQueryResponse)
 async def conversational_query(
     request: ConversationalQueryRequest,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
+    embedding_pipeline=Depends(get_rag_embedding_pipeline),
 ):
     """
     Conversational RAG for multi-turn study sessions.
@@ -171,18 +346,9 @@ async def conversational_query(
     Maintains context from previous messages and retrieves
     relevant materials based on the conversation flow.
     """
+    await _release_db(db)
+    
     try:
-        from app.services.rag import (
-            EmbeddingPipeline,
-            create_rag_pipeline,
-            LLMProvider,
-        )
-        
-        embedding_pipeline = EmbeddingPipeline(
-            model_name="all-MiniLM-L6-v2",
-            storage_path="data/vectors",
-        )
-        
         rag_pipeline = create_rag_pipeline(
             embedding_pipeline=embedding_pipeline,
             llm_provider=settings.LLM_PROVIDER,
@@ -191,27 +357,11 @@ async def conversational_query(
         
         response = await rag_pipeline.conversational_query(
             question=request.question,
-            history=request.history,
+            history=_trim_history(request.history),
             user_id=current_user.id,
         )
         
-        return RAGQueryResponse(
-            answer=response.answer,
-            citations=[
-                CitationResponse(
-                    chunk_id=c.chunk_id,
-                    source=c.source,
-                    snippet=c.content_snippet[:200],
-                    relevance_score=c.relevance_score,
-                    page_number=c.page_number,
-                )
-                for c in response.citations
-            ],
-            query=response.query,
-            context_chunks=response.context_chunks,
-            model=response.model,
-            confidence=response.confidence,
-        )
+        return ORJSONResponse(_to_response(response).model_dump())
         
     except Exception as e:
         raise HTTPException(
@@ -220,128 +370,150 @@ async def conversational_query(
         )
 
 
-@router.post("/index", response_model=IndexStatusResponse)
+@router.post("/chat/stream")
+async def conversational_query_stream(
+    request: ConversationalQueryRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    embedding_pipeline=Depends(get_rag_embedding_pipeline),
+):
+    """Streaming variant of `/chat` using Server-Sent Events"""
+    await _release_db(db)
+    
+    rag_pipeline = create_rag_pipeline(
+        embedding_pipeline=embedding_pipeline,
+        llm_provider=settings.LLM_PROVIDER,
+        model=settings.LLM_MODEL,
+    )
+    
+    events = rag_pipeline.astream_conversational(
+        question=request.question,
+        history=_trim_history(request.history),
+        user_id=current_user.id,
+    )
+    
+    return StreamingResponse(_sse(events), media_type="text/event-stream")
+
+
+@router.post("/index", response_model=IndexStatusResponse, status_code=status.HTTP_202_ACCEPTED)
 async def index_document(
     request: IndexDocumentRequest,
+    background_tasks: BackgroundTasks,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
+    embedding_pipeline=Depends(get_rag_embedding_pipeline),
 ):
     """
     Index a document's chunks into the vector store for RAG retrieval.
     
     The document must have been processed (chunks extracted) before indexing.
+    Indexing runs in the background; poll `/index/status/{job_id}` for progress.
     """
-    try:
-        from app.services.document_service import DocumentService
-        from app.services.rag import EmbeddingPipeline
-        
-        # Get document
-        doc_service = DocumentService(db)
-        doc = await doc_service.get_document(request.document_id)
-        
-        if not doc:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Document not found"
-            )
-        
-        if doc.user_id != current_user.id and not current_user.is_admin:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Access denied"
-            )
-        
-        if doc.status != "completed":
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Document has not been processed yet"
-            )
-        
-        # Get chunks
-        chunks, _ = await doc_service.get_document_chunks(request.document_id, limit=1000)
-        
-        if not chunks:
-            return IndexStatusResponse(
-                document_id=request.document_id,
-                chunks_indexed=0,
-                status="no_chunks",
-                message="No chunks found to index"
-            )
-        
-        # Initialize embedding pipeline
-        embedding_pipeline = EmbeddingPipeline(
-            model_name="all-MiniLM-L6-v2",
-            storage_path="data/vectors",
+    # Get document
+    doc_service = DocumentService(db)
+    doc = await doc_service.get_document(request.document_id)
+    
+    if not doc:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Document not found"
         )
-        
-        # Try to load existing index
-        try:
-            embedding_pipeline.load()
-        except Exception:
-            pass  # No existing index
-        
-        # Prepare chunks for indexing
-        chunk_dicts = [
-            {
-                "id": chunk.id,
-                "content": chunk.content,
-                "document_id": chunk.document_id,
-                "chunk_type": chunk.chunk_type,
-                "syllabus_tags": request.syllabus_tags or [],
-                "source": doc.original_filename,
-            }
-            for chunk in chunks
-        ]
-        
-        # Index chunks
-        count = await embedding_pipeline.index_chunks(
-            chunks=chunk_dicts,
-            user_id=current_user.id,
+    
+    if doc.user_id != current_user.id and not current_user.is_admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Access denied"
         )
-        
-        # Save index
-        embedding_pipeline.save()
-        
+    
+    if doc.status != "completed":
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Document has not been processed yet"
+        )
+    
+    if not doc.chunk_count:
         return IndexStatusResponse(
             document_id=request.document_id,
-            chunks_indexed=count,
-            status="success",
-            message=f"Successfully indexed {count} chunks"
+            chunks_indexed=0,
+            status="no_chunks",
+            message="No chunks found to index"
         )
-        
-    except HTTPException:
-        raise
-    except Exception as e:
+    
+    job = RagIndexJob(
+        document_id=doc.id,
+        user_id=current_user.id,
+        syllabus_tags=request.syllabus_tags or [],
+        status=IndexJobStatus.QUEUED.value,
+    )
+    db.add(job)
+    # Commit now so the background task can see the job
+    await db.commit()
+    
+    background_tasks.add_task(_run_index_job, job.id, embedding_pipeline)
+    
+    return IndexStatusResponse(
+        job_id=job.id,
+        document_id=job.document_id,
+        chunks_indexed=0,
+        status=job.status,
+        message=f"Indexing queued for {doc.chunk_count} chunks"
+    )
+
+
+@router.get("/index/status/{job_id}", response_model=IndexStatusResponse)
+async def get_index_status(
+    job_id: str,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Get the status of a background indexing job"""
+    job = await db.get(RagIndexJob, job_id)
+    
+    if not job:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Indexing failed: {str(e)}"
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Indexing job not found"
+        )
+    
+    if job.user_id != current_user.id and not current_user.is_admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Access denied"
         )
+    
+    messages = {
+        IndexJobStatus.QUEUED.value: "Indexing queued",
+        IndexJobStatus.RUNNING.value: "Indexing in progress",
+        IndexJobStatus.SUCCESS.value: f"Successfully indexed {job.chunks_indexed} chunks",
+        IndexJobStatus.FAILED.value: f"Indexing failed: {job.error}",
+    }
+    
+    return IndexStatusResponse(
+        job_id=job.id,
+        document_id=job.document_id,
+        chunks_indexed=job.chunks_indexed or 0,
+        status=job.status,
+        message=messages.get(job.status, job.status),
+    )
 
 
 @router.get("/stats")
 async def get_rag_stats(
     current_user: User = Depends(get_current_user),
+    embedding_pipeline=Depends(get_rag_embedding_pipeline),
 ):
     """Get statistics about the RAG system"""
     try:
-        from app.services.rag import EmbeddingPipeline
-        
-        embedding_pipeline = EmbeddingPipeline(
-            model_name="all-MiniLM-L6-v2",
-            storage_path="data/vectors",
-        )
-        
-        try:
-            embedding_pipeline.load()
-            vector_count = embedding_pipeline.vector_store.size
-        except Exception:
-            vector_count = 0
+        index_stats = embedding_pipeline.vector_store.stats()
+        vector_count = index_stats["ntotal"]
         
         return {
             "total_vectors": vector_count,
-            "embedding_model": "all-MiniLM-L6-v2",
-            "vector_dimension": 384,
-            "index_type": "flat",
+            "embedding_model": embedding_pipeline.embedding_model.model_name,
+            "vector_dimension": index_stats["dimension"],
+            "stored_bits": index_stats["stored_bits"],
+            "index_type": index_stats["index_type"],
+            "index": index_stats,
             "status": "ready" if vector_count > 0 else "empty",
         }
         
@@ -351,3 +523,125 @@ async def get_rag_stats(
             "status": "error",
             "error": str(e),
         }
+
+
+
+@router.post("/admin/reindex")
+async def reindex_vectors(
+    request: ReindexRequest,
+    current_user: User = Depends(get_current_admin_user),
+    embedding_pipeline=Depends(get_rag_embedding_pipeline),
+):
+    """
+    Rebuild the vector index in place as a different type (admin only).
+    
+    - **flat**: exact search, best for small corpora
+    - **hnsw**: graph search, sub-linear for large corpora
+    - **ivf**: clustered search, trained on the current vectors
+    - **binary_hnsw**: 1-bit quantized HNSW, 32x smaller, rescored results
+    """
+    try:
+        index_stats = await embedding_pipeline.rebuild_index(request.index_type)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    # Scores can shift slightly between index types
+    await get_query_cache().clear()
+    
+    return index_stats
+
+# ==================== Background Task ====================
+
+async def _run_index_job(job_id: str, embedding_pipeline) -> None:
+    """
+    Background task that embeds a document's chunks and records the outcome.
+    
+    Runs in its own session since the request's session is closed by now.
+    Note: In production, use a proper task queue (Celery, etc.)
+    """
+    async with AsyncSessionLocal() as db:
+        job = await db.get(RagIndexJob, job_id)
+        if not job:
+            logger.error(f"Index job not found: {job_id}")
+            return
+        
+        doc_service = DocumentService(db)
+        doc = await doc_service.get_document(job.document_id)
+        
+        job.status = IndexJobStatus.RUNNING.value
+        job.started_at = datetime.now(timezone.utc)
+        # Ends the transaction, so no connection is held while embedding
+        await db.commit()
+        
+        try:
+            source = doc.original_filename
+            syllabus_tags = job.syllabus_tags or []
+            
+            # Stream chunk pages from the database while earlier pages are
+            # being embedded; the bounded queue keeps at most 2 pages buffered
+            pages: asyncio.Queue = asyncio.Queue(maxsize=2)
+            
+            async def produce_pages():
+                try:
+                    async for chunks in doc_service.iter_document_chunks(
+                        job.document_id, page_size=INDEX_PAGE_SIZE
+                    ):
+                        page = [
+                            {
+                                "id": chunk.id,
+                                "content": chunk.content,
+                                "document_id": chunk.document_id,
+                                "chunk_type": chunk.chunk_type,
+                                "page_number": chunk.page_number,
+                                "syllabus_tags": syllabus_tags,
+                                "source": source,
+                            }
+                            for chunk in chunks
+                        ]
+                        # Release the connection between pages; the put
+                        # below may wait on embedding for a long time
+                        await db.commit()
+                        await pages.put(page)
+                except Exception:
+                    # Unblock the consumer; the error is re-raised when awaited
+                    await pages.put(None)
+                    raise
+                await pages.put(None)
+            
+            producer = asyncio.create_task(produce_pages())
+            try:
+                count = 0
+                while (chunk_dicts := await pages.get()) is not None:
+                    count += await embedding_pipeline.index_chunks(
+                        chunks=chunk_dicts,
+                        user_id=job.user_id,
+                        batch_size=INDEX_EMBED_BATCH_SIZE,
+                    )
+                # Surface database errors from the producer
+                await producer
+            finally:
+                producer.cancel()
+                # Wait for the producer to unwind before the session is used
+                # again; its own errors were either surfaced above or are
+                # secondary to the one already propagating
+                await asyncio.gather(producer, return_exceptions=True)
+            
+            # Cached answers may predate the newly indexed material
+            await get_query_cache().clear()
+            
+            job.status = IndexJobStatus.SUCCESS.value
+            job.chunks_indexed = count
+            logger.info(f"Indexed {count} chunks for document {job.document_id}")
+            
+        except Exception as e:
+            logger.error(f"Index job failed: {job_id} - {e}")
+            await db.rollback()
+            job = await db.get(RagIndexJob, job_id)
+            job.status = IndexJobStatus.FAILED.value
+            job.error = str(e)
+        
+        job.completed_at = datetime.now(timezone.utc)
+        await db.commit()
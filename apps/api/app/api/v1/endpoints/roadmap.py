@@ -2,15 +2,18 @@
 Roadmap API Endpoints
 Dynamic study plan generation and task management.
 """
-from typing import Optional, List
+from functools import lru_cache
+from typing import Optional, List, Tuple
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel, Field
 from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import date, datetime, timedelta
 import logging
 
 from app.core.database import get_db
-from app.core.dependencies import get_current_user
+from app.core.dependencies import get_current_user, get_current_user_with_plan
+from app.models.roadmap import UserStudyPlan
 from app.models.user import User
 from app.services.roadmap_service import RoadmapService
 
@@ -131,19 +134,10 @@ class SyllabusOverviewResponse(BaseModel):
 
 @router.get("/onboarding/status")
 async def get_onboarding_status(
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    user_and_plan: Tuple[User, Optional[UserStudyPlan]] = Depends(get_current_user_with_plan),
 ):
     """Check if user has completed onboarding"""
-    from app.models.roadmap import UserStudyPlan
-    from sqlalchemy import select
-    
-    result = await db.execute(
-        select(UserStudyPlan)
-        .where(UserStudyPlan.user_id == current_user.id)
-        .where(UserStudyPlan.is_active == True)
-    )
-    study_plan = result.scalar_one_or_none()
+    _, study_plan = user_and_plan
     
     if not study_plan:
         return {
@@ -167,46 +161,18 @@ async def complete_onboarding(
     current_user: User = Depends(get_current_user),
 ):
     """Complete onboarding and create personalized study plan"""
-    from app.models.roadmap import UserStudyPlan
-    from sqlalchemy import select
-    
-    # Check if plan already exists
-    result = await db.execute(
-        select(UserStudyPlan)
-        .where(UserStudyPlan.user_id == current_user.id)
+    service = RoadmapService(db)
+    study_plan = await service.upsert_study_plan(
+        user_id=current_user.id,
+        target_exam_year=request.target_exam_year,
+        preparation_level=request.preparation_level,
+        study_preference=request.study_preference,
+        daily_study_hours=request.daily_study_hours,
+        optional_subject=request.optional_subject,
+        is_working=request.is_working,
+        preferred_study_time=request.preferred_study_time,
+        medium=request.medium
     )
-    existing_plan = result.scalar_one_or_none()
-    
-    if existing_plan:
-        # Update existing plan
-        existing_plan.target_exam_year = request.target_exam_year
-        existing_plan.preparation_level = request.preparation_level
-        existing_plan.study_preference = request.study_preference
-        existing_plan.daily_study_hours = request.daily_study_hours
-        existing_plan.optional_subject = request.optional_subject
-        existing_plan.is_working = request.is_working
-        existing_plan.preferred_study_time = request.preferred_study_time
-        existing_plan.medium = request.medium
-        existing_plan.onboarding_completed = True
-        
-        await db.commit()
-        await db.refresh(existing_plan)
-        
-        study_plan = existing_plan
-    else:
-        # Create new plan
-        service = RoadmapService(db)
-        study_plan = await service.create_study_plan(
-            user_id=current_user.id,
-            target_exam_year=request.target_exam_year,
-            preparation_level=request.preparation_level,
-            study_preference=request.study_preference,
-            daily_study_hours=request.daily_study_hours,
-            optional_subject=request.optional_subject,
-            is_working=request.is_working,
-            preferred_study_time=request.preferred_study_time,
-            medium=request.medium
-        )
     
     # Calculate days to prelims
     today = date.today()
@@ -221,7 +187,7 @@ async def complete_onboarding(
         study_preference=study_plan.study_preference,
         daily_study_hours=study_plan.daily_study_hours,
         overall_progress=study_plan.overall_progress,
-        current_phase_name=study_plan.current_phase.name if study_plan.current_phase else None,
+        current_phase_name=study_plan.current_phase_name,
         onboarding_completed=study_plan.onboarding_completed,
         days_to_prelims=days_to_prelims
     )
@@ -241,23 +207,27 @@ async def get_full_roadmap(
     if not data.get("has_plan"):
         return RoadmapFullResponse(has_plan=False)
     
-    return RoadmapFullResponse(
+    # Service output is trusted: construct without validation and serialize
+    # straight to orjson instead of re-validating every task via response_model
+    response = RoadmapFullResponse.model_construct(
         has_plan=True,
         overall_progress=data.get("overall_progress", 0),
         current_phase=data.get("current_phase", 1),
         total_phases=data.get("total_phases", 3),
         phase_name=data.get("phase_name", "Getting Started"),
         phase_progress=data.get("phase_progress", 0),
-        today_tasks=[TaskResponse(**t) for t in data.get("today_tasks", [])],
-        upcoming_tasks=[TaskResponse(**t) for t in data.get("upcoming_tasks", [])],
-        revision_due=[TaskResponse(**t) for t in data.get("revision_due", [])],
+        today_tasks=[TaskResponse.model_construct(**t) for t in data.get("today_tasks", [])],
+        upcoming_tasks=[TaskResponse.model_construct(**t) for t in data.get("upcoming_tasks", [])],
+        revision_due=[TaskResponse.model_construct(**t) for t in data.get("revision_due", [])],
         completed_this_week=data.get("completed_this_week", 0),
         streak_days=data.get("streak_days", 0),
         target_exam_year=data.get("target_exam_year"),
         days_to_prelims=data.get("days_to_prelims"),
         daily_goal_hours=data.get("daily_goal_hours", 6.0),
-        phases=[PhaseResponse(**p) for p in data.get("phases", [])]
+        phases=[PhaseResponse.model_construct(**p) for p in data.get("phases", [])]
     )
+    
+    return ORJSONResponse(response.model_dump())
 
 
 @router.get("/today", response_model=List[TaskResponse])
@@ -269,8 +239,8 @@ async def get_today_tasks(
     service = RoadmapService(db)
     tasks = await service.generate_daily_tasks(current_user.id)
     
-    return [
-        TaskResponse(
+    return ORJSONResponse([
+        TaskResponse.model_construct(
             id=t.id,
             title=t.title,
             description=t.description,
@@ -286,9 +256,9 @@ async def get_today_tasks(
             subject_name=t.subject_name,
             is_revision=t.is_revision,
             scheduled_time_slot=t.scheduled_time_slot
-        )
+        ).model_dump()
         for t in tasks
-    ]
+    ])
 
 
 @router.post("/tasks/generate")
@@ -379,17 +349,15 @@ async def get_week_stats(
     today = date.today()
     week_start = today - timedelta(days=today.weekday())
     
-    stats = []
-    for i in range(7):
-        day = week_start + timedelta(days=i)
-        if day <= today:
-            day_stats = await service.get_daily_stats(current_user.id, day)
-            stats.append(day_stats)
+    daily = await service.get_stats_for_range(current_user.id, week_start, today)
+    stats = list(daily.values())
     
-    # Summary
-    total_minutes = sum(s["study_minutes"] for s in stats)
-    total_completed = sum(s["tasks_completed"] for s in stats)
-    total_tasks = sum(s["tasks_total"] for s in stats)
+    # Summary, in one pass over the days
+    total_minutes = total_completed = total_tasks = 0
+    for s in stats:
+        total_minutes += s["study_minutes"]
+        total_completed += s["tasks_completed"]
+        total_tasks += s["tasks_total"]
     
     return {
         "week_start": week_start.isoformat(),
@@ -405,11 +373,9 @@ async def get_week_stats(
 
 # ==================== Syllabus Endpoints ====================
 
-@router.get("/syllabus/overview", response_model=SyllabusOverviewResponse)
-async def get_syllabus_overview(
-    current_user: User = Depends(get_current_user),
-):
-    """Get UPSC syllabus overview"""
+@lru_cache(maxsize=1)
+def _build_syllabus_overview() -> SyllabusOverviewResponse:
+    """Build the syllabus overview once; the syllabus is static per process"""
     from app.services.upsc_syllabus_data import UPSC_SYLLABUS, get_total_syllabus_hours
     
     subjects = []
@@ -435,25 +401,31 @@ async def get_syllabus_overview(
     )
 
 
+@router.get("/syllabus/overview", response_model=SyllabusOverviewResponse)
+async def get_syllabus_overview(
+    current_user: User = Depends(get_current_user),
+):
+    """Get UPSC syllabus overview"""
+    return _build_syllabus_overview()
+
+
 @router.get("/syllabus/subject/{subject_code}")
 async def get_subject_topics(
     subject_code: str,
     current_user: User = Depends(get_current_user),
 ):
     """Get topics for a specific subject"""
-    from app.services.upsc_syllabus_data import UPSC_SYLLABUS, RECOMMENDED_BOOKS
+    from app.services.upsc_syllabus_data import RECOMMENDED_BOOKS, get_subject
     
-    for stage in UPSC_SYLLABUS["stages"]:
-        for paper in stage["papers"]:
-            for subject in paper["subjects"]:
-                if subject["code"] == subject_code:
-                    return {
-                        "code": subject["code"],
-                        "name": subject["name"],
-                        "weightage": subject.get("weightage", 0),
-                        "topics": subject.get("topics", []),
-                        "recommended_books": RECOMMENDED_BOOKS.get(subject_code, [])
-                    }
+    subject = get_subject(subject_code)
+    if subject:
+        return {
+            "code": subject["code"],
+            "name": subject["name"],
+            "weightage": subject.get("weightage", 0),
+            "topics": subject.get("topics", []),
+            "recommended_books": RECOMMENDED_BOOKS.get(subject_code, [])
+        }
     
     raise HTTPException(
         status_code=status.HTTP_404_NOT_FOUND,
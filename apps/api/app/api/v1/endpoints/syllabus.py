@@ -2,10 +2,16 @@
 Syllabus API Endpoints
 Routes for syllabus management - exams, stages, papers, subjects, topics
 """
-from typing import Optional, List
-from fastapi import APIRouter, Depends, HTTPException, status
+import hashlib
+from typing import Awaitable, Callable, Optional, List
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
 from sqlalchemy.ext.asyncio import AsyncSession
+import orjson
 
+from app.core.cache import ResponseCache
+from app.core.config import settings
 from app.core.database import get_db
 from app.core.dependencies import get_current_user, get_current_admin_user
 from app.models.user import User
@@ -15,60 +21,142 @@ from app.schemas.syllabus import (
     ExamStageCreate, ExamStageUpdate, ExamStageResponse,
     PaperCreate, PaperUpdate, PaperResponse,
     SubjectCreate, SubjectUpdate, SubjectResponse,
-    TopicCreate, TopicUpdate, TopicResponse, TopicWithChildren,
+    TopicCreate, TopicBulkCreate, TopicUpdate, TopicResponse, TopicWithChildren,
 )
 
 router = APIRouter()
 
+# Syllabus reads only change through the admin endpoints in this module
+syllabus_cache = ResponseCache(
+    namespace="syllabus",
+    ttl_seconds=settings.SYLLABUS_CACHE_TTL_SECONDS,
+)
+
+
+# ==================== Caching ====================
+
+async def _cached_json(
+    request: Request,
+    build: Callable[[], Awaitable[bytes]],
+) -> Response:
+    """
+    Serve a GET from the syllabus cache, keyed by path and query string.
+    On a miss, build() loads and serializes the body, which is then stored.
+    Errors raised by build() (e.g. 404) are not cached.
+    
+    Responses carry a weak ETag of the body and a short public max-age, so
+    browsers and CDNs can reuse them and revalidate with a bodiless 304.
+    """
+    key = f"{request.url.path}?{request.url.query}"
+    body = await syllabus_cache.get(key)
+    if body is None:
+        body = await build()
+        await syllabus_cache.set(key, body)
+    
+    etag = f'W/"{hashlib.blake2b(body, digest_size=8).hexdigest()}"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={settings.SYLLABUS_HTTP_MAX_AGE_SECONDS}",
+    }
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against our ETag"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return etag.removeprefix("W/") in candidates
+
+
+def _dump(adapter: TypeAdapter, data) -> bytes:
+    """Serialize ORM objects to JSON through their response schema"""
+    return adapter.dump_json(adapter.validate_python(data, from_attributes=True))
+
+
+async def invalidate_syllabus_cache(db: AsyncSession = Depends(get_db)):
+    """
+    Clear cached syllabus reads after a successful admin write.
+    Commits first so a concurrent read can't re-cache the old data.
+    """
+    yield
+    await db.commit()
+    await syllabus_cache.clear()
+
+
+_EXAM_TYPES = TypeAdapter(List[ExamTypeResponse])
+_EXAM_TYPE_WITH_STAGES = TypeAdapter(ExamTypeWithStages)
+_STAGES = TypeAdapter(List[ExamStageResponse])
+_PAPERS = TypeAdapter(List[PaperResponse])
+_SUBJECTS = TypeAdapter(List[SubjectResponse])
+_TOPICS = TypeAdapter(List[TopicResponse])
+_TOPIC_WITH_CHILDREN = TypeAdapter(TopicWithChildren)
+
 
 # ==================== Exam Types ====================
 
 @router.get("/exams", response_model=List[ExamTypeResponse])
 async def list_exam_types(
+    request: Request,
     db: AsyncSession = Depends(get_db),
 ):
     """List all exam types (UPSC, JEE, NEET)"""
-    service = SyllabusService(db)
-    return await service.list_exam_types()
+    async def build():
+        service = SyllabusService(db)
+        return _dump(_EXAM_TYPES, await service.list_exam_types())
+    
+    return await _cached_json(request, build)
 
 
 @router.get("/exams/{exam_id}", response_model=ExamTypeWithStages)
 async def get_exam_type(
     exam_id: str,
+    request: Request,
     db: AsyncSession = Depends(get_db),
 ):
     """Get exam type by ID with stages"""
-    service = SyllabusService(db)
-    exam = await service.get_exam_type(exam_id)
+    async def build():
+        service = SyllabusService(db)
+        exam = await service.get_exam_type(exam_id)
+        
+        if not exam:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Exam type not found"
+            )
+        
+        return _dump(_EXAM_TYPE_WITH_STAGES, exam)
     
-    if not exam:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Exam type not found"
-        )
-    
-    return exam
+    return await _cached_json(request, build)
 
 
 @router.get("/exams/code/{code}")
 async def get_exam_by_code(
     code: str,
+    request: Request,
     db: AsyncSession = Depends(get_db),
 ):
     """Get full syllabus tree for an exam by code (e.g. 'upsc')"""
-    service = SyllabusService(db)
-    tree = await service.get_full_syllabus(code)
-    
-    if not tree:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Exam '{code}' not found"
-        )
+    async def build():
+        service = SyllabusService(db)
+        tree = await service.get_full_syllabus(code)
+        
+        if not tree:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Exam '{code}' not found"
+            )
+        
+        return orjson.dumps(jsonable_encoder(tree))
     
-    return tree
+    return await _cached_json(request, build)
 
 
-@router.post("/exams", response_model=ExamTypeResponse, status_code=status.HTTP_201_CREATED)
+@router.post("/exams", response_model=ExamTypeResponse, status_code=status.HTTP_201_CREATED, dependencies=[Depends(invalidate_syllabus_cache)])
 async def create_exam_type(
     data: ExamTypeCreate,
     db: AsyncSession = Depends(get_db),
@@ -88,7 +176,7 @@ async def create_exam_type(
     return await service.create_exam_type(data)
 
 
-@router.patch("/exams/{exam_id}", response_model=ExamTypeResponse)
+@router.patch("/exams/{exam_id}", response_model=ExamTypeResponse, dependencies=[Depends(invalidate_syllabus_cache)])
 async def update_exam_type(
     exam_id: str,
     data: ExamTypeUpdate,
@@ -113,11 +201,15 @@ async def update_exam_type(
 @router.get("/stages", response_model=List[ExamStageResponse])
 async def list_stages(
     exam_type_id: str,
+    request: Request,
     db: AsyncSession = Depends(get_db),
 ):
     """List stages for an exam type"""
-    service = SyllabusService(db)
-    return await service.list_stages(exam_type_id)
+    async def build():
+        service = SyllabusService(db)
+        return _dump(_STAGES, await service.list_stages(exam_type_id))
+    
+    return await _cached_json(request, build)
 
 
 @router.get("/stages/{stage_id}", response_model=ExamStageResponse)
@@ -138,7 +230,7 @@ async def get_stage(
     return stage
 
 
-@router.post("/stages", response_model=ExamStageResponse, status_code=status.HTTP_201_CREATED)
+@router.post("/stages", response_model=ExamStageResponse, status_code=status.HTTP_201_CREATED, dependencies=[Depends(invalidate_syllabus_cache)])
 async def create_stage(
     data: ExamStageCreate,
     db: AsyncSession = Depends(get_db),
@@ -149,7 +241,7 @@ async def create_stage(
     return await service.create_stage(data)
 
 
-@router.patch("/stages/{stage_id}", response_model=ExamStageResponse)
+@router.patch("/stages/{stage_id}", response_model=ExamStageResponse, dependencies=[Depends(invalidate_syllabus_cache)])
 async def update_stage(
     stage_id: str,
     data: ExamStageUpdate,
@@ -174,11 +266,15 @@ async def update_stage(
 @router.get("/papers", response_model=List[PaperResponse])
 async def list_papers(
     stage_id: str,
+    request: Request,
     db: AsyncSession = Depends(get_db),
 ):
     """List papers for a stage"""
-    service = SyllabusService(db)
-    return await service.list_papers(stage_id)
+    async def build():
+        service = SyllabusService(db)
+        return _dump(_PAPERS, await service.list_papers(stage_id))
+    
+    return await _cached_json(request, build)
 
 
 @router.get("/papers/{paper_id}", response_model=PaperResponse)
@@ -199,7 +295,7 @@ async def get_paper(
     return paper
 
 
-@router.post("/papers", response_model=PaperResponse, status_code=status.HTTP_201_CREATED)
+@router.post("/papers", response_model=PaperResponse, status_code=status.HTTP_201_CREATED, dependencies=[Depends(invalidate_syllabus_cache)])
 async def create_paper(
     data: PaperCreate,
     db: AsyncSession = Depends(get_db),
@@ -210,7 +306,7 @@ async def create_paper(
     return await service.create_paper(data)
 
 
-@router.patch("/papers/{paper_id}", response_model=PaperResponse)
+@router.patch("/papers/{paper_id}", response_model=PaperResponse, dependencies=[Depends(invalidate_syllabus_cache)])
 async def update_paper(
     paper_id: str,
     data: PaperUpdate,
@@ -235,11 +331,15 @@ async def update_paper(
 @router.get("/subjects", response_model=List[SubjectResponse])
 async def list_subjects(
     paper_id: str,
+    request: Request,
     db: AsyncSession = Depends(get_db),
 ):
     """List subjects for a paper"""
-    service = SyllabusService(db)
-    return await service.list_subjects(paper_id)
+    async def build():
+        service = SyllabusService(db)
+        return _dump(_SUBJECTS, await service.list_subjects(paper_id))
+    
+    return await _cached_json(request, build)
 
 
 @router.get("/subjects/{subject_id}", response_model=SubjectResponse)
@@ -260,7 +360,7 @@ async def get_subject(
     return subject
 
 
-@router.post("/subjects", response_model=SubjectResponse, status_code=status.HTTP_201_CREATED)
+@router.post("/subjects", response_model=SubjectResponse, status_code=status.HTTP_201_CREATED, dependencies=[Depends(invalidate_syllabus_cache)])
 async def create_subject(
     data: SubjectCreate,
     db: AsyncSession = Depends(get_db),
@@ -271,7 +371,7 @@ async def create_subject(
     return await service.create_subject(data)
 
 
-@router.patch("/subjects/{subject_id}", response_model=SubjectResponse)
+@router.patch("/subjects/{subject_id}", response_model=SubjectResponse, dependencies=[Depends(invalidate_syllabus_cache)])
 async def update_subject(
     subject_id: str,
     data: SubjectUpdate,
@@ -295,6 +395,7 @@ async def update_subject(
 
 @router.get("/topics", response_model=List[TopicResponse])
 async def list_topics(
+    request: Request,
     subject_id: str,
     parent_id: Optional[str] = None,
     db: AsyncSession = Depends(get_db),
@@ -304,29 +405,36 @@ async def list_topics(
     
     If parent_id is not provided, returns root-level topics only.
     """
-    service = SyllabusService(db)
-    return await service.list_topics(subject_id, parent_id)
+    async def build():
+        service = SyllabusService(db)
+        return _dump(_TOPICS, await service.list_topics(subject_id, parent_id))
+    
+    return await _cached_json(request, build)
 
 
 @router.get("/topics/{topic_id}", response_model=TopicWithChildren)
 async def get_topic(
     topic_id: str,
+    request: Request,
     db: AsyncSession = Depends(get_db),
 ):
     """Get topic by ID with children"""
-    service = SyllabusService(db)
-    topic = await service.get_topic(topic_id)
+    async def build():
+        service = SyllabusService(db)
+        topic = await service.get_topic_with_descendants(topic_id)
+        
+        if not topic:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Topic not found"
+            )
+        
+        return _dump(_TOPIC_WITH_CHILDREN, topic)
     
-    if not topic:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Topic not found"
-        )
-    
-    return topic
+    return await _cached_json(request, build)
 
 
-@router.post("/topics", response_model=TopicResponse, status_code=status.HTTP_201_CREATED)
+@router.post("/topics", response_model=TopicResponse, status_code=status.HTTP_201_CREATED, dependencies=[Depends(invalidate_syllabus_cache)])
 async def create_topic(
     data: TopicCreate,
     db: AsyncSession = Depends(get_db),
@@ -341,7 +449,24 @@ async def create_topic(
     return await service.create_topic(data)
 
 
-@router.patch("/topics/{topic_id}", response_model=TopicResponse)
+@router.post("/topics/bulk", response_model=List[TopicResponse], status_code=status.HTTP_201_CREATED, dependencies=[Depends(invalidate_syllabus_cache)])
+async def create_topics_bulk(
+    data: TopicBulkCreate,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_admin_user),
+):
+    """
+    Create many topics at once (admin only).
+    
+    Use this for syllabus imports instead of firing concurrent single
+    creates: the batch is one INSERT on one connection. Parents referenced
+    by parent_id must already exist.
+    """
+    service = SyllabusService(db)
+    return await service.create_topics_bulk(data.items)
+
+
+@router.patch("/topics/{topic_id}", response_model=TopicResponse, dependencies=[Depends(invalidate_syllabus_cache)])
 async def update_topic(
     topic_id: str,
     data: TopicUpdate,
@@ -350,7 +475,13 @@ async def update_topic(
 ):
     """Update topic (admin only)"""
     service = SyllabusService(db)
-    topic = await service.update_topic(topic_id, data)
+    try:
+        topic = await service.update_topic(topic_id, data)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     
     if not topic:
         raise HTTPException(
@@ -361,7 +492,7 @@ async def update_topic(
     return topic
 
 
-@router.delete("/topics/{topic_id}", status_code=status.HTTP_204_NO_CONTENT)
+@router.delete("/topics/{topic_id}", status_code=status.HTTP_204_NO_CONTENT, dependencies=[Depends(invalidate_syllabus_cache)])
 async def delete_topic(
     topic_id: str,
     db: AsyncSession = Depends(get_db),
@@ -2,19 +2,91 @@
 AI Tutor API Endpoints
 Intelligent tutoring with RAG, multilingual output, and adjustable verbosity.
 """
-from typing import Optional, List
+import asyncio
+from typing import AsyncIterator, Optional, List
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from pydantic import BaseModel, Field
 from sqlalchemy.ext.asyncio import AsyncSession
 import logging
+import orjson
 
+from app.core.config import settings
 from app.core.database import get_db
 from app.core.dependencies import get_current_user
 from app.models.user import User
+from app.services.ai import (
+    AITutor,
+    DocumentSummarizer,
+    OutputLanguage,
+    QuestionType,
+    SummaryFormat,
+    SummaryLanguage,
+    SummaryLength,
+    VerbosityLevel,
+)
+
+# The LLM clients and RAG need numpy/sentence-transformers/faiss; resolve them once at import
+try:
+    from app.services.document_service import DocumentService
+    from app.services.rag import (
+        LLMProvider,
+        MockLLMClient,
+        create_rag_pipeline,
+        get_embedding_pipeline,
+    )
+    _AI_AVAILABLE = True
+    _AI_IMPORT_ERROR = None
+except ImportError as e:
+    _AI_AVAILABLE = False
+    _AI_IMPORT_ERROR = str(e)
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+# Request option strings -> service enums
+_VERBOSITY_MAP = {
+    "brief": VerbosityLevel.BRIEF,
+    "standard": VerbosityLevel.STANDARD,
+    "detailed": VerbosityLevel.DETAILED,
+    "exam_ready": VerbosityLevel.EXAM_READY,
+}
+
+_OUTPUT_LANGUAGE_MAP = {
+    "en": OutputLanguage.ENGLISH,
+    "hi": OutputLanguage.HINDI,
+    "hinglish": OutputLanguage.HINGLISH,
+}
+
+_QUESTION_TYPE_MAP = {
+    "factual": QuestionType.FACTUAL,
+    "conceptual": QuestionType.CONCEPTUAL,
+    "analytical": QuestionType.ANALYTICAL,
+    "comparative": QuestionType.COMPARATIVE,
+    "application": QuestionType.APPLICATION,
+}
+
+_SUMMARY_FORMAT_MAP = {
+    "bullet": SummaryFormat.BULLET,
+    "paragraph": SummaryFormat.PARAGRAPH,
+    "structured": SummaryFormat.STRUCTURED,
+    "notes": SummaryFormat.NOTES,
+    "flashcard": SummaryFormat.FLASHCARD,
+}
+
+_SUMMARY_LENGTH_MAP = {
+    "short": SummaryLength.SHORT,
+    "medium": SummaryLength.MEDIUM,
+    "long": SummaryLength.LONG,
+    "comprehensive": SummaryLength.COMPREHENSIVE,
+}
+
+_SUMMARY_LANGUAGE_MAP = {
+    "en": SummaryLanguage.ENGLISH,
+    "hi": SummaryLanguage.HINDI,
+    "hinglish": SummaryLanguage.HINGLISH,
+}
+
 
 # ==================== Request/Response Schemas ====================
 
@@ -117,78 +189,193 @@ class RevisionSummaryResponse(BaseModel):
     exam_relevance: str
 
 
-# ==================== Tutor Endpoints ====================
+# ==================== Dependencies ====================
 
-@router.post("/ask", response_model=TutorQueryResponse)
-async def ask_tutor(
-    request: TutorQueryRequest,
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
-):
+# AI components are stateless across requests, so one instance of each
+# is shared by the whole process instead of being rebuilt per request
+_llm_client_instance = None
+_tutor_instance = None
+_summarizer_instance = None
+
+
+def _require_ai() -> None:
+    """Report missing AI dependencies as 503 (checked by every AI dependency)"""
+    if not _AI_AVAILABLE:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"AI dependencies not available: {_AI_IMPORT_ERROR}"
+        )
+
+
+def _get_llm_client():
     """
-    Ask the AI tutor a question.
-    
-    Features:
-    - RAG-based answering with syllabus awareness
-    - Adjustable verbosity (brief, standard, detailed, exam_ready)
-    - Multilingual output (English, Hindi, Hinglish)
-    - Follow-up question suggestions
-    - Exam tips based on question type
+    Get the LLM client shared by the tutor and summarizer.
+    HTTP-based clients reuse one connection pool (see get_http_client).
     """
-    try:
-        from app.services.ai import AITutor, VerbosityLevel, OutputLanguage
-        from app.services.rag import EmbeddingPipeline, create_rag_pipeline, LLMProvider
-        from app.services.rag.pipeline import MockLLMClient
-        
-        # Map string to enum
-        verbosity_map = {
-            "brief": VerbosityLevel.BRIEF,
-            "standard": VerbosityLevel.STANDARD,
-            "detailed": VerbosityLevel.DETAILED,
-            "exam_ready": VerbosityLevel.EXAM_READY,
-        }
-        
-        language_map = {
-            "en": OutputLanguage.ENGLISH,
-            "hi": OutputLanguage.HINDI,
-            "hinglish": OutputLanguage.HINGLISH,
-        }
-        
-        verbosity = verbosity_map.get(request.verbosity, VerbosityLevel.STANDARD)
-        language = language_map.get(request.language, OutputLanguage.ENGLISH)
-        
-        # Initialize components
+    global _llm_client_instance
+    if _llm_client_instance is None:
+        _llm_client_instance = MockLLMClient()  # Replace with real LLM in production
+    return _llm_client_instance
+
+
+async def get_tutor():
+    """
+    Provide the process-wide AI tutor.
+    Built on first use on top of the shared embedding pipeline, so the
+    SentenceTransformer model and FAISS index are never reloaded per request.
+    """
+    global _tutor_instance
+    _require_ai()
+    if _tutor_instance is None:
         try:
-            embedding_pipeline = EmbeddingPipeline(
-                model_name="all-MiniLM-L6-v2",
-                storage_path="data/vectors",
-            )
-            embedding_pipeline.load()
             rag_pipeline = create_rag_pipeline(
-                embedding_pipeline=embedding_pipeline,
+                embedding_pipeline=await get_embedding_pipeline(),
                 llm_provider=LLMProvider.OLLAMA,
             )
-        except Exception:
+        except Exception as e:
+            logger.warning(f"Tutor running without RAG: {e}")
             rag_pipeline = None
         
-        # Create tutor
-        tutor = AITutor(
+        _tutor_instance = AITutor(
             rag_pipeline=rag_pipeline,
-            llm_client=MockLLMClient(),  # Replace with real LLM in production
+            llm_client=_get_llm_client(),
         )
-        
-        # Get response
-        response = await tutor.ask(
-            question=request.question,
-            syllabus_tags=request.syllabus_tags,
-            user_id=current_user.id,
-            language=language,
-            verbosity=verbosity,
-            include_follow_ups=request.include_follow_ups,
-            include_exam_tips=request.include_exam_tips,
+    return _tutor_instance
+
+
+async def get_summarizer():
+    """Provide the process-wide document summarizer"""
+    global _summarizer_instance
+    _require_ai()
+    if _summarizer_instance is None:
+        _summarizer_instance = DocumentSummarizer(llm_client=_get_llm_client())
+    return _summarizer_instance
+
+
+# ==================== Helpers ====================
+
+_LLM_TIMEOUT_DETAIL = "AI service timed out, please try again"
+
+
+def _llm_timeout() -> asyncio.Timeout:
+    """Deadline for one AI call, so a hung LLM can't hold the request open"""
+    return asyncio.timeout(settings.LLM_REQUEST_TIMEOUT_SECONDS)
+
+
+def _llm_timeout_error() -> HTTPException:
+    """504 raised when _llm_timeout() expires"""
+    return HTTPException(
+        status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+        detail=_LLM_TIMEOUT_DETAIL
+    )
+
+
+async def _sse(events: AsyncIterator[dict]) -> AsyncIterator[bytes]:
+    """
+    Encode tutor/summarizer stream events as Server-Sent Events.
+    
+    The upstream stream gets the same deadline as a non-streaming AI call.
+    It is enforced around each wait for the next event, not across the
+    yields, so a timeout never cancels a write to the client.
+    """
+    deadline = asyncio.get_running_loop().time() + settings.LLM_REQUEST_TIMEOUT_SECONDS
+    try:
+        while True:
+            try:
+                async with asyncio.timeout_at(deadline):
+                    event = await anext(events)
+            except StopAsyncIteration:
+                break
+            yield b"data: " + orjson.dumps(event) + b"\n\n"
+    except TimeoutError:
+        # Headers are already sent, so report failures in-band
+        logger.error("AI stream timed out")
+        yield b"data: " + orjson.dumps({"type": "error", "detail": _LLM_TIMEOUT_DETAIL}) + b"\n\n"
+    except Exception as e:
+        logger.error(f"AI stream failed: {e}")
+        # Don't expose internal errors in production
+        detail = "AI service error, please try again" if settings.is_production else str(e)
+        yield b"data: " + orjson.dumps({"type": "error", "detail": detail}) + b"\n\n"
+    finally:
+        # Stop the upstream generation if the stream ended early
+        aclose = getattr(events, "aclose", None)
+        if aclose is not None:
+            await aclose()
+
+
+async def _load_document_text(
+    db: AsyncSession,
+    document_id: str,
+    user: User,
+) -> str:
+    """
+    Load the text of a processed document the user may read.
+    Raises 404/403/400 for missing, foreign or unprocessed documents.
+    """
+    # Status, access check and chunk text in one round trip
+    found = await DocumentService(db).get_authorized_chunk_contents(
+        document_id,
+        user_id=user.id,
+        is_admin=user.is_admin,
+        limit=100,
+    )
+    
+    if found is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Document not found"
         )
+    
+    authorized, doc_status, chunk_contents = found
+    if not authorized:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Access denied"
+        )
+    
+    if doc_status != "completed":
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Document has not been processed yet"
+        )
+    
+    content = "\n\n".join(chunk_contents)
+    
+    if not content:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No content found in document"
+        )
+    
+    return content
+
+
+async def _ask_impl(
+    tutor,
+    question: str,
+    user_id: str,
+    language: OutputLanguage,
+    verbosity: VerbosityLevel,
+    syllabus_tags: Optional[List[str]] = None,
+    include_follow_ups: bool = True,
+    include_exam_tips: bool = True,
+) -> ORJSONResponse:
+    """Run a tutor query and build the /ask response; shared by /ask and /explain"""
+    try:
+        async with _llm_timeout():
+            response = await tutor.ask(
+                question=question,
+                syllabus_tags=syllabus_tags,
+                user_id=user_id,
+                language=language,
+                verbosity=verbosity,
+                include_follow_ups=include_follow_ups,
+                include_exam_tips=include_exam_tips,
+            )
         
-        return TutorQueryResponse(
+        # Service output is trusted: build without validation and skip
+        # response_model revalidation (response_model still documents the route)
+        return ORJSONResponse(TutorQueryResponse.model_construct(
             answer=response.answer,
             language=response.language,
             verbosity=response.verbosity,
@@ -199,13 +386,10 @@ async def ask_tutor(
             key_points=response.key_points,
             exam_tips=response.exam_tips,
             confidence=response.confidence,
-        )
+        ).model_dump())
         
-    except ImportError as e:
-        raise HTTPException(
-            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-            detail=f"AI dependencies not available: {str(e)}"
-        )
+    except TimeoutError:
+        raise _llm_timeout_error()
     except Exception as e:
         logger.error(f"Tutor query failed: {e}")
         raise HTTPException(
@@ -214,22 +398,80 @@ async def ask_tutor(
         )
 
 
+# ==================== Tutor Endpoints ====================
+
+@router.post("/ask", response_model=TutorQueryResponse)
+async def ask_tutor(
+    request: TutorQueryRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    tutor=Depends(get_tutor),
+):
+    """
+    Ask the AI tutor a question.
+    
+    Features:
+    - RAG-based answering with syllabus awareness
+    - Adjustable verbosity (brief, standard, detailed, exam_ready)
+    - Multilingual output (English, Hindi, Hinglish)
+    - Follow-up question suggestions
+    - Exam tips based on question type
+    """
+    return await _ask_impl(
+        tutor=tutor,
+        question=request.question,
+        user_id=current_user.id,
+        language=_OUTPUT_LANGUAGE_MAP.get(request.language, OutputLanguage.ENGLISH),
+        verbosity=_VERBOSITY_MAP.get(request.verbosity, VerbosityLevel.STANDARD),
+        syllabus_tags=request.syllabus_tags,
+        include_follow_ups=request.include_follow_ups,
+        include_exam_tips=request.include_exam_tips,
+    )
+
+
+@router.post("/ask/stream")
+async def ask_tutor_stream(
+    request: TutorQueryRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    tutor=Depends(get_tutor),
+):
+    """
+    Streaming variant of `/ask` using Server-Sent Events.
+    
+    Emits `token` events as the answer is generated, then a final `done`
+    event carrying the remaining TutorQueryResponse fields.
+    """
+    # Only authentication needed the database; free the connection for the stream
+    await db.close()
+    
+    events = tutor.astream(
+        question=request.question,
+        syllabus_tags=request.syllabus_tags,
+        user_id=current_user.id,
+        language=_OUTPUT_LANGUAGE_MAP.get(request.language, OutputLanguage.ENGLISH),
+        verbosity=_VERBOSITY_MAP.get(request.verbosity, VerbosityLevel.STANDARD),
+        include_follow_ups=request.include_follow_ups,
+        include_exam_tips=request.include_exam_tips,
+    )
+    return StreamingResponse(_sse(events), media_type="text/event-stream")
+
+
 @router.post("/explain", response_model=TutorQueryResponse)
 async def explain_topic(
     request: ExplainTopicRequest,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
+    tutor=Depends(get_tutor),
 ):
     """Explain a syllabus topic in detail"""
-    # Reuse ask endpoint with modified question
-    ask_request = TutorQueryRequest(
+    return await _ask_impl(
+        tutor=tutor,
         question=f"Explain {request.topic} in detail for UPSC preparation",
-        language=request.language,
-        verbosity=request.verbosity,
-        include_follow_ups=True,
-        include_exam_tips=True,
+        user_id=current_user.id,
+        language=_OUTPUT_LANGUAGE_MAP.get(request.language, OutputLanguage.ENGLISH),
+        verbosity=_VERBOSITY_MAP.get(request.verbosity, VerbosityLevel.STANDARD),
     )
-    return await ask_tutor(ask_request, db, current_user)
 
 
 @router.post("/practice-question", response_model=PracticeQuestionResponse)
@@ -237,30 +479,22 @@ async def generate_practice_question(
     request: PracticeQuestionRequest,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
+    tutor=Depends(get_tutor),
 ):
     """Generate a practice question on a topic with model answer"""
     try:
-        from app.services.ai import AITutor, QuestionType
-        from app.services.rag.pipeline import MockLLMClient
-        
-        question_type_map = {
-            "factual": QuestionType.FACTUAL,
-            "conceptual": QuestionType.CONCEPTUAL,
-            "analytical": QuestionType.ANALYTICAL,
-            "comparative": QuestionType.COMPARATIVE,
-            "application": QuestionType.APPLICATION,
-        }
-        
-        qtype = question_type_map.get(request.question_type, QuestionType.ANALYTICAL)
+        qtype = _QUESTION_TYPE_MAP.get(request.question_type, QuestionType.ANALYTICAL)
         
-        tutor = AITutor(llm_client=MockLLMClient())
-        result = await tutor.practice_question(
-            topic=request.topic,
-            question_type=qtype,
-        )
+        async with _llm_timeout():
+            result = await tutor.practice_question(
+                topic=request.topic,
+                question_type=qtype,
+            )
         
         return PracticeQuestionResponse(**result)
         
+    except TimeoutError:
+        raise _llm_timeout_error()
     except Exception as e:
         logger.error(f"Practice question generation failed: {e}")
         raise HTTPException(
@@ -276,6 +510,7 @@ async def summarize_content(
     request: SummarizeRequest,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
+    summarizer=Depends(get_summarizer),
 ):
     """
     Summarize text content.
@@ -288,50 +523,20 @@ async def summarize_content(
     - flashcard: Q&A flashcard format
     """
     try:
-        from app.services.ai import (
-            DocumentSummarizer, 
-            SummaryFormat, 
-            SummaryLength, 
-            SummaryLanguage
-        )
-        from app.services.rag.pipeline import MockLLMClient
-        
-        format_map = {
-            "bullet": SummaryFormat.BULLET,
-            "paragraph": SummaryFormat.PARAGRAPH,
-            "structured": SummaryFormat.STRUCTURED,
-            "notes": SummaryFormat.NOTES,
-            "flashcard": SummaryFormat.FLASHCARD,
-        }
-        
-        length_map = {
-            "short": SummaryLength.SHORT,
-            "medium": SummaryLength.MEDIUM,
-            "long": SummaryLength.LONG,
-            "comprehensive": SummaryLength.COMPREHENSIVE,
-        }
-        
-        language_map = {
-            "en": SummaryLanguage.ENGLISH,
-            "hi": SummaryLanguage.HINDI,
-            "hinglish": SummaryLanguage.HINGLISH,
-        }
-        
-        fmt = format_map.get(request.format, SummaryFormat.STRUCTURED)
-        length = length_map.get(request.length, SummaryLength.MEDIUM)
-        lang = language_map.get(request.language, SummaryLanguage.ENGLISH)
-        
-        summarizer = DocumentSummarizer(llm_client=MockLLMClient())
-        
-        result = await summarizer.summarize(
-            content=request.content,
-            format=fmt,
-            length=length,
-            language=lang,
-            extract_info=request.extract_info,
-        )
+        fmt = _SUMMARY_FORMAT_MAP.get(request.format, SummaryFormat.STRUCTURED)
+        length = _SUMMARY_LENGTH_MAP.get(request.length, SummaryLength.MEDIUM)
+        lang = _SUMMARY_LANGUAGE_MAP.get(request.language, SummaryLanguage.ENGLISH)
+        
+        async with _llm_timeout():
+            result = await summarizer.summarize(
+                content=request.content,
+                format=fmt,
+                length=length,
+                language=lang,
+                extract_info=request.extract_info,
+            )
         
-        return SummaryResponse(
+        return ORJSONResponse(SummaryResponse.model_construct(
             summary=result.summary,
             format=result.format,
             language=result.language,
@@ -342,8 +547,10 @@ async def summarize_content(
             important_dates=result.important_dates,
             important_names=result.important_names,
             source_chunks=result.source_chunks,
-        )
+        ).model_dump())
         
+    except TimeoutError:
+        raise _llm_timeout_error()
     except Exception as e:
         logger.error(f"Summarization failed: {e}")
         raise HTTPException(
@@ -357,80 +564,22 @@ async def summarize_document(
     request: SummarizeDocumentRequest,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
+    summarizer=Depends(get_summarizer),
 ):
     """Summarize a processed document by its ID"""
     try:
-        from app.services.document_service import DocumentService
-        from app.services.ai import (
-            DocumentSummarizer, 
-            SummaryFormat, 
-            SummaryLength, 
-            SummaryLanguage
-        )
-        from app.services.rag.pipeline import MockLLMClient
-        
-        # Get document chunks
-        doc_service = DocumentService(db)
-        doc = await doc_service.get_document(request.document_id)
-        
-        if not doc:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Document not found"
-            )
-        
-        if doc.user_id != current_user.id and not current_user.is_admin:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Access denied"
-            )
-        
-        if doc.status != "completed":
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Document has not been processed yet"
-            )
-        
-        # Get chunks
-        chunks, _ = await doc_service.get_document_chunks(request.document_id, limit=100)
-        content = "\n\n".join([c.content for c in chunks])
-        
-        if not content:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="No content found in document"
-            )
+        content = await _load_document_text(db, request.document_id, current_user)
         
         # Summarize
-        format_map = {
-            "bullet": SummaryFormat.BULLET,
-            "paragraph": SummaryFormat.PARAGRAPH,
-            "structured": SummaryFormat.STRUCTURED,
-            "notes": SummaryFormat.NOTES,
-            "flashcard": SummaryFormat.FLASHCARD,
-        }
-        length_map = {
-            "short": SummaryLength.SHORT,
-            "medium": SummaryLength.MEDIUM,
-            "long": SummaryLength.LONG,
-            "comprehensive": SummaryLength.COMPREHENSIVE,
-        }
-        language_map = {
-            "en": SummaryLanguage.ENGLISH,
-            "hi": SummaryLanguage.HINDI,
-            "hinglish": SummaryLanguage.HINGLISH,
-        }
-        
-        summarizer = DocumentSummarizer(llm_client=MockLLMClient())
-        
-        result = await summarizer.summarize(
-            content=content,
-            format=format_map.get(request.format, SummaryFormat.STRUCTURED),
-            length=length_map.get(request.length, SummaryLength.MEDIUM),
-            language=language_map.get(request.language, SummaryLanguage.ENGLISH),
-        )
+        async with _llm_timeout():
+            result = await summarizer.summarize(
+                content=content,
+                format=_SUMMARY_FORMAT_MAP.get(request.format, SummaryFormat.STRUCTURED),
+                length=_SUMMARY_LENGTH_MAP.get(request.length, SummaryLength.MEDIUM),
+                language=_SUMMARY_LANGUAGE_MAP.get(request.language, SummaryLanguage.ENGLISH),
+            )
         
-        return SummaryResponse(
+        return ORJSONResponse(SummaryResponse.model_construct(
             summary=result.summary,
             format=result.format,
             language=result.language,
@@ -441,10 +590,12 @@ async def summarize_document(
             important_dates=result.important_dates,
             important_names=result.important_names,
             source_chunks=result.source_chunks,
-        )
+        ).model_dump())
         
     except HTTPException:
         raise
+    except TimeoutError:
+        raise _llm_timeout_error()
     except Exception as e:
         logger.error(f"Document summarization failed: {e}")
         raise HTTPException(
@@ -453,11 +604,38 @@ async def summarize_document(
         )
 
 
+@router.post("/summarize-document/stream")
+async def summarize_document_stream(
+    request: SummarizeDocumentRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    summarizer=Depends(get_summarizer),
+):
+    """
+    Streaming variant of `/summarize-document` using Server-Sent Events.
+    
+    Emits `token` events as the summary is generated, then a final `done`
+    event carrying the remaining SummaryResponse fields.
+    """
+    content = await _load_document_text(db, request.document_id, current_user)
+    # Nothing below touches the database; free the connection for the stream
+    await db.close()
+    
+    events = summarizer.astream(
+        content=content,
+        format=_SUMMARY_FORMAT_MAP.get(request.format, SummaryFormat.STRUCTURED),
+        length=_SUMMARY_LENGTH_MAP.get(request.length, SummaryLength.MEDIUM),
+        language=_SUMMARY_LANGUAGE_MAP.get(request.language, SummaryLanguage.ENGLISH),
+    )
+    return StreamingResponse(_sse(events), media_type="text/event-stream")
+
+
 @router.post("/revision-summary", response_model=RevisionSummaryResponse)
 async def create_revision_summary(
     request: RevisionSummaryRequest,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
+    summarizer=Depends(get_summarizer),
 ):
     """
     Create a complete revision package with multiple summary formats.
@@ -469,27 +647,19 @@ async def create_revision_summary(
     - Key information extraction
     """
     try:
-        from app.services.ai import DocumentSummarizer, SummaryLanguage
-        from app.services.rag.pipeline import MockLLMClient
-        
-        language_map = {
-            "en": SummaryLanguage.ENGLISH,
-            "hi": SummaryLanguage.HINDI,
-            "hinglish": SummaryLanguage.HINGLISH,
-        }
+        lang = _SUMMARY_LANGUAGE_MAP.get(request.language, SummaryLanguage.ENGLISH)
         
-        lang = language_map.get(request.language, SummaryLanguage.ENGLISH)
-        
-        summarizer = DocumentSummarizer(llm_client=MockLLMClient())
-        
-        result = await summarizer.summarize_for_revision(
-            content=request.content,
-            topic=request.topic,
-            language=lang,
-        )
+        async with _llm_timeout():
+            result = await summarizer.summarize_for_revision(
+                content=request.content,
+                topic=request.topic,
+                language=lang,
+            )
         
-        return RevisionSummaryResponse(**result)
+        return ORJSONResponse(RevisionSummaryResponse.model_construct(**result).model_dump())
         
+    except TimeoutError:
+        raise _llm_timeout_error()
     except Exception as e:
         logger.error(f"Revision summary failed: {e}")
         raise HTTPException(
@@ -3,10 +3,9 @@ User Management Endpoints
 Profile management and user operations
 """
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.ext.asyncio import AsyncSession
+from pydantic import TypeAdapter
 
-from app.core.database import get_db
-from app.core.dependencies import get_current_user
+from app.core.dependencies import get_current_user, get_user_service, get_auth_service
 from app.models.user import User
 from app.schemas.user import UserUpdate, UserResponse, PasswordChange
 from app.schemas.auth import MessageResponse
@@ -16,6 +15,8 @@ from app.services.auth_service import AuthService
 
 router = APIRouter()
 
+_USER = TypeAdapter(UserResponse)
+
 
 @router.get(
     "/me",
@@ -30,7 +31,7 @@ async def get_my_profile(
     
     Requires valid access token in Authorization header.
     """
-    return UserResponse.model_validate(current_user)
+    return _USER.validate_python(current_user, from_attributes=True)
 
 
 @router.patch(
@@ -41,7 +42,7 @@ async def get_my_profile(
 async def update_my_profile(
     user_data: UserUpdate,
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    user_service: UserService = Depends(get_user_service)
 ):
     """
     Update the authenticated user's profile.
@@ -55,8 +56,6 @@ async def update_my_profile(
     
     Requires valid access token in Authorization header.
     """
-    user_service = UserService(db)
-    
     updated_user = await user_service.update(current_user.id, user_data)
     
     if not updated_user:
@@ -65,7 +64,7 @@ async def update_my_profile(
             detail="User not found"
         )
     
-    return UserResponse.model_validate(updated_user)
+    return _USER.validate_python(updated_user, from_attributes=True)
 
 
 @router.post(
@@ -76,7 +75,7 @@ async def update_my_profile(
 async def change_password(
     password_data: PasswordChange,
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    auth_service: AuthService = Depends(get_auth_service)
 ):
     """
     Change the authenticated user's password.
@@ -87,8 +86,6 @@ async def change_password(
     
     Requires valid access token in Authorization header.
     """
-    auth_service = AuthService(db)
-    
     success = await auth_service.change_password(
         current_user,
         password_data.current_password,
@@ -114,7 +111,7 @@ async def change_password(
 )
 async def deactivate_account(
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    user_service: UserService = Depends(get_user_service)
 ):
     """
     Deactivate the authenticated user's account.
@@ -122,8 +119,6 @@ async def deactivate_account(
     This is a soft delete - the account can be reactivated by admin.
     Requires valid access token in Authorization header.
     """
-    user_service = UserService(db)
-    
     await user_service.deactivate(current_user.id)
     
     return MessageResponse(
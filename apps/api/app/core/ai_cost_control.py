@@ -4,19 +4,26 @@ Daily token limits, request throttling, caching, and graceful degradation
 """
 import hashlib
 import json
+import re
 import time
-from datetime import datetime, timezone, date
-from typing import Optional, Dict, Any
+import uuid
+from collections import OrderedDict
+from datetime import date, datetime, timedelta, timezone
+from typing import Optional, Dict, Any, List, Tuple
 from dataclasses import dataclass, field
 from functools import wraps
+from itertools import islice
 import asyncio
 import logging
 
-from sqlalchemy import Column, String, Integer, Float, Date, DateTime
+import numpy as np
+import orjson
+from sqlalchemy import Column, String, Integer, Float, Date, DateTime, Index
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
-from app.core.database import Base
+from app.core.cache import RedisError, get_redis
+from app.core.database import AsyncSessionLocal, Base, dialect_insert
 from app.models.base import TimestampMixin
 
 logger = logging.getLogger(__name__)
@@ -26,9 +33,9 @@ logger = logging.getLogger(__name__)
 # CONFIGURATION
 # ============================================================
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class AICostConfig:
-    """AI cost control configuration"""
+    """AI cost control configuration (immutable; read on every AI call)"""
     
     # Daily limits per user
     DAILY_TOKEN_LIMIT: int = 50_000
@@ -39,10 +46,10 @@ class AICostConfig:
     MAX_OUTPUT_TOKENS: int = 2000
     MAX_CONTEXT_CHUNKS: int = 5
     
-    # Throttling
-    MIN_REQUEST_INTERVAL_SECONDS: float = 2.0
-    BURST_LIMIT: int = 5  # Max requests before throttling
-    BURST_WINDOW_SECONDS: int = 10
+    # Throttling (per-user token buckets)
+    MIN_REQUEST_INTERVAL_SECONDS: float = 2.0  # Sustained rate: one request per interval
+    BURST_LIMIT: int = 5  # Requests allowed back to back before the rate applies
+    TOKENS_PER_MINUTE: int = 20_000  # Sustained LLM token rate (also the token burst)
     
     # Caching
     CACHE_TTL_SECONDS: int = 3600  # 1 hour
@@ -53,6 +60,11 @@ class AICostConfig:
     COST_PER_1K_OUTPUT: float = 0.03
     DAILY_BUDGET_USD: float = 50.0  # Platform-wide
     
+    # Usage log persistence (batched off the request path)
+    USAGE_FLUSH_INTERVAL_SECONDS: float = 0.5
+    USAGE_FLUSH_BATCH_SIZE: int = 500
+    USAGE_QUEUE_MAX_SIZE: int = 10_000
+    
     # Degradation thresholds
     SOFT_LIMIT_PERCENT: float = 80  # Start limiting at 80% budget
     HARD_LIMIT_PERCENT: float = 95  # Stop at 95%
@@ -68,6 +80,15 @@ AI_COST_CONFIG = AICostConfig()
 class AIUsageLog(Base, TimestampMixin):
     """Track AI usage per user per day"""
     __tablename__ = "ai_usage_logs"
+    __table_args__ = (
+        # One row per user per day (the usage upsert's conflict target).
+        # Covers the quota read, so it is answered by an index-only scan.
+        Index(
+            'uq_ai_usage_logs_user_date', 'user_id', 'date',
+            unique=True,
+            postgresql_include=['tokens_total', 'request_count'],
+        ),
+    )
     
     id = Column(String(36), primary_key=True)
     user_id = Column(String(36), nullable=False, index=True)
@@ -106,82 +127,214 @@ class DailyAICost(Base, TimestampMixin):
 
 
 # ============================================================
-# IN-MEMORY CACHE FOR AI RESPONSES
+# SHARED CACHE FOR AI RESPONSES
 # ============================================================
 
 class AIResponseCache:
-    """Cache AI responses to avoid repeated calls"""
+    """
+    Cache AI responses to avoid repeated calls.
+    
+    Exact-match entries live in Redis under `ai:cache:<blake2b>` with the
+    cache TTL, so every worker shares them and Redis handles eviction
+    (run it with `maxmemory-policy allkeys-lru`). Responses must be
+    JSON-serializable.
+    
+    Each worker also keeps its recent entries in memory, which back
+    get_similar() and serve exact lookups when Redis is unreachable.
+    Local timestamps come from time.monotonic(), so wall-clock jumps
+    cannot expire or resurrect entries.
+    For get_similar(), every local entry owns a slot in a bitmap matrix
+    (one bit per vocabulary word), so Jaccard similarity against all
+    entries is a few vectorized operations instead of a Python loop.
+    """
+    
+    KEY_PREFIX = "ai:cache:"
+    
+    # Rebuild the word -> bit vocabulary from live entries past this size
+    MAX_VOCAB_SIZE = 16_384
     
     def __init__(self, max_size: int = 1000):
-        self.cache: Dict[str, Dict[str, Any]] = {}
+        # Local LRU: most recently used entries at the end
+        self.cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
         self.max_size = max_size
         self._lock = asyncio.Lock()
+        
+        # Token bitmaps for get_similar, one row per slot
+        self._vocab: Dict[str, int] = {}
+        self._bits = np.zeros((max_size, 1), dtype=np.uint64)
+        self._word_counts = np.zeros(max_size, dtype=np.int64)
+        self._timestamps = np.full(max_size, -np.inf)
+        self._slot_keys: List[Optional[str]] = [None] * max_size
+        self._free_slots = list(range(max_size - 1, -1, -1))
     
-    def _make_key(self, query: str, context_hash: str = "") -> str:
-        """Create cache key from query and context"""
-        combined = f"{query.lower().strip()}:{context_hash}"
-        return hashlib.md5(combined.encode()).hexdigest()
+    @staticmethod
+    def make_key(
+        query: str,
+        context_hash: str = "",
+        model: str = "",
+        provider: str = "",
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+    ) -> str:
+        """
+        Create cache key from the query and everything that changes its answer.
+        
+        Callers compute it once per request and pass it to both get() and
+        set(), so the query is normalized and hashed a single time.
+        The key only needs to be collision-resistant, not secret, so a
+        128-bit BLAKE2b digest is used (faster than SHA-256 and shorter).
+        """
+        combined = f"{query.lower().strip()}|{context_hash}|{model}|{provider}|{temperature}|{max_tokens}"
+        return hashlib.blake2b(combined.encode(), digest_size=16).hexdigest()
     
-    async def get(self, query: str, context_hash: str = "") -> Optional[Dict]:
-        """Get cached response if exists and not expired"""
+    async def get(self, key: str) -> Optional[Dict]:
+        """Get cached response for a make_key() key if it exists and has not expired"""
+        client = get_redis()
+        if client is not None:
+            try:
+                cached = await client.get(self.KEY_PREFIX + key)
+                if cached is not None:
+                    logger.info(f"Cache hit for key: {key}")
+                    return orjson.loads(cached)
+                return None
+            except (RedisError, OSError) as e:
+                logger.warning(f"AI cache read failed, using local cache: {e}")
+        
         async with self._lock:
-            key = self._make_key(query, context_hash)
             if key not in self.cache:
                 return None
             
             entry = self.cache[key]
-            if time.time() - entry["timestamp"] > AI_COST_CONFIG.CACHE_TTL_SECONDS:
-                del self.cache[key]
+            if time.monotonic() - entry["timestamp"] > AI_COST_CONFIG.CACHE_TTL_SECONDS:
+                self._release_slot(self.cache.pop(key)["slot"])
                 return None
             
-            logger.info(f"Cache hit for query: {query[:50]}...")
+            self.cache.move_to_end(key)
+            logger.info(f"Cache hit for key: {key}")
             return entry["response"]
     
-    async def set(self, query: str, response: Dict, context_hash: str = ""):
-        """Cache a response"""
+    async def set(self, key: str, query: str, response: Dict):
+        """Cache a response under a make_key() key; the query feeds get_similar()"""
+        client = get_redis()
+        if client is not None:
+            try:
+                await client.set(
+                    self.KEY_PREFIX + key,
+                    orjson.dumps(response),
+                    ex=AI_COST_CONFIG.CACHE_TTL_SECONDS,
+                )
+            except (RedisError, OSError, TypeError) as e:
+                logger.warning(f"AI cache write failed, caching locally only: {e}")
+        
         async with self._lock:
-            # Evict old entries if at capacity
-            if len(self.cache) >= self.max_size:
-                oldest_key = min(self.cache.keys(), key=lambda k: self.cache[k]["timestamp"])
-                del self.cache[oldest_key]
+            # Evict the least recently used entry if at capacity
+            if key in self.cache:
+                self.cache.move_to_end(key)
+                slot = self.cache[key]["slot"]
+            else:
+                if len(self.cache) >= self.max_size:
+                    _, evicted = self.cache.popitem(last=False)
+                    self._release_slot(evicted["slot"])
+                slot = self._free_slots.pop()
             
-            key = self._make_key(query, context_hash)
+            now = time.monotonic()
             self.cache[key] = {
                 "response": response,
-                "timestamp": time.time(),
-                "query": query[:100]
+                "timestamp": now,
+                "query": query[:100],
+                "slot": slot,
             }
+            self._fill_slot(slot, key, query[:100], now)
     
     async def get_similar(self, query: str) -> Optional[Dict]:
         """Find similar cached query (for fuzzy matching)"""
         # Simple implementation - in production, use vector similarity
         query_words = set(query.lower().split())
+        ttl = AI_COST_CONFIG.CACHE_TTL_SECONDS
+        threshold = AI_COST_CONFIG.CACHE_SIMILAR_THRESHOLD
         
         async with self._lock:
-            best_match = None
-            best_score = 0
+            if not self.cache or not query_words:
+                return None
             
-            for key, entry in self.cache.items():
-                if time.time() - entry["timestamp"] > AI_COST_CONFIG.CACHE_TTL_SECONDS:
-                    continue
-                
-                cached_words = set(entry["query"].lower().split())
-                if not cached_words:
-                    continue
-                
-                # Jaccard similarity
-                intersection = len(query_words & cached_words)
-                union = len(query_words | cached_words)
-                score = intersection / union if union > 0 else 0
-                
-                if score > best_score and score >= AI_COST_CONFIG.CACHE_SIMILAR_THRESHOLD:
-                    best_score = score
-                    best_match = entry["response"]
+            # Jaccard similarity against every slot: |A & B| / (|A| + |B| - |A & B|).
+            # Query words missing from the vocabulary only add to the union.
+            query_bits = self._to_bits(query_words)
+            intersection = _popcount_rows(self._bits & query_bits)
+            union = len(query_words) + self._word_counts - intersection
+            
+            now = time.monotonic()
+            live = (
+                (self._word_counts > 0)
+                & (now - self._timestamps <= ttl)
+            )
+            scores = np.where(live, intersection / np.maximum(union, 1), 0.0)
             
-            if best_match:
-                logger.info(f"Similar cache hit (score={best_score:.2f})")
+            best = int(np.argmax(scores))
+            best_score = float(scores[best])
+            if best_score < threshold:
+                return None
             
-            return best_match
+            logger.info(f"Similar cache hit (score={best_score:.2f})")
+            return self.cache[self._slot_keys[best]]["response"]
+    
+    def _to_bits(self, words) -> np.ndarray:
+        """Bitmap of the known words in a token set"""
+        row = np.zeros(self._bits.shape[1], dtype=np.uint64)
+        for word in words:
+            bit = self._vocab.get(word)
+            if bit is not None:
+                row[bit >> 6] |= np.uint64(1) << np.uint64(bit & 63)
+        return row
+    
+    def _fill_slot(self, slot: int, key: str, query: str, timestamp: float) -> None:
+        """Store an entry's token bitmap, adding new words to the vocabulary"""
+        words = set(query.lower().split())
+        if len(self._vocab) + len(words.difference(self._vocab)) > self.MAX_VOCAB_SIZE:
+            self._rebuild_vocab(exclude_slot=slot)
+        
+        self._encode_slot(slot, words)
+        self._word_counts[slot] = len(words)
+        self._timestamps[slot] = timestamp
+        self._slot_keys[slot] = key
+    
+    def _encode_slot(self, slot: int, words) -> None:
+        for word in words.difference(self._vocab):
+            self._vocab[word] = len(self._vocab)
+        
+        needed = (len(self._vocab) + 63) // 64
+        if needed > self._bits.shape[1]:
+            grown = np.zeros((self.max_size, max(needed, self._bits.shape[1] * 2)), dtype=np.uint64)
+            grown[:, :self._bits.shape[1]] = self._bits
+            self._bits = grown
+        
+        self._bits[slot] = self._to_bits(words)
+    
+    def _release_slot(self, slot: int) -> None:
+        self._bits[slot] = 0
+        self._word_counts[slot] = 0
+        self._timestamps[slot] = -np.inf
+        self._slot_keys[slot] = None
+        self._free_slots.append(slot)
+    
+    def _rebuild_vocab(self, exclude_slot: int) -> None:
+        """Drop words no live entry uses any more and re-encode the bitmaps"""
+        self._vocab = {}
+        self._bits = np.zeros((self.max_size, 1), dtype=np.uint64)
+        for entry in self.cache.values():
+            if entry["slot"] != exclude_slot:
+                self._encode_slot(entry["slot"], set(entry["query"].lower().split()))
+
+
+# Set-bit count of each byte value, for popcount without NumPy 2's bitwise_count
+_BYTE_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.int64)
+
+
+def _popcount_rows(bits: np.ndarray) -> np.ndarray:
+    """Number of set bits in each row of a uint64 matrix"""
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(bits).sum(axis=1, dtype=np.int64)
+    return _BYTE_POPCOUNT[bits.view(np.uint8)].sum(axis=1)
 
 
 # Global cache instance
@@ -192,33 +345,124 @@ ai_cache = AIResponseCache()
 # USAGE TRACKER
 # ============================================================
 
+@dataclass(slots=True)
+class UsageEvent:
+    """One AI call, queued for the usage log"""
+    user_id: str
+    day: date
+    tokens_input: int
+    tokens_output: int
+    cost: float
+    from_cache: bool
+    at: datetime
+
+
 class AIUsageTracker:
-    """Track and enforce AI usage limits"""
+    """
+    Track and enforce AI usage limits.
+    
+    Daily counters live in Redis (`ai:usage:<user>:<YYYYMMDD>:*` and
+    `ai:platform:cost:<YYYYMMDD>`) and expire at the next UTC midnight, so
+    limits hold across workers and restarts and increments are atomic.
+    If Redis is unreachable, writes fall back to this process's memory and
+    reads also consult the flushed usage log.
+    
+    The durable per-day rows are written off the request path: events are
+    queued and a background task flushes them in batches.
+    """
     
     def __init__(self):
-        self.user_usage: Dict[str, Dict] = {}
-        self.platform_cost_today: float = 0.0
-        self._lock = asyncio.Lock()
+        # Fallback counters, keyed like their Redis counterparts
+        self.user_usage: Dict[str, Dict[str, int]] = {}
+        self.platform_cost: Dict[str, float] = {}
+        
+        # Usage rows waiting for the background flusher
+        self._pending: "asyncio.Queue[Optional[UsageEvent]]" = asyncio.Queue(
+            maxsize=AI_COST_CONFIG.USAGE_QUEUE_MAX_SIZE
+        )
+        self._flusher: Optional[asyncio.Task] = None
+    
+    @staticmethod
+    def _today() -> Tuple[str, int]:
+        """Today's UTC date stamp and the epoch second its counters expire"""
+        now = datetime.now(timezone.utc)
+        midnight = datetime.combine(
+            now.date() + timedelta(days=1), datetime.min.time(), tzinfo=timezone.utc
+        )
+        return now.strftime("%Y%m%d"), int(midnight.timestamp())
+    
+    async def _get_usage(self, user_id: str) -> Dict[str, int]:
+        """Today's token and request counts for a user"""
+        day, _ = self._today()
+        prefix = f"ai:usage:{user_id}:{day}"
+        
+        client = get_redis()
+        if client is not None:
+            try:
+                tokens, requests = await client.mget(f"{prefix}:tokens", f"{prefix}:requests")
+                return {"tokens": int(tokens or 0), "requests": int(requests or 0)}
+            except (RedisError, OSError) as e:
+                logger.warning(f"AI usage read failed, using usage log: {e}")
+        
+        # The flushed log is shared by all workers; this worker's counters
+        # cover anything still queued, so take whichever is further along
+        usage = self.user_usage.get(prefix, {})
+        tokens, requests = await self._get_logged_usage(user_id)
+        return {
+            "tokens": max(tokens, usage.get("tokens", 0)),
+            "requests": max(requests, usage.get("requests", 0)),
+        }
+    
+    @staticmethod
+    async def _get_logged_usage(user_id: str) -> Tuple[int, int]:
+        """Today's (tokens, requests) from the usage log, or zeros if unavailable"""
+        try:
+            async with AsyncSessionLocal() as db:
+                result = await db.execute(
+                    select(AIUsageLog.tokens_total, AIUsageLog.request_count)
+                    .where(
+                        AIUsageLog.user_id == user_id,
+                        AIUsageLog.date == datetime.now(timezone.utc).date(),
+                    )
+                )
+                row = result.first()
+        except Exception as e:
+            logger.warning(f"AI usage log read failed, using local counters: {e}")
+            return 0, 0
+        
+        if row is None:
+            return 0, 0
+        return row.tokens_total or 0, row.request_count or 0
+    
+    async def _get_platform_cost(self) -> float:
+        """Today's platform-wide estimated cost in USD"""
+        day, _ = self._today()
+        cost_key = f"ai:platform:cost:{day}"
+        
+        client = get_redis()
+        if client is not None:
+            try:
+                return float(await client.get(cost_key) or 0.0)
+            except (RedisError, OSError) as e:
+                logger.warning(f"AI cost read failed, using local total: {e}")
+        
+        return self.platform_cost.get(cost_key, 0.0)
     
     async def check_user_limits(self, user_id: str) -> tuple[bool, str]:
         """Check if user is within limits"""
-        async with self._lock:
-            today = date.today().isoformat()
-            key = f"{user_id}:{today}"
-            
-            usage = self.user_usage.get(key, {"tokens": 0, "requests": 0})
-            
-            if usage["tokens"] >= AI_COST_CONFIG.DAILY_TOKEN_LIMIT:
-                return False, "You've reached your daily AI limit. Resets at midnight."
-            
-            if usage["requests"] >= AI_COST_CONFIG.DAILY_REQUEST_LIMIT:
-                return False, "Maximum daily AI requests reached. Try again tomorrow."
-            
-            return True, ""
+        usage = await self._get_usage(user_id)
+        
+        if usage["tokens"] >= AI_COST_CONFIG.DAILY_TOKEN_LIMIT:
+            return False, "You've reached your daily AI limit. Resets at midnight UTC."
+        
+        if usage["requests"] >= AI_COST_CONFIG.DAILY_REQUEST_LIMIT:
+            return False, "Maximum daily AI requests reached. Try again tomorrow."
+        
+        return True, ""
     
     async def check_platform_budget(self) -> tuple[bool, str]:
         """Check platform-wide budget"""
-        budget_used = (self.platform_cost_today / AI_COST_CONFIG.DAILY_BUDGET_USD) * 100
+        budget_used = (await self._get_platform_cost() / AI_COST_CONFIG.DAILY_BUDGET_USD) * 100
         
         if budget_used >= AI_COST_CONFIG.HARD_LIMIT_PERCENT:
             return False, "AI service is temporarily limited. Please try again later."
@@ -236,38 +480,214 @@ class AIUsageTracker:
         tokens_output: int,
         from_cache: bool = False
     ):
-        """Record AI usage"""
-        async with self._lock:
-            today = date.today().isoformat()
-            key = f"{user_id}:{today}"
+        """
+        Record AI usage.
+        
+        Counters are bumped in Redis right away, since limits depend on
+        them. The AIUsageLog/DailyAICost rows are written in the
+        background, so the request never waits on the database.
+        """
+        day, expire_at = self._today()
+        prefix = f"ai:usage:{user_id}:{day}"
+        cost_key = f"ai:platform:cost:{day}"
+        
+        if from_cache:
+            increments = {f"{prefix}:cached": 1}
+            cost = 0.0
+        else:
+            total_tokens = tokens_input + tokens_output
+            increments = {f"{prefix}:tokens": total_tokens, f"{prefix}:requests": 1}
             
-            if key not in self.user_usage:
-                self.user_usage[key] = {"tokens": 0, "requests": 0, "cached": 0}
+            # Calculate cost
+            cost = (
+                (tokens_input / 1000) * AI_COST_CONFIG.COST_PER_1K_INPUT +
+                (tokens_output / 1000) * AI_COST_CONFIG.COST_PER_1K_OUTPUT
+            )
+        
+        day_total = None
+        client = get_redis()
+        if client is not None:
+            try:
+                # One round trip; each INCRBY is atomic across workers
+                pipe = client.pipeline(transaction=False)
+                for key, amount in increments.items():
+                    pipe.incrby(key, amount)
+                    pipe.expireat(key, expire_at)
+                if cost:
+                    pipe.incrbyfloat(cost_key, cost)
+                    pipe.expireat(cost_key, expire_at)
+                results = await pipe.execute()
+                if cost:
+                    day_total = float(results[-2])
+            except (RedisError, OSError) as e:
+                logger.warning(f"AI usage write failed, counting locally: {e}")
+                client = None
+        
+        if client is None:
+            usage = self.user_usage.setdefault(prefix, {})
+            for key, amount in increments.items():
+                field_name = key.rsplit(":", 1)[1]
+                usage[field_name] = usage.get(field_name, 0) + amount
+            self.platform_cost[cost_key] = self.platform_cost.get(cost_key, 0.0) + cost
+            day_total = self.platform_cost[cost_key]
+        
+        now = datetime.now(timezone.utc)
+        self._enqueue(UsageEvent(
+            user_id=user_id,
+            day=now.date(),
+            tokens_input=tokens_input,
+            tokens_output=tokens_output,
+            cost=cost,
+            from_cache=from_cache,
+            at=now,
+        ))
+        
+        if not from_cache:
+            logger.info(
+                f"AI usage: user={user_id}, tokens={total_tokens}, "
+                f"cost=${cost:.4f}, day_total=${day_total or 0.0:.2f}"
+            )
+    
+    def _enqueue(self, event: "UsageEvent") -> None:
+        """Queue an event for the background flusher, starting it on first use"""
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.create_task(self._flush_loop())
+        try:
+            self._pending.put_nowait(event)
+        except asyncio.QueueFull:
+            logger.warning(f"AI usage queue full, dropping log row for user={event.user_id}")
+    
+    async def _flush_loop(self) -> None:
+        """
+        Write queued usage in batches.
+        
+        Waits for the first event, lets more accumulate for the flush
+        interval, then writes up to a batch worth in one transaction.
+        A None sentinel (from close()) stops the loop after its batch.
+        """
+        while True:
+            events = [await self._pending.get()]
+            await asyncio.sleep(AI_COST_CONFIG.USAGE_FLUSH_INTERVAL_SECONDS)
+            while len(events) < AI_COST_CONFIG.USAGE_FLUSH_BATCH_SIZE and not self._pending.empty():
+                events.append(self._pending.get_nowait())
             
-            if from_cache:
-                self.user_usage[key]["cached"] += 1
-            else:
-                total_tokens = tokens_input + tokens_output
-                self.user_usage[key]["tokens"] += total_tokens
-                self.user_usage[key]["requests"] += 1
+            stop = None in events
+            await self._write_batch([event for event in events if event is not None])
+            if stop:
+                return
+    
+    @staticmethod
+    async def _write_batch(events: List["UsageEvent"]) -> None:
+        """
+        Fold a batch of events into the AIUsageLog/DailyAICost rows.
+        
+        Events are summed per (user, day) and per day first, then each
+        table gets one multi-row INSERT ... ON CONFLICT DO UPDATE that
+        increments the existing counters, all in a single transaction.
+        """
+        if not events:
+            return
+        
+        now = datetime.now(timezone.utc)
+        user_rows: Dict[Tuple[str, date], Dict[str, Any]] = {}
+        day_rows: Dict[date, Dict[str, Any]] = {}
+        
+        for event in events:
+            row = user_rows.get((event.user_id, event.day))
+            if row is None:
+                row = user_rows[(event.user_id, event.day)] = {
+                    "id": str(uuid.uuid4()),
+                    "user_id": event.user_id,
+                    "date": event.day,
+                    "tokens_input": 0,
+                    "tokens_output": 0,
+                    "tokens_total": 0,
+                    "request_count": 0,
+                    "cached_count": 0,
+                    "failed_count": 0,
+                    "estimated_cost_usd": 0.0,
+                    "last_request_at": event.at,
+                    "created_at": now,
+                    "updated_at": now,
+                }
+            row["last_request_at"] = max(row["last_request_at"], event.at)
+            
+            if event.from_cache:
+                row["cached_count"] += 1
+                continue
+            
+            tokens_total = event.tokens_input + event.tokens_output
+            row["tokens_input"] += event.tokens_input
+            row["tokens_output"] += event.tokens_output
+            row["tokens_total"] += tokens_total
+            row["request_count"] += 1
+            row["estimated_cost_usd"] += event.cost
+            
+            day = day_rows.get(event.day)
+            if day is None:
+                day = day_rows[event.day] = {
+                    "id": str(uuid.uuid4()),
+                    "date": event.day,
+                    "total_tokens": 0,
+                    "total_requests": 0,
+                    "total_cost_usd": 0.0,
+                    "created_at": now,
+                    "updated_at": now,
+                }
+            day["total_tokens"] += tokens_total
+            day["total_requests"] += 1
+            day["total_cost_usd"] += event.cost
+        
+        try:
+            async with AsyncSessionLocal() as db:
+                insert = dialect_insert(db)
                 
-                # Calculate cost
-                cost = (
-                    (tokens_input / 1000) * AI_COST_CONFIG.COST_PER_1K_INPUT +
-                    (tokens_output / 1000) * AI_COST_CONFIG.COST_PER_1K_OUTPUT
+                stmt = insert(AIUsageLog).values(list(user_rows.values()))
+                excluded = stmt.excluded
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=[AIUsageLog.user_id, AIUsageLog.date],
+                    set_={
+                        "tokens_input": AIUsageLog.tokens_input + excluded.tokens_input,
+                        "tokens_output": AIUsageLog.tokens_output + excluded.tokens_output,
+                        "tokens_total": AIUsageLog.tokens_total + excluded.tokens_total,
+                        "request_count": AIUsageLog.request_count + excluded.request_count,
+                        "cached_count": AIUsageLog.cached_count + excluded.cached_count,
+                        "estimated_cost_usd": AIUsageLog.estimated_cost_usd + excluded.estimated_cost_usd,
+                        "last_request_at": excluded.last_request_at,
+                        "updated_at": excluded.updated_at,
+                    },
                 )
-                self.platform_cost_today += cost
+                await db.execute(stmt)
                 
-                logger.info(
-                    f"AI usage: user={user_id}, tokens={total_tokens}, "
-                    f"cost=${cost:.4f}, day_total=${self.platform_cost_today:.2f}"
-                )
+                if day_rows:
+                    daily = insert(DailyAICost).values(list(day_rows.values()))
+                    excluded = daily.excluded
+                    daily = daily.on_conflict_do_update(
+                        index_elements=[DailyAICost.date],
+                        set_={
+                            "total_tokens": DailyAICost.total_tokens + excluded.total_tokens,
+                            "total_requests": DailyAICost.total_requests + excluded.total_requests,
+                            "total_cost_usd": DailyAICost.total_cost_usd + excluded.total_cost_usd,
+                            "updated_at": excluded.updated_at,
+                        },
+                    )
+                    await db.execute(daily)
+                
+                await db.commit()
+        except Exception as e:
+            logger.error(f"AI usage flush failed, dropped {len(events)} events: {e}")
+    
+    async def close(self) -> None:
+        """Flush queued usage and stop the background flusher (called on shutdown)"""
+        if self._flusher is None or self._flusher.done():
+            return
+        await self._pending.put(None)
+        await self._flusher
+        self._flusher = None
     
     async def get_user_remaining(self, user_id: str) -> Dict:
         """Get user's remaining quota"""
-        today = date.today().isoformat()
-        key = f"{user_id}:{today}"
-        usage = self.user_usage.get(key, {"tokens": 0, "requests": 0})
+        usage = await self._get_usage(user_id)
         
         return {
             "tokens_remaining": AI_COST_CONFIG.DAILY_TOKEN_LIMIT - usage["tokens"],
@@ -285,44 +705,65 @@ ai_tracker = AIUsageTracker()
 # THROTTLING DECORATOR
 # ============================================================
 
+@dataclass(slots=True)
+class TokenBucket:
+    """A user's remaining request and LLM-token allowance"""
+    request_tokens: float
+    token_tokens: float
+    last_update: float
+
+
 class RequestThrottler:
-    """Per-user request throttling"""
+    """
+    Per-user request throttling with token buckets.
+    
+    Each user has a request bucket (BURST_LIMIT deep, refilled at one
+    request per MIN_REQUEST_INTERVAL_SECONDS) and an LLM-token bucket
+    (refilled at TOKENS_PER_MINUTE). Buckets refill lazily on each check.
+    
+    A check never awaits, so it runs atomically on the event loop and
+    needs no lock; users never wait on each other.
+    """
     
     def __init__(self):
-        self.last_request: Dict[str, float] = {}
-        self.burst_requests: Dict[str, list] = {}
-        self._lock = asyncio.Lock()
+        self.buckets: Dict[str, TokenBucket] = {}
     
-    async def check_throttle(self, user_id: str) -> tuple[bool, float]:
-        """Check if request should be throttled"""
-        async with self._lock:
-            now = time.time()
-            
-            # Clean old burst data
-            window_start = now - AI_COST_CONFIG.BURST_WINDOW_SECONDS
-            self.burst_requests[user_id] = [
-                t for t in self.burst_requests.get(user_id, [])
-                if t > window_start
-            ]
-            
-            # Check burst limit
-            if len(self.burst_requests[user_id]) >= AI_COST_CONFIG.BURST_LIMIT:
-                wait_time = self.burst_requests[user_id][0] - window_start
-                return False, wait_time
-            
-            # Check minimum interval
-            last = self.last_request.get(user_id, 0)
-            elapsed = now - last
-            
-            if elapsed < AI_COST_CONFIG.MIN_REQUEST_INTERVAL_SECONDS:
-                wait_time = AI_COST_CONFIG.MIN_REQUEST_INTERVAL_SECONDS - elapsed
-                return False, wait_time
-            
-            # Record request
-            self.last_request[user_id] = now
-            self.burst_requests[user_id].append(now)
-            
-            return True, 0
+    async def check_throttle(self, user_id: str, estimated_tokens: int = 0) -> tuple[bool, float]:
+        """
+        Check if request should be throttled.
+        
+        Returns:
+            (allowed, seconds to wait before retrying)
+        """
+        request_capacity = AI_COST_CONFIG.BURST_LIMIT
+        request_rate = 1.0 / AI_COST_CONFIG.MIN_REQUEST_INTERVAL_SECONDS
+        token_capacity = AI_COST_CONFIG.TOKENS_PER_MINUTE
+        token_rate = token_capacity / 60.0
+        # A request larger than the bucket could never pass otherwise
+        estimated_tokens = min(estimated_tokens, token_capacity)
+        
+        now = time.monotonic()
+        bucket = self.buckets.get(user_id)
+        if bucket is None:
+            bucket = self.buckets[user_id] = TokenBucket(request_capacity, token_capacity, now)
+        
+        # Refill for the time since the last check
+        elapsed = now - bucket.last_update
+        bucket.request_tokens = min(request_capacity, bucket.request_tokens + elapsed * request_rate)
+        bucket.token_tokens = min(token_capacity, bucket.token_tokens + elapsed * token_rate)
+        bucket.last_update = now
+        
+        wait_time = max(
+            (1 - bucket.request_tokens) / request_rate,
+            (estimated_tokens - bucket.token_tokens) / token_rate,
+            0.0,
+        )
+        if wait_time > 0:
+            return False, wait_time
+        
+        bucket.request_tokens -= 1
+        bucket.token_tokens -= estimated_tokens
+        return True, 0
 
 
 throttler = RequestThrottler()
@@ -353,7 +794,10 @@ def cost_aware_ai_call(
                 raise ValueError("current_user required for cost tracking")
             
             # 1. Check throttle
-            allowed, wait_time = await throttler.check_throttle(user.id)
+            allowed, wait_time = await throttler.check_throttle(
+                user.id,
+                estimated_tokens=kwargs.get("max_tokens", AI_COST_CONFIG.MAX_OUTPUT_TOKENS),
+            )
             if not allowed:
                 from fastapi import HTTPException
                 raise HTTPException(
@@ -383,7 +827,13 @@ def cost_aware_ai_call(
             # 4. Check cache
             if cache_enabled:
                 query = kwargs.get("question") or kwargs.get("query", "")
-                cached = await ai_cache.get(query)
+                cache_params = {
+                    name: kwargs[name]
+                    for name in ("model", "provider", "temperature", "max_tokens")
+                    if name in kwargs
+                }
+                cache_key = ai_cache.make_key(query, **cache_params)
+                cached = await ai_cache.get(cache_key)
                 if cached:
                     await ai_tracker.record_usage(user.id, 0, 0, from_cache=True)
                     return cached
@@ -398,7 +848,7 @@ def cost_aware_ai_call(
             
             # 7. Cache result
             if cache_enabled:
-                await ai_cache.set(query, result)
+                await ai_cache.set(cache_key, query, result)
             
             return result
         
@@ -410,6 +860,9 @@ def cost_aware_ai_call(
 # GRACEFUL DEGRADATION
 # ============================================================
 
+_WORD_RE = re.compile(r"\S+")
+
+
 class GracefulDegradation:
     """Provide fallback responses when AI is unavailable"""
     
@@ -441,9 +894,13 @@ class GracefulDegradation:
     @classmethod
     async def degraded_quiz(cls, content: str, question_count: int = 5) -> Dict:
         """Generate simple quiz without AI when limits exceeded"""
-        # Basic keyword extraction for simple questions
-        words = content.split()
-        key_terms = [w for w in words if len(w) > 6 and w[0].isupper()][:question_count]
+        # Basic keyword extraction for simple questions. Words are scanned
+        # lazily and the scan stops at question_count terms, so long
+        # inputs are never split into a full word list.
+        words = (match.group() for match in _WORD_RE.finditer(content))
+        key_terms = list(islice(
+            (w for w in words if len(w) > 6 and w[0].isupper()), question_count
+        ))
         
         questions = []
         for i, term in enumerate(key_terms):
@@ -0,0 +1,101 @@
+"""
+Response Caching
+Redis-backed cache for read-mostly API responses, shared by all workers.
+"""
+import hashlib
+import logging
+from typing import Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+try:
+    from redis import asyncio as aioredis
+    from redis.exceptions import RedisError
+    REDIS_AVAILABLE = True
+except ImportError:
+    aioredis = None
+    RedisError = OSError
+    REDIS_AVAILABLE = False
+
+
+# Singleton client
+_redis_client = None
+
+
+def get_redis():
+    """
+    Get the shared async Redis client.
+
+    Returns:
+        Redis client, or None if the redis package is not installed
+    """
+    global _redis_client
+    if _redis_client is None and REDIS_AVAILABLE:
+        _redis_client = aioredis.from_url(
+            settings.REDIS_URL,
+            socket_connect_timeout=settings.REDIS_SOCKET_TIMEOUT,
+            socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+        )
+    return _redis_client
+
+
+async def close_redis() -> None:
+    """Close the shared Redis client (called on shutdown)"""
+    global _redis_client
+    if _redis_client is not None:
+        await _redis_client.close()
+        _redis_client = None
+
+
+class ResponseCache:
+    """
+    Cache of serialized JSON response bodies under a namespace.
+
+    Keys are hashed into `cache:<namespace>:<sha256>`, entries expire after
+    `ttl_seconds`, and clear() drops the whole namespace after a write.
+    The cache fails open: if Redis is unreachable every lookup is a miss
+    and the request is served from the database as usual.
+    """
+
+    def __init__(self, namespace: str, ttl_seconds: int):
+        self.namespace = namespace
+        self.ttl_seconds = ttl_seconds
+
+    def _key(self, key: str) -> str:
+        digest = hashlib.sha256(key.encode()).hexdigest()
+        return f"cache:{self.namespace}:{digest}"
+
+    async def get(self, key: str) -> Optional[bytes]:
+        """Get a cached body, or None on a miss"""
+        client = get_redis()
+        if client is None:
+            return None
+        try:
+            return await client.get(self._key(key))
+        except (RedisError, OSError) as e:
+            logger.warning(f"Response cache read failed ({self.namespace}): {e}")
+            return None
+
+    async def set(self, key: str, body: bytes) -> None:
+        """Store a body with the namespace TTL"""
+        client = get_redis()
+        if client is None:
+            return
+        try:
+            await client.set(self._key(key), body, ex=self.ttl_seconds)
+        except (RedisError, OSError) as e:
+            logger.warning(f"Response cache write failed ({self.namespace}): {e}")
+
+    async def clear(self) -> None:
+        """Drop every entry in the namespace"""
+        client = get_redis()
+        if client is None:
+            return
+        try:
+            keys = [key async for key in client.scan_iter(match=f"cache:{self.namespace}:*", count=500)]
+            if keys:
+                await client.unlink(*keys)
+        except (RedisError, OSError) as e:
+            logger.warning(f"Response cache clear failed ({self.namespace}): {e}")
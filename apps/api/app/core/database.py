@@ -9,6 +9,7 @@ from sqlalchemy.ext.asyncio import (
     async_sessionmaker,
     AsyncEngine
 )
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.orm import declarative_base
 from sqlalchemy.pool import StaticPool
 
@@ -35,8 +36,14 @@ def _create_engine() -> AsyncEngine:
             echo=settings.DEBUG,
             pool_size=settings.DB_POOL_SIZE,
             max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
             pool_recycle=settings.DB_POOL_RECYCLE,
-            pool_pre_ping=True,
+            # Pre-ping costs a SELECT 1 per checkout; only worth it where
+            # connections may be dropped behind our back (LBs, failovers)
+            pool_pre_ping=settings.is_production,
+            # Reuse the most recently returned connection so idle extras
+            # age out via pool_recycle instead of staying warm
+            pool_use_lifo=True,
         )
 
 engine: AsyncEngine = _create_engine()
@@ -57,7 +64,9 @@ Base = declarative_base()
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
     """
     Dependency that provides a database session.
-    Automatically handles session cleanup on completion.
+    The request runs as a single unit of work: it is committed once
+    here on success and rolled back if the endpoint raises, so
+    endpoints and services should flush() rather than commit().
     
     Yields:
         AsyncSession: Database session
@@ -69,8 +78,23 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
         except Exception:
             await session.rollback()
             raise
-        finally:
-            await session.close()
+
+
+def dialect_insert(session: AsyncSession):
+    """
+    Get the dialect-specific insert() construct for a session.
+    Both PostgreSQL and SQLite variants support on_conflict_do_update(),
+    which lets callers write single-statement upserts.
+    
+    Args:
+        session: Database session the statement will run on
+        
+    Returns:
+        The insert() function for the session's dialect
+    """
+    if session.bind.dialect.name == "postgresql":
+        return postgresql.insert
+    return sqlite.insert
 
 
 async def init_db() -> None:
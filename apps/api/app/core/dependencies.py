@@ -2,15 +2,18 @@
 FastAPI Dependencies
 Common dependencies used across routes
 """
-from typing import Optional
+from typing import Optional, Tuple
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, and_
 
 from app.core.database import get_db
 from app.core.security import verify_token
+from app.models.roadmap import UserStudyPlan
 from app.models.user import User
+from app.services.auth_service import AuthService
+from app.services.user_service import UserService
 
 
 # HTTP Bearer token scheme
@@ -34,16 +37,7 @@ async def get_current_user(
     Raises:
         HTTPException: If token is invalid or user not found
     """
-    token = credentials.credentials
-    
-    # Verify the token
-    payload = verify_token(token, token_type="access")
-    if payload is None:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid or expired token",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+    payload = _verify_access_token(credentials)
     
     # Get user from database
     result = await db.execute(
@@ -51,6 +45,58 @@ async def get_current_user(
     )
     user = result.scalar_one_or_none()
     
+    return _ensure_usable_user(user)
+
+
+async def get_current_user_with_plan(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_db)
+) -> Tuple[User, Optional[UserStudyPlan]]:
+    """
+    Get the current authenticated user and their active study plan.
+    Loads both in a single query instead of a user lookup followed by
+    a separate plan lookup in the endpoint.
+    
+    Args:
+        credentials: HTTP Authorization credentials
+        db: Database session
+        
+    Returns:
+        Tuple of (user, active study plan or None)
+        
+    Raises:
+        HTTPException: If token is invalid or user not found
+    """
+    payload = _verify_access_token(credentials)
+    
+    result = await db.execute(
+        select(User, UserStudyPlan)
+        .outerjoin(
+            UserStudyPlan,
+            and_(UserStudyPlan.user_id == User.id, UserStudyPlan.is_active == True),
+        )
+        .where(User.id == payload.user_id)
+    )
+    row = result.first()
+    
+    user = _ensure_usable_user(row[0] if row else None)
+    return user, row[1]
+
+
+def _verify_access_token(credentials: HTTPAuthorizationCredentials):
+    """Verify the bearer token and return its payload, or raise 401"""
+    payload = verify_token(credentials.credentials, token_type="access")
+    if payload is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or expired token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return payload
+
+
+def _ensure_usable_user(user: Optional[User]) -> User:
+    """Reject missing or deactivated users"""
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -142,3 +188,20 @@ async def get_optional_user(
     user = result.scalar_one_or_none()
     
     return user if user and user.is_active else None
+
+
+async def get_user_service(db: AsyncSession = Depends(get_db)) -> UserService:
+    """
+    Provide a UserService bound to the request's session.
+    FastAPI caches it per request, so every dependency that needs it
+    shares one instance.
+    """
+    return UserService(db)
+
+
+async def get_auth_service(
+    db: AsyncSession = Depends(get_db),
+    user_service: UserService = Depends(get_user_service)
+) -> AuthService:
+    """Provide an AuthService that reuses the request's UserService"""
+    return AuthService(db, user_service)
@@ -6,19 +6,20 @@ Features:
 - Error stack traces
 - Correlation ID per request
 """
+import atexit
 import logging
+import logging.handlers
+import os
+import queue
 import sys
 import time
-import uuid
-import traceback
-from typing import Optional, Any, Dict
-from datetime import datetime
+from typing import Optional, Any, Dict, List, Protocol, Tuple
 from contextvars import ContextVar
 from functools import wraps
-import json
 
-from fastapi import Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware
+import orjson
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 # Context variable for correlation ID
 correlation_id_var: ContextVar[str] = ContextVar("correlation_id", default="")
@@ -27,37 +28,64 @@ correlation_id_var: ContextVar[str] = ContextVar("correlation_id", default="")
 # ==================== Custom JSON Formatter ====================
 
 class JSONFormatter(logging.Formatter):
-    """JSON log formatter for structured logging"""
+    """JSON log formatter for structured logging (serialized with orjson)"""
+    
+    # Formatted "YYYY-MM-DDTHH:MM:SS" of the last second seen
+    _second: Tuple[int, str] = (-1, "")
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Pre-encoded JSON for the small, fixed set of level, logger,
+        # file and function names, embedded without re-escaping
+        self._fragments: Dict[str, "orjson.Fragment"] = {}
+    
+    def _fragment(self, value: str) -> "orjson.Fragment":
+        fragment = self._fragments.get(value)
+        if fragment is None:
+            fragment = self._fragments[value] = orjson.Fragment(orjson.dumps(value))
+        return fragment
+    
+    def _timestamp(self, created: float) -> str:
+        """RFC 3339 UTC timestamp; the date/time part is built once per second"""
+        second = int(created)
+        cached_second, prefix = self._second
+        if second != cached_second:
+            prefix = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(second))
+            self._second = (second, prefix)
+        return f"{prefix}.{int((created - second) * 1e6):06d}Z"
     
     def format(self, record: logging.LogRecord) -> str:
         log_data = {
-            "timestamp": datetime.utcnow().isoformat() + "Z",
-            "level": record.levelname,
-            "logger": record.name,
+            "timestamp": self._timestamp(record.created),
+            "level": self._fragment(record.levelname),
+            "logger": self._fragment(record.name),
             "message": record.getMessage(),
-            "correlation_id": correlation_id_var.get(""),
+            # Captured by the queue handler; the listener thread has no context
+            "correlation_id": getattr(record, "correlation_id", None) or correlation_id_var.get(""),
         }
         
         # Add extra fields
         if hasattr(record, "extra_data"):
             log_data.update(record.extra_data)
         
-        # Add exception info
-        if record.exc_info:
+        # Add exception info; the formatted traceback is cached on the
+        # record, so console and file handlers format it only once
+        if record.exc_info and record.exc_info[0]:
+            if not record.exc_text:
+                record.exc_text = self.formatException(record.exc_info)
             log_data["exception"] = {
-                "type": record.exc_info[0].__name__ if record.exc_info[0] else None,
-                "message": str(record.exc_info[1]) if record.exc_info[1] else None,
-                "stacktrace": traceback.format_exception(*record.exc_info) if record.exc_info[0] else None
+                "type": record.exc_info[0].__name__,
+                "message": str(record.exc_info[1]),
+                "stacktrace": record.exc_text,
             }
         
         # Add location
-        log_data["location"] = {
-            "file": record.filename,
-            "line": record.lineno,
-            "function": record.funcName
-        }
+        log_data["file"] = self._fragment(record.filename)
+        log_data["line"] = record.lineno
+        log_data["function"] = self._fragment(record.funcName)
         
-        return json.dumps(log_data, default=str)
+        # Handlers write str, so decode the bytes once
+        return orjson.dumps(log_data, default=str, option=orjson.OPT_UTC_Z).decode()
 
 
 # ==================== Logger with Correlation ID ====================
@@ -89,73 +117,134 @@ class CorrelatedLogger:
         self._log(logging.CRITICAL, msg, exc_info=exc_info, **kwargs)
 
 
+_logger_cache: Dict[str, CorrelatedLogger] = {}
+
+
 def get_logger(name: str) -> CorrelatedLogger:
-    """Get a correlated logger instance"""
-    return CorrelatedLogger(name)
+    """Get the correlated logger for a name (created once, then reused)"""
+    logger = _logger_cache.get(name)
+    if logger is None:
+        logger = _logger_cache[name] = CorrelatedLogger(name)
+    return logger
+
+
+# Loggers used on every request / AI call
+_http_logger = get_logger("http.request")
+_ai_logger = get_logger("ai.calls")
+_error_logger = get_logger("app.errors")
 
 
 # ==================== Request Logging Middleware ====================
 
-class RequestLoggingMiddleware(BaseHTTPMiddleware):
-    """Middleware for logging requests with latency and correlation ID"""
+# Correlation IDs are cut from one os.urandom() read per batch
+_CORRELATION_ID_BATCH = 64
+_correlation_ids: List[str] = []
+
+
+def _new_correlation_id() -> str:
+    """Random 128-bit correlation ID as 32 hex characters"""
+    if not _correlation_ids:
+        raw = os.urandom(16 * _CORRELATION_ID_BATCH).hex()
+        _correlation_ids.extend(raw[i:i + 32] for i in range(0, len(raw), 32))
+    return _correlation_ids.pop()
+
+
+class RequestLoggingMiddleware:
+    """
+    Middleware for logging requests with latency and correlation ID.
+    
+    Written as plain ASGI rather than BaseHTTPMiddleware, so a request
+    costs no extra task, no stream plumbing and no Request/Response
+    wrappers; the completion log and header are added as the response
+    starts.
+    """
+    
+    def __init__(self, app: ASGIApp):
+        self.app = app
     
-    async def dispatch(self, request: Request, call_next) -> Response:
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        # Scan the raw header tuples once instead of building a Headers object
+        correlation_id = None
+        user_agent = None
+        for name, value in scope["headers"]:
+            if name == b"x-correlation-id":
+                correlation_id = value.decode("latin-1")
+            elif name == b"user-agent":
+                user_agent = value.decode("latin-1")
+        
         # Generate correlation ID
-        correlation_id = request.headers.get("X-Correlation-ID", str(uuid.uuid4()))
+        if correlation_id is None:
+            correlation_id = _new_correlation_id()
         correlation_id_var.set(correlation_id)
         
+        method = scope["method"]
+        path = scope["path"]
+        client = scope.get("client")
+        
         # Start timing
         start_time = time.perf_counter()
         
+        # Skip building the info records when the level filters them out;
+        # failures below are logged regardless
+        logger = _http_logger
+        log_info = logger.logger.isEnabledFor(logging.INFO)
+        
         # Log request
-        logger = get_logger("http.request")
-        logger.info(
-            f"Request started: {request.method} {request.url.path}",
-            extra_data={
-                "http_method": request.method,
-                "http_path": request.url.path,
-                "http_query": str(request.query_params),
-                "user_agent": request.headers.get("user-agent"),
-                "client_ip": request.client.host if request.client else None,
-            }
-        )
+        if log_info:
+            logger.info(
+                f"Request started: {method} {path}",
+                extra_data={
+                    "http_method": method,
+                    "http_path": path,
+                    "http_query": scope.get("query_string", b"").decode("latin-1"),
+                    "user_agent": user_agent,
+                    "client_ip": client[0] if client else None,
+                }
+            )
+        
+        async def send_with_logging(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                # Log response
+                if log_info:
+                    latency_ms = (time.perf_counter() - start_time) * 1000
+                    logger.info(
+                        f"Request completed: {method} {path} -> {message['status']}",
+                        extra_data={
+                            "http_method": method,
+                            "http_path": path,
+                            "http_status": message["status"],
+                            "latency_ms": round(latency_ms, 2),
+                        }
+                    )
+                
+                # Add correlation ID to response headers
+                message["headers"] = [
+                    *message.get("headers", []),
+                    (b"x-correlation-id", correlation_id.encode("latin-1")),
+                ]
+            await send(message)
         
         # Process request
         try:
-            response = await call_next(request)
+            await self.app(scope, receive, send_with_logging)
         except Exception as e:
             # Log error
             latency_ms = (time.perf_counter() - start_time) * 1000
             logger.error(
-                f"Request failed: {request.method} {request.url.path}",
+                f"Request failed: {method} {path}",
                 exc_info=True,
                 extra_data={
-                    "http_method": request.method,
-                    "http_path": request.url.path,
+                    "http_method": method,
+                    "http_path": path,
                     "latency_ms": round(latency_ms, 2),
                     "error": str(e),
                 }
             )
             raise
-        
-        # Calculate latency
-        latency_ms = (time.perf_counter() - start_time) * 1000
-        
-        # Log response
-        logger.info(
-            f"Request completed: {request.method} {request.url.path} -> {response.status_code}",
-            extra_data={
-                "http_method": request.method,
-                "http_path": request.url.path,
-                "http_status": response.status_code,
-                "latency_ms": round(latency_ms, 2),
-            }
-        )
-        
-        # Add correlation ID to response headers
-        response.headers["X-Correlation-ID"] = correlation_id
-        
-        return response
 
 
 # ==================== AI Call Logging ====================
@@ -171,7 +260,7 @@ def log_ai_call(
     extra: Optional[Dict] = None
 ):
     """Log AI/LLM API calls with token usage and duration"""
-    logger = get_logger("ai.calls")
+    logger = _ai_logger
     
     log_data = {
         "ai_model": model,
@@ -181,8 +270,9 @@ def log_ai_call(
         "tokens_total": tokens_input + tokens_output,
         "duration_ms": round(duration_ms, 2),
         "success": success,
-        **(extra or {})
     }
+    if extra:
+        log_data.update(extra)
     
     if error:
         log_data["error"] = error
@@ -191,6 +281,26 @@ def log_ai_call(
         logger.info(f"AI call completed: {operation}", extra_data=log_data)
 
 
+class TokenUsage(Protocol):
+    """Token counts as reported by OpenAI-style clients"""
+    prompt_tokens: int
+    completion_tokens: int
+
+
+def _token_usage(result: Any) -> Tuple[int, int]:
+    """
+    (prompt, completion) tokens of an AI result.
+    
+    Reads `result.usage` when present (OpenAI/Anthropic-style responses),
+    otherwise the counts on the result itself; (0, 0) if there are none.
+    """
+    usage: TokenUsage = getattr(result, "usage", None) or result
+    try:
+        return usage.prompt_tokens, usage.completion_tokens
+    except AttributeError:
+        return 0, 0
+
+
 def ai_call_logger(model: str, operation: str):
     """Decorator for logging AI calls"""
     def decorator(func):
@@ -201,9 +311,7 @@ def ai_call_logger(model: str, operation: str):
                 result = await func(*args, **kwargs)
                 duration_ms = (time.perf_counter() - start_time) * 1000
                 
-                # Try to extract token counts from result
-                tokens_input = getattr(result, 'prompt_tokens', 0)
-                tokens_output = getattr(result, 'completion_tokens', 0)
+                tokens_input, tokens_output = _token_usage(result)
                 
                 log_ai_call(
                     model=model,
@@ -237,20 +345,108 @@ def log_exception(
     extra: Optional[Dict] = None
 ):
     """Log an exception with full stack trace"""
-    logger = get_logger("app.errors")
+    logger = _error_logger
+    
+    extra_data = {
+        "error_type": type(error).__name__,
+        "error_message": str(error),
+        "context": context,
+    }
+    if extra:
+        extra_data.update(extra)
     
     logger.error(
         f"Exception in {context}: {type(error).__name__}: {str(error)}",
         exc_info=True,
-        extra_data={
-            "error_type": type(error).__name__,
-            "error_message": str(error),
-            "context": context,
-            **(extra or {})
-        }
+        extra_data=extra_data
     )
 
 
+# ==================== Background Log Writing ====================
+
+class _ThreadQueueHandler(logging.handlers.QueueHandler):
+    """
+    Queue handler for an in-process listener.
+    
+    The stdlib prepare() strips exc_info so records can be pickled; the
+    listener here is a thread in the same process, so the traceback is
+    kept for JSONFormatter. The message and correlation ID are captured
+    now, while the request's args and context are still current.
+    """
+    
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg = record.getMessage()
+        record.args = None
+        record.correlation_id = correlation_id_var.get("")
+        return record
+
+
+# Write buffer for log streams; flushed whenever the queue runs dry
+LOG_BUFFER_SIZE = 64 * 1024
+
+
+class _BufferedEmitMixin:
+    """Write records without the per-record flush StreamHandler does"""
+    
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            self.stream.write(self.format(record) + self.terminator)
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(record)
+
+
+class _BufferedStreamHandler(_BufferedEmitMixin, logging.StreamHandler):
+    """Console handler writing through its own 64 KB buffer"""
+
+
+class _BufferedFileHandler(_BufferedEmitMixin, logging.FileHandler):
+    """File handler writing through a 64 KB buffer"""
+    
+    def _open(self):
+        return open(
+            self.baseFilename, self.mode, buffering=LOG_BUFFER_SIZE,
+            encoding=self.encoding, errors=self.errors
+        )
+
+
+class _BatchingQueueListener(logging.handlers.QueueListener):
+    """
+    Flush the handlers only once the queue is drained, so a burst of
+    records goes out in a few large writes instead of one per line.
+    """
+    
+    def handle(self, record: logging.LogRecord) -> None:
+        super().handle(record)
+        if self.queue.empty():
+            for handler in self.handlers:
+                handler.flush()
+
+
+def _buffered_stdout():
+    """A 64 KB-buffered text stream on stdout's file descriptor"""
+    try:
+        fd = sys.stdout.fileno()
+    except (AttributeError, OSError):
+        return sys.stdout  # e.g. captured output in tests
+    return open(fd, "w", buffering=LOG_BUFFER_SIZE, encoding="utf-8", closefd=False)
+
+
+_queue_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def _stop_queue_listener() -> None:
+    """Flush queued records and stop the listener thread"""
+    global _queue_listener
+    if _queue_listener is not None:
+        _queue_listener.stop()
+        _queue_listener = None
+
+
+atexit.register(_stop_queue_listener)
+
+
 # ==================== Setup Function ====================
 
 def setup_logging(
@@ -261,6 +457,11 @@ def setup_logging(
     """
     Configure logging for the application
     
+    Log calls only enqueue the record; formatting and I/O happen on a
+    QueueListener thread, so a slow stdout or log file never blocks
+    the event loop. Streams are buffered and flushed when the queue
+    drains, batching bursts of records into few write() calls.
+    
     Args:
         log_level: Logging level (DEBUG, INFO, WARNING, ERROR)
         json_format: Use JSON formatting (recommended for production)
@@ -269,12 +470,13 @@ def setup_logging(
     root_logger = logging.getLogger()
     root_logger.setLevel(getattr(logging, log_level.upper()))
     
-    # Remove existing handlers
+    # Remove existing handlers (and the listener of a previous setup)
+    _stop_queue_listener()
     for handler in root_logger.handlers[:]:
         root_logger.removeHandler(handler)
     
     # Console handler
-    console_handler = logging.StreamHandler(sys.stdout)
+    console_handler = _BufferedStreamHandler(_buffered_stdout())
     
     if json_format:
         console_handler.setFormatter(JSONFormatter())
@@ -283,13 +485,22 @@ def setup_logging(
             "%(asctime)s | %(levelname)s | %(name)s | %(message)s"
         ))
     
-    root_logger.addHandler(console_handler)
+    handlers = [console_handler]
     
     # File handler (optional)
     if log_to_file:
-        file_handler = logging.FileHandler(log_to_file)
+        file_handler = _BufferedFileHandler(log_to_file)
         file_handler.setFormatter(JSONFormatter())
-        root_logger.addHandler(file_handler)
+        handlers.append(file_handler)
+    
+    # Hand records to a background thread that owns the real handlers
+    global _queue_listener
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    root_logger.addHandler(_ThreadQueueHandler(log_queue))
+    _queue_listener = _BatchingQueueListener(
+        log_queue, *handlers, respect_handler_level=True
+    )
+    _queue_listener.start()
     
     # Reduce noise from libraries
     logging.getLogger("uvicorn.access").setLevel(logging.WARNING)
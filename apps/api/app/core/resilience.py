@@ -5,6 +5,7 @@ Provides retry logic, timeouts, fallbacks, and error handling for AI services
 import asyncio
 import time
 import random
+import threading
 from typing import TypeVar, Callable, Optional, Any, Dict, List
 from functools import wraps
 from dataclasses import dataclass
@@ -51,6 +52,15 @@ class RetryConfig:
 
 DEFAULT_RETRY_CONFIG = RetryConfig()
 
+# Private generator for backoff jitter, independent of the shared
+# module-level random state other code may seed or consume
+_jitter_rng = random.Random()
+
+
+def _jitter() -> float:
+    """Random backoff multiplier in [0.5, 1.5)"""
+    return 0.5 + _jitter_rng.random()
+
 
 # ==================== Retry Decorator ====================
 
@@ -89,7 +99,7 @@ def with_retry(
                     
                     # Add jitter to prevent thundering herd
                     if config.jitter:
-                        delay = delay * (0.5 + random.random())
+                        delay = delay * _jitter()
                     
                     logger.warning(
                         f"Retry {attempt + 1}/{config.max_retries} for {func.__name__} "
@@ -176,6 +186,13 @@ class CircuitState(Enum):
     HALF_OPEN = "half_open"  # Testing if recovered
 
 
+# Members bound once so state checks are a global load plus an identity
+# compare, skipping the Enum class attribute lookup
+_CLOSED = CircuitState.CLOSED
+_OPEN = CircuitState.OPEN
+_HALF_OPEN = CircuitState.HALF_OPEN
+
+
 @dataclass
 class CircuitBreakerConfig:
     """Circuit breaker configuration"""
@@ -189,55 +206,65 @@ class CircuitBreaker:
     Circuit breaker pattern for AI services
     
     Prevents cascading failures by failing fast when a service is down.
+    
+    The common path (closed circuit, successful call) only reads
+    attributes. State transitions and failure counting happen under a
+    lock, so callbacks from worker threads cannot interleave them.
     """
     
     def __init__(self, name: str, config: CircuitBreakerConfig = None):
         self.name = name
         self.config = config or CircuitBreakerConfig()
-        self.state = CircuitState.CLOSED
+        self.state = _CLOSED
         self.failure_count = 0
         self.success_count = 0
-        self.last_failure_time = 0
+        self.last_failure_time = 0.0
+        self._lock = threading.Lock()
     
     def can_execute(self) -> bool:
         """Check if request should be allowed"""
-        if self.state == CircuitState.CLOSED:
+        state = self.state
+        if state is _CLOSED:
             return True
         
-        if self.state == CircuitState.OPEN:
+        if state is _OPEN:
             # Check if timeout elapsed
-            if time.time() - self.last_failure_time >= self.config.timeout:
-                self.state = CircuitState.HALF_OPEN
-                self.success_count = 0
-                logger.info(f"Circuit {self.name} entering half-open state")
-                return True
-            return False
+            if time.monotonic() - self.last_failure_time < self.config.timeout:
+                return False
+            with self._lock:
+                if self.state is _OPEN:
+                    self.state = _HALF_OPEN
+                    self.success_count = 0
+                    logger.info(f"Circuit {self.name} entering half-open state")
+            return True
         
         # Half-open: allow limited requests
         return True
     
     def record_success(self):
         """Record a successful call"""
-        if self.state == CircuitState.HALF_OPEN:
-            self.success_count += 1
-            if self.success_count >= self.config.success_threshold:
-                self.state = CircuitState.CLOSED
-                self.failure_count = 0
-                logger.info(f"Circuit {self.name} closed (recovered)")
-        else:
+        if self.state is _HALF_OPEN:
+            with self._lock:
+                self.success_count += 1
+                if self.state is _HALF_OPEN and self.success_count >= self.config.success_threshold:
+                    self.state = _CLOSED
+                    self.failure_count = 0
+                    logger.info(f"Circuit {self.name} closed (recovered)")
+        elif self.failure_count:
             self.failure_count = 0
     
     def record_failure(self):
         """Record a failed call"""
-        self.failure_count += 1
-        self.last_failure_time = time.time()
-        
-        if self.state == CircuitState.HALF_OPEN:
-            self.state = CircuitState.OPEN
-            logger.warning(f"Circuit {self.name} opened (half-open failure)")
-        elif self.failure_count >= self.config.failure_threshold:
-            self.state = CircuitState.OPEN
-            logger.warning(f"Circuit {self.name} opened (threshold reached)")
+        with self._lock:
+            self.failure_count += 1
+            self.last_failure_time = time.monotonic()
+            
+            if self.state is _HALF_OPEN:
+                self.state = _OPEN
+                logger.warning(f"Circuit {self.name} opened (half-open failure)")
+            elif self.state is _CLOSED and self.failure_count >= self.config.failure_threshold:
+                self.state = _OPEN
+                logger.warning(f"Circuit {self.name} opened (threshold reached)")
 
 
 # Global circuit breakers for different AI services
@@ -246,18 +273,21 @@ _circuit_breakers: Dict[str, CircuitBreaker] = {}
 
 def get_circuit_breaker(name: str) -> CircuitBreaker:
     """Get or create a circuit breaker"""
-    if name not in _circuit_breakers:
-        _circuit_breakers[name] = CircuitBreaker(name)
-    return _circuit_breakers[name]
+    breaker = _circuit_breakers.get(name)
+    if breaker is None:
+        # setdefault is atomic, so concurrent first calls share one breaker
+        breaker = _circuit_breakers.setdefault(name, CircuitBreaker(name))
+    return breaker
 
 
 def with_circuit_breaker(name: str):
     """Decorator for circuit breaker pattern"""
     def decorator(func: Callable[..., T]) -> Callable[..., T]:
+        # Resolved once per decorated function, not on every call
+        breaker = get_circuit_breaker(name)
+        
         @wraps(func)
         async def wrapper(*args, **kwargs) -> T:
-            breaker = get_circuit_breaker(name)
-            
             if not breaker.can_execute():
                 raise AIUnavailableError(f"Service {name} is temporarily unavailable (circuit open)")
             
@@ -306,56 +336,25 @@ def resilient_ai_call(
         async def generate_quiz(content: str) -> Quiz:
             return await openai.generate(...)
     """
+    retry_config = RetryConfig(max_retries=max_retries, retry_on=(Exception,))
+    
     def decorator(func: Callable[..., T]) -> Callable[..., T]:
+        # Timeout per attempt, retries around it, and the circuit around
+        # the whole retry sequence so it counts one failure per call
+        call = with_timeout(timeout_seconds, "Request timed out")(func)
+        call = with_retry(retry_config)(call)
+        if circuit_name:
+            call = with_circuit_breaker(circuit_name)(call)
         
         @wraps(func)
         async def wrapper(*args, **kwargs) -> T:
-            # Circuit breaker check
-            if circuit_name:
-                breaker = get_circuit_breaker(circuit_name)
-                if not breaker.can_execute():
-                    if fallback_value is not None:
-                        logger.warning(f"Circuit open for {circuit_name}, using fallback")
-                        return fallback_value
-                    raise AIUnavailableError(get_safe_error_message(AIUnavailableError()))
-            
-            last_error = None
-            
-            for attempt in range(max_retries + 1):
-                try:
-                    # Execute with timeout
-                    result = await asyncio.wait_for(
-                        func(*args, **kwargs),
-                        timeout=timeout_seconds
-                    )
-                    
-                    # Record success
-                    if circuit_name:
-                        get_circuit_breaker(circuit_name).record_success()
-                    
-                    return result
-                    
-                except asyncio.TimeoutError:
-                    last_error = AITimeoutError(f"Request timed out after {timeout_seconds}s")
-                    
-                except Exception as e:
-                    last_error = e
-                
-                # Should we retry?
-                if attempt < max_retries:
-                    delay = min(1.0 * (2 ** attempt), 30.0) * (0.5 + random.random())
-                    logger.warning(f"Retry {attempt + 1}/{max_retries} after {delay:.2f}s")
-                    await asyncio.sleep(delay)
-            
-            # All retries failed
-            if circuit_name:
-                get_circuit_breaker(circuit_name).record_failure()
-            
-            if fallback_value is not None:
-                logger.warning(f"All retries failed for {func.__name__}, using fallback")
+            try:
+                return await call(*args, **kwargs)
+            except Exception:
+                if fallback_value is None:
+                    raise
+                logger.warning(f"AI call {func.__name__} failed, using fallback")
                 return fallback_value
-            
-            raise last_error
         
         return wrapper
     return decorator
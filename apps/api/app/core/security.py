@@ -2,15 +2,37 @@
 Security Utilities
 JWT token creation/verification and password hashing
 """
+import asyncio
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 from typing import Optional, Union
-from jose import jwt, JWTError
+import jwt
+from jwt import InvalidTokenError
 import bcrypt
 from pydantic import BaseModel
 
 from app.core.config import settings
 
 
+# JWT settings bound once; tokens are verified on every request
+_SECRET_KEY = settings.SECRET_KEY
+_JWT_ALGORITHM = settings.JWT_ALGORITHM
+_JWT_ALGORITHMS = [_JWT_ALGORITHM]
+_ACCESS_TOKEN_EXPIRE = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+_REFRESH_TOKEN_EXPIRE = timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+
+# Dedicated threads for bcrypt (it releases the GIL), so a burst of logins
+# cannot starve the default executor used by to_thread/run_in_executor
+_BCRYPT_POOL = ThreadPoolExecutor(max_workers=os.cpu_count() or 1, thread_name_prefix="bcrypt")
+
+
+# Marks hashes of the SHA-256 pre-hash, so verification knows which bcrypt
+# input to use; legacy hashes (raw password) are bare bcrypt strings
+_PREHASH_SCHEME = "sha256$"
+
+
 class TokenData(BaseModel):
     """Token payload data model"""
     sub: str  # Subject (user_id)
@@ -25,29 +47,42 @@ class TokenPayload(BaseModel):
     token_type: str
 
 
+def _prehash_password(password: str) -> bytes:
+    """
+    SHA-256 hex digest of a password, used as the bcrypt input.
+
+    bcrypt silently truncates input at 72 bytes; the 64-byte hex digest
+    keeps every character of long passphrases significant.
+    """
+    return hashlib.sha256(password.encode('utf-8')).hexdigest().encode('ascii')
+
+
 def hash_password(password: str) -> str:
     """
-    Hash a password using bcrypt.
+    Hash a password using bcrypt over its SHA-256 pre-hash.
     
     Args:
         password: Plain text password
         
     Returns:
-        Hashed password string
+        Hashed password string, prefixed with the pre-hash scheme marker
     """
-    # bcrypt requires bytes
-    pwd_bytes = password.encode('utf-8')
+    pwd_bytes = _prehash_password(password)
     # Generate salt and hash
     salt = bcrypt.gensalt(rounds=settings.BCRYPT_ROUNDS)
     hashed = bcrypt.hashpw(pwd_bytes, salt)
     # Return as string for database storage
-    return hashed.decode('utf-8')
+    return _PREHASH_SCHEME + hashed.decode('utf-8')
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """
     Verify a password against its hash.
     
+    bcrypt.checkpw compares digests in constant time. The scheme marker
+    selects the bcrypt input (pre-hash or, for legacy hashes, the raw
+    password), so exactly one checkpw runs per attempt.
+    
     Args:
         plain_password: Plain text password
         hashed_password: Hashed password to verify against
@@ -55,12 +90,52 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     Returns:
         True if password matches, False otherwise
     """
-    try:
+    if not hashed_password:
+        return False
+    
+    if hashed_password.startswith(_PREHASH_SCHEME):
+        hashed_password = hashed_password[len(_PREHASH_SCHEME):]
+        pwd_bytes = _prehash_password(plain_password)
+    else:
+        # Legacy hash of the raw password
         pwd_bytes = plain_password.encode('utf-8')
-        hashed_bytes = hashed_password.encode('utf-8')
-        return bcrypt.checkpw(pwd_bytes, hashed_bytes)
-    except Exception:
+    
+    # Not a bcrypt hash: reject without running the KDF
+    if not hashed_password.startswith("$2"):
         return False
+    
+    try:
+        return bcrypt.checkpw(pwd_bytes, hashed_password.encode('utf-8'))
+    except (ValueError, TypeError):
+        # Malformed hash or undecodable input
+        return False
+
+
+def password_needs_rehash(hashed_password: str) -> bool:
+    """
+    Whether a stored hash predates the pre-hash scheme.
+    
+    Such hashes verify against the raw password and should be replaced
+    with hash_password() the next time the plain password is known.
+    """
+    return not hashed_password.startswith(_PREHASH_SCHEME)
+
+
+async def hash_password_async(password: str) -> str:
+    """
+    Hash a password on the bcrypt thread pool.
+
+    bcrypt is CPU-bound (~250 ms at 12 rounds) and would otherwise block
+    the event loop, stalling every other request on the worker.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_BCRYPT_POOL, hash_password, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password against its hash on the bcrypt thread pool"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_BCRYPT_POOL, verify_password, plain_password, hashed_password)
 
 
 def create_access_token(
@@ -78,11 +153,7 @@ def create_access_token(
         Encoded JWT token string
     """
     now = datetime.now(timezone.utc)
-    
-    if expires_delta:
-        expire = now + expires_delta
-    else:
-        expire = now + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    expire = now + (expires_delta or _ACCESS_TOKEN_EXPIRE)
     
     payload = {
         "sub": str(subject),
@@ -91,7 +162,7 @@ def create_access_token(
         "type": "access"
     }
     
-    return jwt.encode(payload, settings.SECRET_KEY, algorithm=settings.JWT_ALGORITHM)
+    return jwt.encode(payload, _SECRET_KEY, algorithm=_JWT_ALGORITHM)
 
 
 def create_refresh_token(
@@ -109,11 +180,7 @@ def create_refresh_token(
         Encoded JWT token string
     """
     now = datetime.now(timezone.utc)
-    
-    if expires_delta:
-        expire = now + expires_delta
-    else:
-        expire = now + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+    expire = now + (expires_delta or _REFRESH_TOKEN_EXPIRE)
     
     payload = {
         "sub": str(subject),
@@ -122,7 +189,7 @@ def create_refresh_token(
         "type": "refresh"
     }
     
-    return jwt.encode(payload, settings.SECRET_KEY, algorithm=settings.JWT_ALGORITHM)
+    return jwt.encode(payload, _SECRET_KEY, algorithm=_JWT_ALGORITHM)
 
 
 def verify_token(token: str, token_type: str = "access") -> Optional[TokenPayload]:
@@ -137,11 +204,7 @@ def verify_token(token: str, token_type: str = "access") -> Optional[TokenPayloa
         TokenPayload if valid, None otherwise
     """
     try:
-        payload = jwt.decode(
-            token,
-            settings.SECRET_KEY,
-            algorithms=[settings.JWT_ALGORITHM]
-        )
+        payload = jwt.decode(token, _SECRET_KEY, algorithms=_JWT_ALGORITHMS)
         
         # Validate token type
         if payload.get("type") != token_type:
@@ -153,7 +216,7 @@ def verify_token(token: str, token_type: str = "access") -> Optional[TokenPayloa
             
         return TokenPayload(user_id=user_id, token_type=token_type)
         
-    except JWTError:
+    except InvalidTokenError:
         return None
 
 
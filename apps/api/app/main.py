@@ -5,10 +5,12 @@ Main application entry point
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 from fastapi.exceptions import RequestValidationError
 
 from app.core.config import settings
+from app.core.ai_cost_control import ai_tracker
+from app.core.cache import close_redis
 from app.core.database import init_db, close_db
 from app.api.v1.router import api_router
 
@@ -28,10 +30,26 @@ async def lifespan(app: FastAPI):
         print("📦 Initializing database...")
         await init_db()  # Auto-create tables in development
     
+    # Load the embedding model and FAISS index once, before serving traffic
+    try:
+        from app.services.rag import get_embedding_pipeline
+        await get_embedding_pipeline()
+        print("🧠 Embedding pipeline ready")
+    except ImportError as e:
+        print(f"⚠️ RAG disabled, dependencies not installed: {e}")
+    
     yield
     
     # Shutdown
     print("🔌 Shutting down...")
+    try:
+        from app.services.rag import close_embedding_pipeline, close_http_client
+        await close_embedding_pipeline()
+        await close_http_client()
+    except ImportError:
+        pass
+    await ai_tracker.close()
+    await close_redis()
     await close_db()
 
 
@@ -59,6 +77,7 @@ app = FastAPI(
     docs_url="/docs" if not settings.is_production else None,
     redoc_url="/redoc" if not settings.is_production else None,
     openapi_url="/openapi.json" if not settings.is_production else None,
+    default_response_class=ORJSONResponse,
     lifespan=lifespan
 )
 
@@ -85,7 +104,7 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
             "type": error["type"]
         })
     
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
         content={
             "detail": "Validation error",
@@ -102,12 +121,12 @@ async def global_exception_handler(request: Request, exc: Exception):
     
     # Don't expose internal errors in production
     if settings.is_production:
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             content={"detail": "Internal server error"}
         )
     
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
         content={"detail": str(exc)}
     )
@@ -136,5 +155,7 @@ if __name__ == "__main__":
         "app.main:app",
         host=settings.HOST,
         port=settings.PORT,
+        loop="uvloop",
+        http="httptools",
         reload=settings.is_development
     )
@@ -2,17 +2,21 @@
 Private Beta Middleware & Configuration
 Rate limiting, file size limits, AI usage caps, abuse prevention
 """
+import html
+import math
+import re
 import time
 import hashlib
+import zlib
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Callable
-from collections import defaultdict
-from dataclasses import dataclass
+from typing import Optional, Dict, Callable, Tuple
+from collections import defaultdict, deque
+from dataclasses import dataclass, field
 from functools import wraps
 
-from fastapi import Request, Response, HTTPException, status
-from fastapi.responses import JSONResponse
-from starlette.middleware.base import BaseHTTPMiddleware
+from fastapi import HTTPException, status
+from fastapi.responses import ORJSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 import asyncio
 import logging
 
@@ -61,16 +65,41 @@ BETA_CONFIG = BetaLimitsConfig()
 # IN-MEMORY RATE LIMITER (Use Redis in production)
 # ============================================================
 
+RATE_LIMIT_SHARDS = 64  # Power of two, see RateLimiter._shard
+
+
+@dataclass
+class _RateLimitShard:
+    """Limiter state for the users whose key hashes to one shard"""
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    # Token buckets: (tokens left, last refill) and (hourly, daily, last refill)
+    buckets: Dict[str, Tuple[float, float]] = field(default_factory=dict)
+    ai_buckets: Dict[str, Tuple[float, float, float]] = field(default_factory=dict)
+    tokens_used: Dict[str, int] = field(default_factory=lambda: defaultdict(int))
+    # Sliding windows of event times, oldest first
+    files_uploaded: Dict[str, deque] = field(default_factory=lambda: defaultdict(deque))
+    failed_logins: Dict[str, deque] = field(default_factory=lambda: defaultdict(deque))
+
+
 class RateLimiter:
-    """Simple in-memory rate limiter"""
+    """
+    Simple in-memory rate limiter.
+    
+    Request and AI limits are token buckets: a key holds up to `limit`
+    tokens, refilled continuously at `limit / window` per second, and each
+    request spends one. That is O(1) per check with a fixed-size entry per
+    key, instead of a list of timestamps rescanned on every request.
+    
+    State is split into RATE_LIMIT_SHARDS shards, each with its own lock,
+    so only keys that hash to the same shard contend with each other.
+    """
     
     def __init__(self):
-        self.requests: Dict[str, list] = defaultdict(list)
-        self.ai_requests: Dict[str, list] = defaultdict(list)
-        self.tokens_used: Dict[str, int] = defaultdict(int)
-        self.files_uploaded: Dict[str, list] = defaultdict(list)
-        self.failed_logins: Dict[str, list] = defaultdict(list)
-        self._lock = asyncio.Lock()
+        self._shards = [_RateLimitShard() for _ in range(RATE_LIMIT_SHARDS)]
+    
+    def _shard(self, key: str) -> _RateLimitShard:
+        """Shard holding the state for a user id or IP"""
+        return self._shards[zlib.crc32(key.encode()) & (RATE_LIMIT_SHARDS - 1)]
     
     async def check_rate_limit(
         self, 
@@ -79,107 +108,126 @@ class RateLimiter:
         window_seconds: int
     ) -> tuple[bool, int]:
         """Check if user is within rate limit"""
-        async with self._lock:
-            now = time.time()
-            key = f"{user_id}"
+        key = f"{user_id}"
+        shard = self._shard(key)
+        async with shard.lock:
+            now = time.monotonic()
+            rate = limit / window_seconds
             
-            # Clean old entries
-            self.requests[key] = [
-                t for t in self.requests[key] 
-                if now - t < window_seconds
-            ]
+            # Refill for the time since the last request
+            tokens, last = shard.buckets.get(key, (limit, now))
+            tokens = min(limit, tokens + (now - last) * rate)
             
             # Check limit
-            current_count = len(self.requests[key])
-            if current_count >= limit:
-                retry_after = int(window_seconds - (now - self.requests[key][0]))
-                return False, retry_after
+            if tokens < 1:
+                return False, math.ceil((1 - tokens) / rate)
             
             # Record request
-            self.requests[key].append(now)
+            shard.buckets[key] = (tokens - 1, now)
             return True, 0
     
+    @staticmethod
+    def _refill_ai(
+        state: Optional[Tuple[float, float, float]],
+        now: float
+    ) -> Tuple[float, float]:
+        """Hourly and daily AI tokens available at `now`"""
+        per_hour = BETA_CONFIG.AI_REQUESTS_PER_HOUR
+        per_day = BETA_CONFIG.AI_REQUESTS_PER_DAY
+        if state is None:
+            return per_hour, per_day
+        
+        hourly, daily, last = state
+        elapsed = now - last
+        return (
+            min(per_hour, hourly + elapsed * per_hour / 3600),
+            min(per_day, daily + elapsed * per_day / 86400),
+        )
+    
     async def check_ai_limit(self, user_id: str) -> tuple[bool, str]:
         """Check AI usage limits"""
-        async with self._lock:
-            now = time.time()
-            hour_ago = now - 3600
-            day_ago = now - 86400
-            
-            # Clean old entries
-            self.ai_requests[user_id] = [
-                t for t in self.ai_requests[user_id] if now - t < 86400
-            ]
+        shard = self._shard(user_id)
+        async with shard.lock:
+            hourly, daily = self._refill_ai(
+                shard.ai_buckets.get(user_id), time.monotonic()
+            )
             
             # Check hourly
-            hourly_count = sum(1 for t in self.ai_requests[user_id] if t > hour_ago)
-            if hourly_count >= BETA_CONFIG.AI_REQUESTS_PER_HOUR:
+            if hourly < 1:
                 return False, "Hourly AI limit reached. Try again in an hour."
             
             # Check daily
-            if len(self.ai_requests[user_id]) >= BETA_CONFIG.AI_REQUESTS_PER_DAY:
+            if daily < 1:
                 return False, "Daily AI limit reached. Try again tomorrow."
             
             # Check tokens
-            if self.tokens_used[user_id] >= BETA_CONFIG.TOKENS_PER_DAY:
+            if shard.tokens_used[user_id] >= BETA_CONFIG.TOKENS_PER_DAY:
                 return False, "Daily token limit reached. Try again tomorrow."
             
             return True, ""
     
     async def record_ai_usage(self, user_id: str, tokens: int = 0):
         """Record AI API usage"""
-        async with self._lock:
-            self.ai_requests[user_id].append(time.time())
-            self.tokens_used[user_id] += tokens
+        shard = self._shard(user_id)
+        async with shard.lock:
+            now = time.monotonic()
+            hourly, daily = self._refill_ai(shard.ai_buckets.get(user_id), now)
+            shard.ai_buckets[user_id] = (hourly - 1, daily - 1, now)
+            shard.tokens_used[user_id] += tokens
     
     async def check_file_upload(self, user_id: str) -> tuple[bool, str]:
         """Check file upload limits"""
-        async with self._lock:
-            now = time.time()
-            day_ago = now - 86400
+        shard = self._shard(user_id)
+        async with shard.lock:
+            day_ago = time.time() - 86400
             
             # Clean old entries
-            self.files_uploaded[user_id] = [
-                t for t in self.files_uploaded[user_id] if now - t < 86400
-            ]
+            uploads = shard.files_uploaded[user_id]
+            while uploads and uploads[0] <= day_ago:
+                uploads.popleft()
             
-            if len(self.files_uploaded[user_id]) >= BETA_CONFIG.MAX_FILES_PER_DAY:
+            if len(uploads) >= BETA_CONFIG.MAX_FILES_PER_DAY:
                 return False, f"Daily upload limit ({BETA_CONFIG.MAX_FILES_PER_DAY} files) reached."
             
             return True, ""
     
     async def record_file_upload(self, user_id: str):
         """Record file upload"""
-        async with self._lock:
-            self.files_uploaded[user_id].append(time.time())
+        shard = self._shard(user_id)
+        async with shard.lock:
+            shard.files_uploaded[user_id].append(time.time())
     
     async def check_failed_login(self, ip: str) -> tuple[bool, int]:
         """Check if IP is locked out"""
-        async with self._lock:
+        shard = self._shard(ip)
+        async with shard.lock:
             now = time.time()
             lockout_window = BETA_CONFIG.LOCKOUT_MINUTES * 60
+            cutoff = now - lockout_window
             
             # Clean old entries
-            self.failed_logins[ip] = [
-                t for t in self.failed_logins[ip] if now - t < lockout_window
-            ]
+            failures = shard.failed_logins[ip]
+            while failures and failures[0] <= cutoff:
+                failures.popleft()
             
-            if len(self.failed_logins[ip]) >= BETA_CONFIG.MAX_FAILED_LOGINS:
-                remaining = int(lockout_window - (now - self.failed_logins[ip][0]))
+            if len(failures) >= BETA_CONFIG.MAX_FAILED_LOGINS:
+                remaining = int(lockout_window - (now - failures[0]))
                 return False, remaining
             
             return True, 0
     
     async def record_failed_login(self, ip: str):
         """Record failed login attempt"""
-        async with self._lock:
-            self.failed_logins[ip].append(time.time())
+        shard = self._shard(ip)
+        async with shard.lock:
+            shard.failed_logins[ip].append(time.time())
     
     async def reset_daily_limits(self):
         """Reset daily limits (call from scheduler)"""
-        async with self._lock:
-            self.tokens_used.clear()
-            # Keep hourly data for smoother experience
+        for shard in self._shards:
+            async with shard.lock:
+                shard.tokens_used.clear()
+        # Keep hourly data for smoother experience
 
 
 # Global rate limiter instance
@@ -190,22 +238,36 @@ rate_limiter = RateLimiter()
 # RATE LIMITING MIDDLEWARE
 # ============================================================
 
-class RateLimitMiddleware(BaseHTTPMiddleware):
-    """Rate limiting middleware for all requests"""
+class RateLimitMiddleware:
+    """
+    Rate limiting middleware for all requests.
+    
+    Plain ASGI rather than BaseHTTPMiddleware: allowed requests go
+    straight through to the app and only the response start message is
+    touched, to add the rate limit headers.
+    """
     
-    async def dispatch(self, request: Request, call_next) -> Response:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
         # Get user identifier (IP for anonymous, user_id for authenticated)
-        user_id = self._get_user_identifier(request)
+        user_id = self._get_user_identifier(scope)
         
         # Check rate limit
+        limit = BETA_CONFIG.REQUESTS_PER_MINUTE
         allowed, retry_after = await rate_limiter.check_rate_limit(
             user_id,
-            BETA_CONFIG.REQUESTS_PER_MINUTE,
+            limit,
             60
         )
         
         if not allowed:
-            return JSONResponse(
+            response = ORJSONResponse(
                 status_code=429,
                 content={
                     "detail": "Too many requests. Please slow down.",
@@ -213,29 +275,44 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
                 },
                 headers={"Retry-After": str(retry_after)}
             )
+            await response(scope, receive, send)
+            return
         
-        response = await call_next(request)
+        rate_limit_headers = [
+            (b"x-ratelimit-limit", str(limit).encode()),
+            (b"x-ratelimit-remaining", str(limit - 1).encode()),
+        ]
         
-        # Add rate limit headers
-        response.headers["X-RateLimit-Limit"] = str(BETA_CONFIG.REQUESTS_PER_MINUTE)
-        response.headers["X-RateLimit-Remaining"] = str(
-            BETA_CONFIG.REQUESTS_PER_MINUTE - 1
-        )
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                # Add rate limit headers
+                message["headers"] = [
+                    *message.get("headers", []),
+                    *rate_limit_headers,
+                ]
+            await send(message)
         
-        return response
+        await self.app(scope, receive, send_with_headers)
     
-    def _get_user_identifier(self, request: Request) -> str:
-        """Get user identifier from request"""
+    def _get_user_identifier(self, scope: Scope) -> str:
+        """Get user identifier from the raw request headers"""
+        auth_header = b""
+        forwarded = b""
+        for name, value in scope["headers"]:
+            if name == b"authorization":
+                auth_header = value
+            elif name == b"x-forwarded-for":
+                forwarded = value
+        
         # Try to get from auth header
-        auth_header = request.headers.get("authorization", "")
         if auth_header:
-            return hashlib.md5(auth_header.encode()).hexdigest()[:16]
+            return hashlib.blake2b(auth_header, digest_size=8).hexdigest()
         
         # Fallback to IP
-        client_ip = request.client.host if request.client else "unknown"
-        forwarded = request.headers.get("x-forwarded-for", "")
+        client = scope.get("client")
+        client_ip = client[0] if client else "unknown"
         if forwarded:
-            client_ip = forwarded.split(",")[0].strip()
+            client_ip = forwarded.decode("latin-1").split(",")[0].strip()
         
         return f"ip:{client_ip}"
 
@@ -343,49 +420,51 @@ class AbusePrevention:
         r"--.*$",
     ]
     
+    # All patterns as one alternation, so an input is scanned once;
+    # group i + 1 is SUSPICIOUS_PATTERNS[i]
+    _SUSPICIOUS_RE = re.compile(
+        "|".join(f"({pattern})" for pattern in SUSPICIOUS_PATTERNS),
+        re.IGNORECASE
+    )
+    
     def __init__(self):
-        self.violations: Dict[str, list] = defaultdict(list)
+        # Violation times per user, oldest first
+        self.violations: Dict[str, deque] = defaultdict(deque)
     
     def check_input(self, user_id: str, text: str) -> tuple[bool, str]:
         """Check user input for abuse patterns"""
-        import re
+        match = self._SUSPICIOUS_RE.search(text)
+        if match is None:
+            return True, ""
         
-        text_lower = text.lower()
+        pattern = self.SUSPICIOUS_PATTERNS[match.lastindex - 1]
+        now = time.time()
+        violations = self.violations[user_id]
+        violations.append({
+            "time": now,
+            "pattern": pattern,
+            "text_sample": text[:100]
+        })
         
-        for pattern in self.SUSPICIOUS_PATTERNS:
-            if re.search(pattern, text_lower, re.IGNORECASE):
-                self.violations[user_id].append({
-                    "time": time.time(),
-                    "pattern": pattern,
-                    "text_sample": text[:100]
-                })
-                
-                # Check if user should be blocked
-                recent_violations = [
-                    v for v in self.violations[user_id]
-                    if time.time() - v["time"] < 3600
-                ]
-                
-                if len(recent_violations) >= BETA_CONFIG.SUSPICIOUS_PATTERNS_THRESHOLD:
-                    logger.warning(f"User {user_id} blocked for abuse")
-                    return False, "Your account has been temporarily restricted."
-                
-                logger.warning(f"Suspicious pattern from {user_id}: {pattern}")
-                return True, ""  # Log but allow (soft block after threshold)
+        # Drop violations older than an hour
+        while violations[0]["time"] <= now - 3600:
+            violations.popleft()
+        
+        # Check if user should be blocked
+        if len(violations) >= BETA_CONFIG.SUSPICIOUS_PATTERNS_THRESHOLD:
+            logger.warning(f"User {user_id} blocked for abuse")
+            return False, "Your account has been temporarily restricted."
         
-        return True, ""
+        logger.warning(f"Suspicious pattern from {user_id}: {pattern}")
+        return True, ""  # Log but allow (soft block after threshold)
     
     def sanitize_for_llm(self, text: str) -> str:
         """Sanitize text before sending to LLM"""
-        import re
-        import html
-        
         # HTML escape
         text = html.escape(text)
         
         # Remove potential injection patterns
-        for pattern in self.SUSPICIOUS_PATTERNS:
-            text = re.sub(pattern, "[FILTERED]", text, flags=re.IGNORECASE)
+        text = self._SUSPICIOUS_RE.sub("[FILTERED]", text)
         
         # Limit length
         if len(text) > BETA_CONFIG.MAX_QUESTION_LENGTH:
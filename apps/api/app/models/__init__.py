@@ -27,6 +27,8 @@ from app.models.document import (
     DocumentChunk,
     DocumentStatus,
     DocumentType,
+    IndexJobStatus,
+    RagIndexJob,
 )
 from app.models.quiz import (
     Quiz,
@@ -99,6 +101,8 @@ __all__ = [
     "DocumentChunk",
     "DocumentStatus",
     "DocumentType",
+    "IndexJobStatus",
+    "RagIndexJob",
     # Quiz
     "Quiz",
     "QuizQuestion",
@@ -112,3 +112,36 @@ class DocumentChunk(Base, TimestampMixin):
     
     def __repr__(self):
         return f"<DocumentChunk {self.document_id}:{self.chunk_index}>"
+
+
+class IndexJobStatus(str, enum.Enum):
+    """RAG indexing job status"""
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCESS = "success"
+    FAILED = "failed"
+
+
+class RagIndexJob(Base, TimestampMixin):
+    """
+    Background job that embeds a document's chunks into the RAG vector store.
+    Lets /rag/index return immediately and be polled for completion.
+    """
+    __tablename__ = "rag_index_jobs"
+    
+    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    document_id = Column(String(36), ForeignKey("documents.id", ondelete="CASCADE"), nullable=False, index=True)
+    user_id = Column(String(36), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    
+    # Job options
+    syllabus_tags = Column(JSON, nullable=True)
+    
+    # Progress
+    status = Column(String(20), default=IndexJobStatus.QUEUED.value, nullable=False)
+    chunks_indexed = Column(Integer, default=0)
+    error = Column(Text, nullable=True)
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    completed_at = Column(DateTime(timezone=True), nullable=True)
+    
+    def __repr__(self):
+        return f"<RagIndexJob {self.id} {self.status}>"
@@ -6,7 +6,7 @@ import uuid
 from datetime import datetime, timezone
 from sqlalchemy import (
     Column, String, Boolean, Integer, Text, ForeignKey, 
-    DateTime, JSON, Float, Table
+    DateTime, JSON, Float, Table, UniqueConstraint
 )
 from sqlalchemy.orm import relationship
 import enum
@@ -194,6 +194,9 @@ class QuestionAnswer(Base, TimestampMixin):
     Individual answer within a quiz attempt.
     """
     __tablename__ = "question_answers"
+    __table_args__ = (
+        UniqueConstraint('attempt_id', 'question_id', name='uq_question_answers_attempt_question'),
+    )
     
     id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     attempt_id = Column(String(36), ForeignKey("quiz_attempts.id", ondelete="CASCADE"), nullable=False)
@@ -90,6 +90,11 @@ class UserStudyPlan(Base, TimestampMixin):
     current_phase_id = Column(String(36), ForeignKey("study_phases.id", ondelete="SET NULL"), nullable=True)
     overall_progress = Column(Float, default=0.0)  # 0-100
     
+    # Current phase summary, denormalized so reads skip the phase lookup
+    current_phase_name = Column(String(100), nullable=True)
+    current_phase_index = Column(Integer, nullable=True)  # 1-based phase order
+    phase_progress = Column(Float, default=0.0)  # 0-100
+    
     # Preferences
     include_current_affairs = Column(Boolean, default=True)
     include_answer_writing = Column(Boolean, default=True)
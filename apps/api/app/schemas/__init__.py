@@ -32,6 +32,7 @@ from app.schemas.syllabus import (
     SubjectUpdate,
     SubjectResponse,
     TopicCreate,
+    TopicBulkCreate,
     TopicUpdate,
     TopicResponse,
     TopicWithChildren,
@@ -81,6 +82,7 @@ __all__ = [
     "SubjectUpdate",
     "SubjectResponse",
     "TopicCreate",
+    "TopicBulkCreate",
     "TopicUpdate",
     "TopicResponse",
     "TopicWithChildren",
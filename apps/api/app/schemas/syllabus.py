@@ -178,6 +178,11 @@ class TopicCreate(TopicBase):
     parent_id: Optional[str] = None  # For subtopics
 
 
+class TopicBulkCreate(BaseModel):
+    """Schema for creating many Topics in one request"""
+    items: List[TopicCreate] = Field(..., min_length=1, max_length=1000)
+
+
 class TopicUpdate(BaseModel):
     """Schema for updating a Topic"""
     name: Optional[str] = Field(None, min_length=2, max_length=200)
@@ -4,7 +4,7 @@ Summarize long documents with UPSC-focused content extraction.
 """
 import asyncio
 from dataclasses import dataclass, field
-from typing import List, Optional, Dict, Any, Tuple
+from typing import AsyncIterator, List, Optional, Dict, Any, Tuple
 from enum import Enum
 import logging
 import re
@@ -242,7 +242,56 @@ class DocumentSummarizer:
                 content, format, length, language
             )
         
-        # Extract key information
+        return await self._build_summary(summary, content, format, language, extract_info)
+    
+    async def astream(
+        self,
+        content: str,
+        format: Optional[SummaryFormat] = None,
+        length: SummaryLength = SummaryLength.MEDIUM,
+        language: Optional[SummaryLanguage] = None,
+        extract_info: bool = True,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Summarize a document, streaming the summary as it is generated.
+        
+        For long documents the intermediate per-part summaries are built
+        first; only the final pass is streamed.
+        
+        Yields events:
+        - {"type": "token", "text": ...} as the LLM produces text
+        - {"type": "done", ...} with every other DocumentSummary field
+        """
+        format = format or self.default_format
+        language = language or self.default_language
+        
+        text = content
+        if self._estimate_tokens(content) > self.max_chunk_tokens:
+            text = await self._summarize_parts(content)
+        
+        parts = []
+        async for fragment in self._generate_stream(
+            self._build_prompt(text, format, length, language)
+        ):
+            parts.append(fragment)
+            yield {"type": "token", "text": fragment}
+        
+        result = await self._build_summary(
+            "".join(parts), content, format, language, extract_info
+        )
+        done = result.to_dict()
+        del done["summary"]
+        yield {"type": "done", **done}
+    
+    async def _build_summary(
+        self,
+        summary: str,
+        content: str,
+        format: SummaryFormat,
+        language: SummaryLanguage,
+        extract_info: bool,
+    ) -> DocumentSummary:
+        """Attach extracted key information to a generated summary"""
         key_topics = []
         key_terms = []
         important_dates = []
@@ -328,6 +377,18 @@ class DocumentSummarizer:
         language: SummaryLanguage,
     ) -> str:
         """Summarize a long document using hierarchical summarization"""
+        combined = await self._summarize_parts(content)
+        
+        # Final summary in requested format
+        return await self._summarize_chunk(
+            combined,
+            format,
+            length,
+            language,
+        )
+    
+    async def _summarize_parts(self, content: str) -> str:
+        """Summarize each part of a long document into combined intermediate notes"""
         # Split into chunks
         chunks = self._split_into_chunks(content)
         
@@ -347,17 +408,7 @@ class DocumentSummarizer:
             ))
         
         # Combine chunk summaries
-        combined = "\n\n".join([cs.content for cs in chunk_summaries])
-        
-        # Final summary in requested format
-        final_summary = await self._summarize_chunk(
-            combined,
-            format,
-            length,
-            language,
-        )
-        
-        return final_summary
+        return "\n\n".join([cs.content for cs in chunk_summaries])
     
     async def _summarize_chunk(
         self,
@@ -367,6 +418,18 @@ class DocumentSummarizer:
         language: SummaryLanguage,
     ) -> str:
         """Summarize a single chunk"""
+        return await self._generate(
+            self._build_prompt(content, format, length, language)
+        )
+    
+    def _build_prompt(
+        self,
+        content: str,
+        format: SummaryFormat,
+        length: SummaryLength,
+        language: SummaryLanguage,
+    ) -> str:
+        """Build the summarization prompt for one piece of content"""
         # Build prompt
         template = SUMMARY_PROMPTS.get(format, SUMMARY_PROMPTS[SummaryFormat.STRUCTURED])
         prompt = template.format(content=content)
@@ -377,8 +440,7 @@ class DocumentSummarizer:
         # Add language instruction
         prompt += LANGUAGE_SUFFIX.get(language, "")
         
-        # Generate summary
-        return await self._generate(prompt)
+        return prompt
     
     async def _extract_key_info(self, content: str) -> Dict[str, Any]:
         """Extract key information from content"""
@@ -480,6 +542,18 @@ class DocumentSummarizer:
 Word count: ~{word_count}"""
 
 
+    async def _generate_stream(self, prompt: str) -> AsyncIterator[str]:
+        """Stream a generation from the LLM (mock output arrives in one piece)"""
+        if self.llm_client:
+            async for fragment in self.llm_client.generate_stream(
+                prompt=prompt,
+                system_prompt=SUMMARIZE_SYSTEM_PROMPT,
+            ):
+                yield fragment
+        else:
+            yield await self._generate(prompt)
+
+
 # Factory function
 async def create_summarizer(
     llm_provider: str = "ollama",
@@ -5,7 +5,7 @@ adjustable verbosity, and multilingual output.
 """
 import asyncio
 from dataclasses import dataclass, field
-from typing import List, Optional, Dict, Any, Tuple
+from typing import AsyncIterator, List, Optional, Dict, Any, Tuple
 from enum import Enum
 import logging
 import re
@@ -247,6 +247,83 @@ class AITutor:
         # Generate answer
         answer = await self._generate(prompt)
         
+        return await self._complete_response(
+            answer=answer,
+            question=question,
+            question_type=question_type,
+            citations=citations,
+            matched_topics=matched_topics,
+            language=language,
+            verbosity=verbosity,
+            include_follow_ups=include_follow_ups,
+            include_exam_tips=include_exam_tips,
+        )
+    
+    async def astream(
+        self,
+        question: str,
+        syllabus_tags: Optional[List[str]] = None,
+        user_id: Optional[str] = None,
+        language: Optional[OutputLanguage] = None,
+        verbosity: Optional[VerbosityLevel] = None,
+        include_follow_ups: bool = True,
+        include_exam_tips: bool = True,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Ask the AI tutor a question, streaming the answer as it is generated.
+        
+        Yields events:
+        - {"type": "token", "text": ...} as the LLM produces text
+        - {"type": "done", ...} with every other TutorResponse field
+        """
+        language = language or self.default_language
+        verbosity = verbosity or self.default_verbosity
+        
+        question_type = self._detect_question_type(question)
+        context, citations, matched_topics = await self._retrieve_context(
+            question, syllabus_tags, user_id
+        )
+        prompt = self._build_prompt(
+            question=question,
+            context=context,
+            syllabus_topics=matched_topics,
+            verbosity=verbosity,
+            language=language,
+        )
+        
+        parts = []
+        async for fragment in self._generate_stream(prompt):
+            parts.append(fragment)
+            yield {"type": "token", "text": fragment}
+        
+        response = await self._complete_response(
+            answer="".join(parts),
+            question=question,
+            question_type=question_type,
+            citations=citations,
+            matched_topics=matched_topics,
+            language=language,
+            verbosity=verbosity,
+            include_follow_ups=include_follow_ups,
+            include_exam_tips=include_exam_tips,
+        )
+        done = response.to_dict()
+        del done["answer"]
+        yield {"type": "done", **done}
+    
+    async def _complete_response(
+        self,
+        answer: str,
+        question: str,
+        question_type: QuestionType,
+        citations: List[Dict[str, Any]],
+        matched_topics: List[str],
+        language: OutputLanguage,
+        verbosity: VerbosityLevel,
+        include_follow_ups: bool,
+        include_exam_tips: bool,
+    ) -> TutorResponse:
+        """Add key points, follow-ups, exam tips and confidence to an answer"""
         # Extract key points
         key_points = await self._extract_key_points(answer)
         
@@ -434,6 +511,17 @@ Question:"""
             # Mock response for testing
             return f"[Mock Tutor Response]\n\nThis is a placeholder response for: {prompt[:100]}...\n\nIn production, this would be generated by an LLM like Ollama or OpenAI."
     
+    async def _generate_stream(self, prompt: str) -> AsyncIterator[str]:
+        """Stream a response from the LLM (mock output arrives in one piece)"""
+        if self.llm_client:
+            async for fragment in self.llm_client.generate_stream(
+                prompt=prompt,
+                system_prompt=TUTOR_SYSTEM_PROMPT,
+            ):
+                yield fragment
+        else:
+            yield await self._generate(prompt)
+    
     async def _extract_key_points(self, answer: str) -> List[str]:
         """Extract key points from the answer"""
         # Simple extraction based on patterns
@@ -10,19 +10,20 @@ from app.schemas.user import UserCreate
 from app.schemas.auth import TokenResponse
 from app.services.user_service import UserService
 from app.core.security import (
-    verify_password,
+    verify_password_async,
     create_token_pair,
     verify_token,
-    hash_password
+    hash_password_async,
+    password_needs_rehash
 )
 
 
 class AuthService:
     """Service class for authentication operations"""
     
-    def __init__(self, db: AsyncSession):
+    def __init__(self, db: AsyncSession, user_service: Optional[UserService] = None):
         self.db = db
-        self.user_service = UserService(db)
+        self.user_service = user_service or UserService(db)
     
     async def register(self, user_data: UserCreate) -> Tuple[User, TokenResponse]:
         """
@@ -68,13 +69,17 @@ class AuthService:
             return None
         
         # Verify password
-        if not verify_password(password, user.hashed_password):
+        if not await verify_password_async(password, user.hashed_password):
             return None
         
         # Check if user is active
         if not user.is_active:
             return None
         
+        # Upgrade legacy hashes now that the plain password is known
+        if password_needs_rehash(user.hashed_password):
+            user.hashed_password = await hash_password_async(password)
+        
         # Update last login
         user.update_last_login()
         await self.db.flush()
@@ -129,11 +134,11 @@ class AuthService:
             True if successful, False otherwise
         """
         # Verify current password
-        if not verify_password(current_password, user.hashed_password):
+        if not await verify_password_async(current_password, user.hashed_password):
             return False
         
         # Hash and update new password
-        user.hashed_password = hash_password(new_password)
+        user.hashed_password = await hash_password_async(new_password)
         await self.db.flush()
         
         return True
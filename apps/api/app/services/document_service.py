@@ -6,16 +6,16 @@ import os
 import uuid
 import aiofiles
 from datetime import datetime, timezone
-from typing import Optional, List, Tuple
+from typing import AsyncIterator, Optional, List, Tuple
 from pathlib import Path
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
+from sqlalchemy import and_, select, func, true
 from sqlalchemy.orm import selectinload
 import logging
 
 from app.models.document import Document, DocumentChunk, DocumentStatus
 from app.services.pdf_extractor import PDFExtractor, ExtractionResult
-from app.services.rag.embeddings import EmbeddingPipeline, create_embedding_pipeline
+from app.services.rag.embeddings import get_embedding_pipeline
 
 logger = logging.getLogger(__name__)
 
@@ -210,13 +210,9 @@ class DocumentService:
             # --- Auto-Index into Vector Store ---
             try:
                 logger.info(f"Indexing document {doc.id} into vector store...")
-                embedding_pipeline = EmbeddingPipeline(storage_path="data/vectors")
-                
-                # Make sure we load existing index first
-                try:
-                    embedding_pipeline.load()
-                except Exception:
-                    pass
+                # Shared instance: already loaded (off the event loop), and
+                # new vectors become visible to searches immediately
+                embedding_pipeline = await get_embedding_pipeline()
                 
                 # Convert to format expected by index_chunks
                 chunk_dicts = [
@@ -235,7 +231,7 @@ class DocumentService:
                     chunks=chunk_dicts,
                     user_id=doc.user_id,
                 )
-                # Note: index_chunks now auto-saves
+                # Note: index_chunks schedules a background save
                 logger.info(f"Successfully indexed document {doc.id}")
                 
             except Exception as e:
@@ -301,6 +297,82 @@ class DocumentService:
         
         return items, total
     
+    async def get_authorized_chunk_contents(
+        self,
+        doc_id: str,
+        user_id: str,
+        is_admin: bool = False,
+        limit: int = 100,
+    ) -> Optional[Tuple[bool, str, List[str]]]:
+        """
+        Get a document's status and first chunks' text in one query,
+        including the text only if the user may read the document.
+        
+        Chunks are outer-joined on the ownership check, so an unauthorized
+        caller still gets one row (to tell 403 from 404) but no content.
+        
+        Returns:
+            (authorized, status, chunk contents), or None if the document
+            does not exist
+        """
+        can_read = true() if is_admin else Document.user_id == user_id
+        result = await self.db.execute(
+            select(Document.user_id, Document.status, DocumentChunk.content)
+            .outerjoin(
+                DocumentChunk,
+                and_(DocumentChunk.document_id == Document.id, can_read),
+            )
+            .where(Document.id == doc_id)
+            .order_by(DocumentChunk.chunk_index)
+            .limit(limit)
+        )
+        rows = result.all()
+        if not rows:
+            return None
+        
+        authorized = is_admin or rows[0].user_id == user_id
+        contents = [row.content for row in rows if row.content is not None]
+        return authorized, rows[0].status, contents
+    
+    async def iter_document_chunks(
+        self,
+        doc_id: str,
+        page_size: int = 200,
+    ) -> AsyncIterator[List[DocumentChunk]]:
+        """
+        Iterate over all chunks of a document in pages, in chunk order.
+        
+        Uses keyset pagination on chunk_index, so each page is an indexed
+        range scan and only one page is held in memory at a time.
+        
+        Args:
+            doc_id: Document ID
+            page_size: Chunks per page
+            
+        Yields:
+            Lists of up to page_size chunks
+        """
+        last_index = -1
+        while True:
+            result = await self.db.execute(
+                select(DocumentChunk)
+                .where(
+                    DocumentChunk.document_id == doc_id,
+                    DocumentChunk.chunk_index > last_index,
+                )
+                .order_by(DocumentChunk.chunk_index)
+                .limit(page_size)
+            )
+            chunks = list(result.scalars().all())
+            if not chunks:
+                return
+            
+            yield chunks
+            
+            if len(chunks) < page_size:
+                return
+            last_index = chunks[-1].chunk_index
+    
     # ==================== Private Methods ====================
     
     def _validate_file(
@@ -12,6 +12,7 @@ from sqlalchemy.orm import selectinload
 import logging
 import uuid
 
+from app.core.database import dialect_insert
 from app.models.quiz import (
     Quiz, QuizQuestion, QuizAttempt, QuestionAnswer,
     QuizStatus, AttemptStatus
@@ -313,34 +314,33 @@ class QuizEvaluator:
         if not question:
             raise ValueError("Question not found")
         
-        # Check if answer already exists
-        existing_result = await self.db.execute(
-            select(QuestionAnswer)
-            .where(and_(
-                QuestionAnswer.attempt_id == attempt_id,
-                QuestionAnswer.question_id == question_id
-            ))
+        # Insert or overwrite the answer in a single statement
+        is_correct = selected_option == question.correct_option if selected_option is not None else None
+        answered_at = datetime.now(timezone.utc)
+        
+        stmt = dialect_insert(self.db)(QuestionAnswer).values(
+            attempt_id=attempt_id,
+            question_id=question_id,
+            selected_option=selected_option,
+            is_correct=is_correct,
+            time_spent_seconds=time_spent_seconds,
+            answered_at=answered_at,
         )
-        existing = existing_result.scalar_one_or_none()
-        
-        if existing:
-            # Update existing answer
-            existing.selected_option = selected_option
-            existing.is_correct = selected_option == question.correct_option if selected_option is not None else None
-            existing.time_spent_seconds = time_spent_seconds
-            existing.answered_at = datetime.now(timezone.utc)
-            answer = existing
-        else:
-            # Create new answer
-            answer = QuestionAnswer(
-                attempt_id=attempt_id,
-                question_id=question_id,
-                selected_option=selected_option,
-                is_correct=selected_option == question.correct_option if selected_option is not None else None,
-                time_spent_seconds=time_spent_seconds,
-                answered_at=datetime.now(timezone.utc),
-            )
-            self.db.add(answer)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[QuestionAnswer.attempt_id, QuestionAnswer.question_id],
+            set_={
+                "selected_option": stmt.excluded.selected_option,
+                "is_correct": stmt.excluded.is_correct,
+                "time_spent_seconds": stmt.excluded.time_spent_seconds,
+                "answered_at": stmt.excluded.answered_at,
+                "updated_at": answered_at,
+            },
+        ).returning(QuestionAnswer)
+        
+        result = await self.db.execute(
+            stmt, execution_options={"populate_existing": True}
+        )
+        answer = result.scalar_one()
         
         # Update question statistics
         question.times_answered += 1
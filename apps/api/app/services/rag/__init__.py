@@ -16,6 +16,14 @@ from app.services.rag.embeddings import (
     EmbeddingMetadata,
     SearchResult,
     create_embedding_pipeline,
+    get_embedding_pipeline,
+    close_embedding_pipeline,
+    load_sentence_transformer,
+)
+from app.services.rag.persistence import PersistenceCoordinator
+from app.services.rag.query_cache import (
+    QueryCache,
+    get_query_cache,
 )
 from app.services.rag.pipeline import (
     RAGPipeline,
@@ -24,6 +32,8 @@ from app.services.rag.pipeline import (
     LLMProvider,
     OllamaClient,
     HuggingFaceClient,
+    MockLLMClient,
+    close_http_client,
     create_rag_pipeline,
     create_complete_rag_system,
     SYSTEM_PROMPT,
@@ -46,6 +56,13 @@ __all__ = [
     "EmbeddingMetadata",
     "SearchResult",
     "create_embedding_pipeline",
+    "get_embedding_pipeline",
+    "close_embedding_pipeline",
+    "load_sentence_transformer",
+    "PersistenceCoordinator",
+    # Query cache
+    "QueryCache",
+    "get_query_cache",
     # Pipeline
     "RAGPipeline",
     "RAGResponse",
@@ -53,6 +70,8 @@ __all__ = [
     "LLMProvider",
     "OllamaClient",
     "HuggingFaceClient",
+    "MockLLMClient",
+    "close_http_client",
     "create_rag_pipeline",
     "create_complete_rag_system",
     # Prompts
@@ -3,16 +3,57 @@ Vector Embedding Pipeline for Study Materials
 Sentence-level embeddings with FAISS vector store and metadata filtering.
 """
 import asyncio
+import functools
 import json
+import threading
 import numpy as np
+from contextlib import contextmanager
 from dataclasses import dataclass, field
-from typing import List, Optional, Dict, Any, Tuple, Union
+from typing import Callable, Iterator, List, Optional, Dict, Any, Tuple, TypeVar, Union
 from pathlib import Path
 import logging
 import pickle
 
+from app.core.config import settings
+from app.services.rag.persistence import (
+    PersistenceCoordinator,
+    commit_generation,
+    current_generation,
+    fsync_directory,
+    fsync_file,
+    new_generation,
+)
+
 logger = logging.getLogger(__name__)
 
+# Above this many vectors, index_type="auto" switches from exact to HNSW search
+HNSW_AUTO_THRESHOLD = 10_000
+
+# HNSW graph parameters
+HNSW_M = 32
+HNSW_EF_CONSTRUCTION = 200
+HNSW_EF_SEARCH = 64
+
+# IVF parameters
+IVF_NPROBE = 8
+IVF_TRAIN_POINTS_PER_LIST = 256
+
+# Binary indexes over-fetch this many candidates per result, then rescore
+BINARY_RESCORE_FACTOR = 4
+
+# Loaded SentenceTransformer models by (model name, device). Models loaded
+# before a pre-fork server forks its workers are shared copy-on-write.
+_loaded_models: Dict[Tuple[str, str], Any] = {}
+
+
+def load_sentence_transformer(model_name: str, device: str = "cpu"):
+    """Load a SentenceTransformer model once per process and reuse it"""
+    key = (model_name, device)
+    if key not in _loaded_models:
+        from sentence_transformers import SentenceTransformer
+        _loaded_models[key] = SentenceTransformer(model_name, device=device)
+    return _loaded_models[key]
+
 
 @dataclass
 class EmbeddingMetadata:
@@ -69,8 +110,7 @@ class EmbeddingModel:
         """Lazy load the embedding model"""
         if self._model is None:
             try:
-                from sentence_transformers import SentenceTransformer
-                self._model = SentenceTransformer(self.model_name, device=self.device)
+                self._model = load_sentence_transformer(self.model_name, self.device)
                 self._dimension = self._model.get_sentence_embedding_dimension()
                 logger.info(f"Loaded embedding model: {self.model_name} (dim={self._dimension})")
             except ImportError:
@@ -106,6 +146,136 @@ class EmbeddingModel:
         """Async wrapper for embedding"""
         loop = asyncio.get_event_loop()
         return await loop.run_in_executor(None, self.embed, texts)
+    
+    async def embed_batched_async(
+        self,
+        texts: List[str],
+        batch_size: int = 64,
+        max_concurrency: int = 8,
+    ) -> np.ndarray:
+        """
+        Embed a large list of texts in concurrent batches.
+        
+        Texts are sorted by length before batching so each batch pads to a
+        similar length, then batches are encoded in worker threads.
+        
+        Args:
+            texts: List of text strings
+            batch_size: Texts per encode call
+            max_concurrency: Maximum batches encoded at once
+            
+        Returns:
+            numpy array of shape (len(texts), dimension), in input order
+        """
+        # Load once up front so worker threads don't race on it
+        self._load_model()
+        
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]), reverse=True)
+        batches = [order[i:i + batch_size] for i in range(0, len(order), batch_size)]
+        semaphore = asyncio.Semaphore(max_concurrency)
+        
+        async def encode(batch: List[int]) -> np.ndarray:
+            async with semaphore:
+                return await asyncio.to_thread(self.embed, [texts[i] for i in batch])
+        
+        results = await asyncio.gather(*(encode(batch) for batch in batches))
+        
+        # Restore input order
+        embeddings = np.empty((len(texts), self._dimension), dtype=np.float32)
+        embeddings[order] = np.vstack(results)
+        return embeddings
+
+
+class _StringTable:
+    """Interned strings: each distinct value is stored once and referenced by an int32 code"""
+    
+    def __init__(self, values: Optional[List[str]] = None):
+        self.values: List[str] = list(values or [])
+        self._codes: Dict[str, int] = {v: i for i, v in enumerate(self.values)}
+    
+    def intern(self, value: Optional[str]) -> int:
+        """Get the code for a value, adding it if new (None -> -1)"""
+        if value is None:
+            return -1
+        code = self._codes.get(value)
+        if code is None:
+            code = len(self.values)
+            self.values.append(value)
+            self._codes[value] = code
+        return code
+    
+    def code(self, value: str) -> int:
+        """Get the code for a value without adding it (-2 if unknown, which matches no row)"""
+        return self._codes.get(value, -2)
+    
+    def value(self, code: int) -> Optional[str]:
+        """Get the value for a code"""
+        return self.values[code] if code >= 0 else None
+
+
+class _ReadWriteLock:
+    """
+    Many concurrent readers or a single writer, across threads.
+    
+    Writers take priority: once a writer is waiting, new readers queue
+    behind it, so a steady stream of searches cannot starve indexing.
+    """
+    
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._readers = 0
+        self._writing = False
+        self._writers_waiting = 0
+    
+    @contextmanager
+    def read(self) -> Iterator[None]:
+        with self._cond:
+            while self._writing or self._writers_waiting:
+                self._cond.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._readers -= 1
+                if not self._readers:
+                    self._cond.notify_all()
+    
+    @contextmanager
+    def write(self) -> Iterator[None]:
+        with self._cond:
+            self._writers_waiting += 1
+            while self._writing or self._readers:
+                self._cond.wait()
+            self._writers_waiting -= 1
+            self._writing = True
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._writing = False
+                self._cond.notify_all()
+
+
+_Method = TypeVar("_Method", bound=Callable[..., Any])
+
+
+def _reads(method: _Method) -> _Method:
+    """Run a FAISSVectorStore method under the store's read lock"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._rw_lock.read():
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+def _writes(method: _Method) -> _Method:
+    """Run a FAISSVectorStore method under the store's write lock"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._rw_lock.write():
+            return method(self, *args, **kwargs)
+    return wrapper
 
 
 class FAISSVectorStore:
@@ -117,51 +287,182 @@ class FAISSVectorStore:
     - Metadata filtering (user_id, syllabus_tag)
     - Persistence to disk
     - Async-friendly design
+    
+    Metadata is stored column-wise, one row per FAISS ID: strings that repeat
+    across chunks (document, user, source, chunk type) are interned into
+    int32 code arrays, so search filters are numpy masks over the candidates.
+    
+    Searches run in executor threads while indexing adds rows, and FAISS
+    does not allow an index to be modified during a search. Public methods
+    therefore take a read/write lock: searches, stats and saves share it,
+    while add, rebuild, delete and load hold it exclusively, so a search
+    never sees the index and the metadata columns out of step.
     """
     
     def __init__(
         self,
         dimension: int = 384,
-        index_type: str = "flat",  # flat, ivf, hnsw
+        index_type: str = "flat",  # flat, ivf, hnsw, binary_hnsw
         storage_path: Optional[str] = None,
     ):
         self.dimension = dimension
         self.index_type = index_type
         self.storage_path = Path(storage_path) if storage_path else None
         
+        self._rw_lock = _ReadWriteLock()
         self._index = None
-        self._id_map: Dict[int, str] = {}  # FAISS ID -> chunk_id
-        self._chunk_map: Dict[str, int] = {}  # chunk_id -> FAISS ID
-        self._metadata: Dict[str, EmbeddingMetadata] = {}  # chunk_id -> metadata
-        self._contents: Dict[str, str] = {}  # chunk_id -> content
-        self._next_id = 0
+        self._chunk_map: Dict[str, int] = {}  # chunk_id -> FAISS ID (live rows only)
+        self._init_columns()
         
         self._init_index()
     
+    def _init_columns(self):
+        """Reset the per-row metadata columns (row index == FAISS ID)"""
+        self._chunk_ids: List[str] = []
+        self._contents: List[str] = []
+        self._syllabus_tags: List[List[str]] = []
+        self._doc_codes = np.empty(0, dtype=np.int32)
+        self._user_codes = np.empty(0, dtype=np.int32)
+        self._source_codes = np.empty(0, dtype=np.int32)
+        self._type_codes = np.empty(0, dtype=np.int32)
+        self._page_numbers = np.empty(0, dtype=np.int32)  # -1 if unknown
+        self._l1_norms = np.empty(0, dtype=np.float32)  # rescales binary scores
+        self._deleted = np.empty(0, dtype=bool)
+        
+        self._documents = _StringTable()
+        self._users = _StringTable()
+        self._sources = _StringTable()
+        self._chunk_types = _StringTable()
+    
     def _init_index(self):
         """Initialize FAISS index"""
         try:
-            import faiss
-            
-            if self.index_type == "flat":
-                # Exact search - best for small datasets
-                self._index = faiss.IndexFlatIP(self.dimension)
-            elif self.index_type == "ivf":
-                # IVF for larger datasets
-                quantizer = faiss.IndexFlatIP(self.dimension)
-                self._index = faiss.IndexIVFFlat(quantizer, self.dimension, 100)
-            elif self.index_type == "hnsw":
-                # HNSW for large datasets with fast search
-                self._index = faiss.IndexHNSWFlat(self.dimension, 32)
-            else:
-                self._index = faiss.IndexFlatIP(self.dimension)
-            
-            logger.info(f"Initialized FAISS index: {self.index_type}")
-            
+            import faiss  # noqa: F401
         except ImportError:
             logger.error("FAISS not installed. Install with: pip install faiss-cpu")
             raise
+        
+        if self.index_type == "ivf":
+            # IVF needs training data; built on the first add() or rebuild()
+            self._index = None
+        else:
+            self._index = self._create_index(self.index_type)
+        
+        logger.info(f"Initialized FAISS index: {self.index_type}")
+    
+    def _create_index(self, index_type: str, train_vectors: Optional[np.ndarray] = None):
+        """
+        Create an empty FAISS index of the given type.
+        
+        Float index types use inner product, which equals cosine similarity
+        for the normalized embeddings stored here (higher is better).
+        
+        Args:
+            index_type: flat, ivf, hnsw or binary_hnsw
+            train_vectors: Vectors to train IVF centroids on (required for ivf)
+            
+        Returns:
+            FAISS index
+        """
+        import faiss
+        
+        if index_type == "binary_hnsw":
+            # 1 bit per dimension, Hamming distance; results are rescored in search()
+            index = faiss.IndexBinaryHNSW(self.dimension, HNSW_M)
+            index.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+            index.hnsw.efSearch = HNSW_EF_SEARCH
+            return index
+        
+        if index_type == "hnsw":
+            # HNSW graph: sub-linear search for large datasets
+            index = faiss.IndexHNSWFlat(self.dimension, HNSW_M, faiss.METRIC_INNER_PRODUCT)
+            index.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+            index.hnsw.efSearch = HNSW_EF_SEARCH
+            return index
+        
+        if index_type == "ivf":
+            # IVF: cluster into sqrt(N) lists, scan only the nearest few
+            if train_vectors is None or len(train_vectors) == 0:
+                raise ValueError("IVF index requires training vectors")
+            nlist = max(1, int(np.sqrt(len(train_vectors))))
+            quantizer = faiss.IndexFlatIP(self.dimension)
+            index = faiss.IndexIVFFlat(
+                quantizer, self.dimension, nlist, faiss.METRIC_INNER_PRODUCT
+            )
+            sample = train_vectors[:nlist * IVF_TRAIN_POINTS_PER_LIST]
+            index.train(np.ascontiguousarray(sample, dtype=np.float32))
+            index.nprobe = min(IVF_NPROBE, nlist)
+            # Keep the ID -> list mapping so vectors can be reconstructed
+            index.make_direct_map()
+            return index
+        
+        # Exact search - best for small datasets
+        return faiss.IndexFlatIP(self.dimension)
     
+    @_writes
+    def rebuild(self, index_type: str):
+        """
+        Rebuild the index as a different type, keeping all vectors and IDs.
+        
+        Vectors are reconstructed from the current index in FAISS ID order,
+        so the ID -> chunk mappings stay valid.
+        
+        Args:
+            index_type: flat, ivf, hnsw or binary_hnsw
+        """
+        if self.is_binary and index_type != "binary_hnsw":
+            raise ValueError(
+                "A binary index cannot be rebuilt as a float index; re-index the documents instead"
+            )
+        
+        if self.size:
+            vectors = self._index.reconstruct_n(0, self._index.ntotal)
+        else:
+            vectors = np.empty((0, self.dimension), dtype=np.float32)
+        
+        if index_type == "ivf" and len(vectors) == 0:
+            index = None
+        else:
+            index = self._create_index(index_type, vectors)
+            if len(vectors):
+                index.add(vectors if self.is_binary else self._encode(vectors, index_type))
+        
+        self._index = index
+        self.index_type = index_type
+        logger.info(f"Rebuilt FAISS index as {index_type} ({len(vectors)} vectors)")
+    
+    @property
+    def is_binary(self) -> bool:
+        """Whether vectors are stored as packed sign bits"""
+        return self.index_type == "binary_hnsw"
+    
+    @staticmethod
+    def _encode(embeddings: np.ndarray, index_type: str) -> np.ndarray:
+        """Convert float embeddings to the representation stored by index_type"""
+        if index_type == "binary_hnsw":
+            # Sign bit per dimension, packed 8 per byte: (N, dimension / 8) uint8
+            return np.packbits(embeddings > 0, axis=1)
+        return embeddings.astype(np.float32)
+    
+    @_reads
+    def stats(self) -> Dict[str, Any]:
+        """Describe the live index (type, size and search parameters)"""
+        stats: Dict[str, Any] = {
+            "index_type": self.index_type,
+            "index_class": type(self._index).__name__ if self._index is not None else None,
+            "ntotal": self.size,
+            "dimension": self.dimension,
+            "stored_bits": self.dimension * (1 if self.is_binary else 32),
+        }
+        if self._index is not None and hasattr(self._index, "hnsw"):
+            stats["ef_search"] = self._index.hnsw.efSearch
+            stats["ef_construction"] = self._index.hnsw.efConstruction
+        if self._index is not None and hasattr(self._index, "nprobe"):
+            stats["nprobe"] = self._index.nprobe
+            stats["nlist"] = self._index.nlist
+        return stats
+    
+    @_writes
     def add(
         self,
         embeddings: np.ndarray,
@@ -181,28 +482,90 @@ class FAISSVectorStore:
         """
         assert len(embeddings) == len(contents) == len(metadata_list)
         
-        chunk_ids = []
-        
-        for i, (content, metadata) in enumerate(zip(contents, metadata_list)):
-            chunk_id = metadata.chunk_id
-            faiss_id = self._next_id
-            
-            # Store mappings
-            self._id_map[faiss_id] = chunk_id
-            self._chunk_map[chunk_id] = faiss_id
-            self._metadata[chunk_id] = metadata
-            self._contents[chunk_id] = content
-            
-            chunk_ids.append(chunk_id)
-            self._next_id += 1
-        
         # Add to FAISS index
         embeddings = embeddings.astype(np.float32)
-        self._index.add(embeddings)
+        if self._index is None:
+            self._index = self._create_index(self.index_type, embeddings)
+        self._index.add(self._encode(embeddings, self.index_type))
+        
+        # Store metadata rows
+        self._append_rows(contents, metadata_list, np.abs(embeddings).sum(axis=1))
         
         logger.debug(f"Added {len(embeddings)} embeddings to index")
         
-        return chunk_ids
+        return [m.chunk_id for m in metadata_list]
+    
+    def _append_rows(
+        self,
+        contents: List[str],
+        metadata_list: List[EmbeddingMetadata],
+        l1_norms: Optional[np.ndarray] = None,
+    ):
+        """
+        Append metadata rows for newly added vectors.
+        
+        Args:
+            contents: Text of each row
+            metadata_list: Metadata of each row
+            l1_norms: L1 norm of each row's float embedding; estimated from
+                the dimension when the vectors are not available
+        """
+        def column(values) -> np.ndarray:
+            return np.fromiter(values, dtype=np.int32, count=len(metadata_list))
+        
+        if l1_norms is None:
+            l1_norms = np.full(len(metadata_list), self._expected_l1_norm(), dtype=np.float32)
+        
+        start = len(self._chunk_ids)
+        
+        self._chunk_ids.extend(m.chunk_id for m in metadata_list)
+        self._contents.extend(contents)
+        self._syllabus_tags.extend(list(m.syllabus_tags) for m in metadata_list)
+        self._doc_codes = np.concatenate([
+            self._doc_codes, column(self._documents.intern(m.document_id) for m in metadata_list)
+        ])
+        self._user_codes = np.concatenate([
+            self._user_codes, column(self._users.intern(m.user_id) for m in metadata_list)
+        ])
+        self._source_codes = np.concatenate([
+            self._source_codes, column(self._sources.intern(m.source) for m in metadata_list)
+        ])
+        self._type_codes = np.concatenate([
+            self._type_codes, column(self._chunk_types.intern(m.chunk_type) for m in metadata_list)
+        ])
+        self._page_numbers = np.concatenate([
+            self._page_numbers,
+            column(
+                m.extra.get("page_number") if m.extra.get("page_number") is not None else -1
+                for m in metadata_list
+            ),
+        ])
+        self._l1_norms = np.concatenate([self._l1_norms, l1_norms.astype(np.float32)])
+        self._deleted = np.concatenate([self._deleted, np.zeros(len(metadata_list), dtype=bool)])
+        
+        for row, metadata in enumerate(metadata_list, start):
+            # A re-indexed chunk supersedes its previous vector
+            previous = self._chunk_map.get(metadata.chunk_id)
+            if previous is not None:
+                self._deleted[previous] = True
+            self._chunk_map[metadata.chunk_id] = row
+    
+    def _expected_l1_norm(self) -> float:
+        """L1 norm of a unit vector with Gaussian-like coordinates: sqrt(2d / pi)"""
+        return float(np.sqrt(2 * self.dimension / np.pi))
+    
+    def _metadata_at(self, row: int) -> EmbeddingMetadata:
+        """Materialize the metadata object for one row"""
+        page_number = int(self._page_numbers[row])
+        return EmbeddingMetadata(
+            chunk_id=self._chunk_ids[row],
+            document_id=self._documents.value(self._doc_codes[row]),
+            user_id=self._users.value(self._user_codes[row]),
+            syllabus_tags=self._syllabus_tags[row],
+            chunk_type=self._chunk_types.value(self._type_codes[row]) or "paragraph",
+            source=self._sources.value(self._source_codes[row]) or "",
+            extra={"page_number": page_number} if page_number >= 0 else {},
+        )
     
     async def add_async(
         self,
@@ -216,6 +579,7 @@ class FAISSVectorStore:
             None, self.add, embeddings, contents, metadata_list
         )
     
+    @_reads
     def search(
         self,
         query_embedding: np.ndarray,
@@ -238,51 +602,49 @@ class FAISSVectorStore:
         Returns:
             List of SearchResult objects
         """
-        if self._index.ntotal == 0:
+        if self.size == 0:
             return []
         
         # Search more than top_k to account for filtering
         search_k = min(top_k * 5, self._index.ntotal)
         
         query_embedding = query_embedding.astype(np.float32).reshape(1, -1)
-        scores, indices = self._index.search(query_embedding, search_k)
+        if self.is_binary:
+            scores, indices = self._search_binary(query_embedding, search_k)
+        else:
+            scores, indices = self._index.search(query_embedding, search_k)
+        
+        scores, rows = scores[0], indices[0]
+        
+        # FAISS returns -1 for empty slots
+        valid = (rows >= 0) & (rows < len(self._chunk_ids))
+        scores, rows = scores[valid], rows[valid]
+        
+        # Apply filters as masks over the candidate rows
+        keep = ~self._deleted[rows] & (scores >= min_score)
+        
+        if user_id:
+            user_codes = self._user_codes[rows]
+            keep &= (user_codes == -1) | (user_codes == self._users.code(user_id))
+        
+        if document_ids:
+            doc_codes = [self._documents.code(d) for d in document_ids]
+            keep &= np.isin(self._doc_codes[rows], doc_codes)
+        
+        scores, rows = scores[keep], rows[keep]
         
         results = []
+        tags = set(syllabus_tags) if syllabus_tags else None
         
-        for score, idx in zip(scores[0], indices[0]):
-            if idx == -1:  # FAISS returns -1 for empty slots
+        for score, row in zip(scores, rows):
+            if tags and tags.isdisjoint(self._syllabus_tags[row]):
                 continue
             
-            chunk_id = self._id_map.get(idx)
-            if not chunk_id:
-                continue
-            
-            metadata = self._metadata.get(chunk_id)
-            if not metadata:
-                continue
-            
-            # Apply filters
-            if user_id and metadata.user_id and metadata.user_id != user_id:
-                continue
-            
-            if document_ids:
-                if metadata.document_id not in document_ids:
-                    continue
-            
-            if syllabus_tags:
-                if not any(tag in metadata.syllabus_tags for tag in syllabus_tags):
-                    continue
-            
-            if score < min_score:
-                continue
-            
-            content = self._contents.get(chunk_id, "")
-            
             results.append(SearchResult(
-                chunk_id=chunk_id,
-                content=content,
+                chunk_id=self._chunk_ids[row],
+                content=self._contents[row],
                 score=float(score),
-                metadata=metadata,
+                metadata=self._metadata_at(row),
             ))
             
             if len(results) >= top_k:
@@ -290,6 +652,39 @@ class FAISSVectorStore:
         
         return results
     
+    def _search_binary(
+        self,
+        query_embedding: np.ndarray,
+        search_k: int,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Hamming search over the binary index, then rescore the candidates.
+        
+        Candidates are rescored by the dot product of the full-precision
+        query q with each candidate's +/-1 code s, divided by the L1 norm of
+        the candidate's original embedding x. Since x . s == |x|_1, this is
+        exactly 1 for q == x and an unbiased estimate of the cosine q . x
+        otherwise, so min_score thresholds tuned on float indexes still
+        apply. (Dividing by sqrt(d) instead gives cos(q, s), which
+        understates the cosine by a factor of about 0.8.)
+        
+        Returns:
+            (scores, indices), each of shape (1, <= search_k), best first
+        """
+        candidate_k = min(search_k * BINARY_RESCORE_FACTOR, self._index.ntotal)
+        _, indices = self._index.search(self._encode(query_embedding, "binary_hnsw"), candidate_k)
+        
+        candidates = indices[0][indices[0] != -1]
+        if len(candidates) == 0:
+            return np.empty((1, 0), dtype=np.float32), np.empty((1, 0), dtype=np.int64)
+        
+        codes = np.vstack([self._index.reconstruct(int(i)) for i in candidates])
+        signs = np.unpackbits(codes, axis=1)[:, :self.dimension].astype(np.float32) * 2.0 - 1.0
+        scores = (signs @ query_embedding[0]) / self._l1_norms[candidates]
+        
+        order = np.argsort(-scores)[:search_k]
+        return scores[order].reshape(1, -1), candidates[order].reshape(1, -1)
+    
     async def search_async(
         self,
         query_embedding: np.ndarray,
@@ -306,48 +701,90 @@ class FAISSVectorStore:
             lambda: self.search(query_embedding, top_k, user_id, document_ids, syllabus_tags, min_score)
         )
     
+    @_writes
     def delete(self, chunk_ids: List[str]) -> int:
         """
         Delete chunks by ID.
-        Note: FAISS doesn't support deletion, so we just remove from metadata.
+        Note: FAISS doesn't support deletion, so rows are only marked deleted.
         For production, use a database-backed solution or rebuild index.
         """
         deleted = 0
         for chunk_id in chunk_ids:
-            if chunk_id in self._metadata:
-                del self._metadata[chunk_id]
-                del self._contents[chunk_id]
+            row = self._chunk_map.pop(chunk_id, None)
+            if row is not None:
+                self._deleted[row] = True
+                self._contents[row] = ""
                 deleted += 1
         return deleted
     
+    @_reads
     def save(self, path: Optional[str] = None):
-        """Save index and metadata to disk"""
+        """
+        Save index and metadata to disk.
+        
+        The files are written into a new generation directory, which then
+        replaces the live one through a single pointer swap, so the index
+        and metadata on disk always come from the same save.
+        """
         import faiss
         
         save_path = Path(path) if path else self.storage_path
         if not save_path:
             raise ValueError("No storage path specified")
         
-        save_path.mkdir(parents=True, exist_ok=True)
+        generation = new_generation(save_path)
+        written = []
         
-        # Save FAISS index
-        faiss.write_index(self._index, str(save_path / "index.faiss"))
+        # Save FAISS index (an untrained IVF index has nothing to write yet)
+        if self._index is not None:
+            index_path = generation / "index.faiss"
+            if self.is_binary:
+                faiss.write_index_binary(self._index, str(index_path))
+            else:
+                faiss.write_index(self._index, str(index_path))
+            written.append(index_path)
         
-        # Save metadata
-        data = {
-            "id_map": self._id_map,
-            "chunk_map": self._chunk_map,
-            "metadata": {k: v.__dict__ for k, v in self._metadata.items()},
-            "contents": self._contents,
-            "next_id": self._next_id,
+        # Save metadata: numeric columns as arrays, strings as JSON
+        columns_path = generation / "metadata.npz"
+        with open(columns_path, "wb") as f:
+            np.savez(
+                f,
+                doc_codes=self._doc_codes,
+                user_codes=self._user_codes,
+                source_codes=self._source_codes,
+                type_codes=self._type_codes,
+                page_numbers=self._page_numbers,
+                l1_norms=self._l1_norms,
+                deleted=self._deleted,
+            )
+        written.append(columns_path)
+        
+        strings = {
+            "index_type": self.index_type,
             "dimension": self.dimension,
+            "chunk_ids": self._chunk_ids,
+            "contents": self._contents,
+            "syllabus_tags": self._syllabus_tags,
+            "documents": self._documents.values,
+            "users": self._users.values,
+            "sources": self._sources.values,
+            "chunk_types": self._chunk_types.values,
         }
         
-        with open(save_path / "metadata.pkl", "wb") as f:
-            pickle.dump(data, f)
+        strings_path = generation / "metadata.json"
+        with open(strings_path, "w", encoding="utf-8") as f:
+            json.dump(strings, f, ensure_ascii=False)
+        written.append(strings_path)
+        
+        # Everything is on disk before the generation goes live
+        for file_path in written:
+            fsync_file(file_path)
+        fsync_directory(generation)
+        commit_generation(save_path, generation)
         
-        logger.info(f"Saved vector store to {save_path}")
+        logger.info(f"Saved vector store to {generation}")
     
+    @_writes
     def load(self, path: Optional[str] = None):
         """Load index and metadata from disk"""
         import faiss
@@ -356,27 +793,97 @@ class FAISSVectorStore:
         if not load_path or not load_path.exists():
             raise ValueError(f"Path does not exist: {load_path}")
         
-        # Load FAISS index
-        self._index = faiss.read_index(str(load_path / "index.faiss"))
+        # Stores saved before generations keep their files at the top level
+        generation = current_generation(load_path)
+        if generation is not None:
+            load_path = generation
         
         # Load metadata
+        if (load_path / "metadata.npz").exists():
+            self._load_columns(load_path)
+        else:
+            self._load_legacy_metadata(load_path)
+        
+        # Load FAISS index
+        index_path = load_path / "index.faiss"
+        if generation is not None and not index_path.exists():
+            # Saved while an IVF index was still waiting for training data
+            self._index = None
+        elif self.is_binary:
+            self._index = faiss.read_index_binary(str(index_path))
+        else:
+            self._index = faiss.read_index(str(index_path))
+        
+        logger.info(f"Loaded vector store from {load_path} ({len(self._chunk_map)} chunks)")
+    
+    def _load_columns(self, load_path: Path):
+        """Load columnar metadata written by save()"""
+        with open(load_path / "metadata.json", encoding="utf-8") as f:
+            strings = json.load(f)
+        
+        with np.load(load_path / "metadata.npz") as columns:
+            self._doc_codes = columns["doc_codes"]
+            self._user_codes = columns["user_codes"]
+            self._source_codes = columns["source_codes"]
+            self._type_codes = columns["type_codes"]
+            self._page_numbers = columns["page_numbers"]
+            self._deleted = columns["deleted"]
+            if "l1_norms" in columns:
+                self._l1_norms = columns["l1_norms"]
+            else:
+                # Saved before norms were stored
+                self._l1_norms = np.full(
+                    len(self._deleted), self._expected_l1_norm(), dtype=np.float32
+                )
+        
+        self.index_type = strings.get("index_type", "flat")
+        self._chunk_ids = strings["chunk_ids"]
+        self._contents = strings["contents"]
+        self._syllabus_tags = strings["syllabus_tags"]
+        self._documents = _StringTable(strings["documents"])
+        self._users = _StringTable(strings["users"])
+        self._sources = _StringTable(strings["sources"])
+        self._chunk_types = _StringTable(strings["chunk_types"])
+        
+        self._chunk_map = {
+            chunk_id: row
+            for row, chunk_id in enumerate(self._chunk_ids)
+            if not self._deleted[row]
+        }
+    
+    def _load_legacy_metadata(self, load_path: Path):
+        """Convert metadata from the older pickled dict format into columns"""
         with open(load_path / "metadata.pkl", "rb") as f:
             data = pickle.load(f)
         
-        self._id_map = data["id_map"]
-        self._chunk_map = data["chunk_map"]
-        self._metadata = {
-            k: EmbeddingMetadata(**v) for k, v in data["metadata"].items()
-        }
-        self._contents = data["contents"]
-        self._next_id = data["next_id"]
+        self.index_type = data.get("index_type", "flat")
+        self._init_columns()
+        self._chunk_map = {}
         
-        logger.info(f"Loaded vector store from {load_path} ({self._index.ntotal} vectors)")
+        contents = []
+        metadata_list = []
+        deleted_rows = []
+        for faiss_id in range(data["next_id"]):
+            chunk_id = data["id_map"].get(faiss_id, "")
+            metadata = data["metadata"].get(chunk_id)
+            if metadata is None or data["chunk_map"].get(chunk_id) != faiss_id:
+                # Deleted or superseded: keep the row so IDs stay aligned
+                deleted_rows.append(faiss_id)
+                metadata = {"chunk_id": chunk_id}
+            contents.append(data["contents"].get(chunk_id, ""))
+            metadata_list.append(EmbeddingMetadata(**metadata))
+        
+        self._append_rows(contents, metadata_list)
+        for row in deleted_rows:
+            self._deleted[row] = True
+            self._contents[row] = ""
+            if self._chunk_map.get(self._chunk_ids[row]) == row:
+                del self._chunk_map[self._chunk_ids[row]]
     
     @property
     def size(self) -> int:
         """Number of vectors in the index"""
-        return self._index.ntotal if self._index else 0
+        return self._index.ntotal if self._index is not None else 0
 
 
 class EmbeddingPipeline:
@@ -394,26 +901,71 @@ class EmbeddingPipeline:
         self,
         model_name: str = "all-MiniLM-L6-v2",
         storage_path: Optional[str] = None,
-        index_type: str = "flat",
+        index_type: str = "auto",  # auto, flat, ivf, hnsw, binary_hnsw
+        persist_interval: float = 30.0,
     ):
         self.embedding_model = EmbeddingModel(model_name)
+        self.auto_index = index_type == "auto"
         self.vector_store = FAISSVectorStore(
             dimension=self.embedding_model.dimension,
-            index_type=index_type,
+            index_type="flat" if self.auto_index else index_type,
             storage_path=storage_path,
         )
         
+        # Serializes writers (background index jobs) to the vector store
+        self._write_lock = asyncio.Lock()
+        
+        # Coalesces saves after indexing into periodic background checkpoints
+        self.persistence = PersistenceCoordinator(self._checkpoint, min_interval=persist_interval)
+        
         # Try to load existing index
         if storage_path:
             try:
                 self.vector_store.load()
             except Exception:
                 logger.info(f"No existing vector store found at {storage_path}, starting fresh.")
+        
+        self._maybe_upgrade_index()
+    
+    def _maybe_upgrade_index(self) -> bool:
+        """
+        With index_type="auto", switch from exact (flat) search to HNSW once
+        the store grows past HNSW_AUTO_THRESHOLD vectors.
+        
+        Returns:
+            True if the index was rebuilt
+        """
+        if (
+            self.auto_index
+            and self.vector_store.index_type == "flat"
+            and self.vector_store.size > HNSW_AUTO_THRESHOLD
+        ):
+            self.vector_store.rebuild("hnsw")
+            return True
+        return False
+    
+    async def rebuild_index(self, index_type: str) -> Dict[str, Any]:
+        """
+        Rebuild the vector index in place as a different type and persist it.
+        
+        Args:
+            index_type: flat, ivf, hnsw or binary_hnsw
+            
+        Returns:
+            Stats of the rebuilt index
+        """
+        async with self._write_lock:
+            await asyncio.to_thread(self.vector_store.rebuild, index_type)
+            # An explicit choice overrides automatic selection
+            self.auto_index = False
+            await asyncio.to_thread(self.vector_store.save)
+        return self.vector_store.stats()
     
     async def index_chunks(
         self,
         chunks: List[Dict[str, Any]],  # List of chunk dicts with content, id, metadata
         user_id: Optional[str] = None,
+        batch_size: int = 64,
     ) -> int:
         """
         Index a list of chunks.
@@ -421,6 +973,7 @@ class EmbeddingPipeline:
         Args:
             chunks: List of chunk dictionaries
             user_id: Owner user ID
+            batch_size: Chunks per embedding batch
             
         Returns:
             Number of chunks indexed
@@ -440,20 +993,33 @@ class EmbeddingPipeline:
                 syllabus_tags=chunk.get("syllabus_tags", []),
                 chunk_type=chunk.get("chunk_type", "paragraph"),
                 source=chunk.get("source", ""),
+                extra={"page_number": chunk["page_number"]} if chunk.get("page_number") is not None else {},
             )
             metadata_list.append(metadata)
         
-        # Generate embeddings
-        embeddings = await self.embedding_model.embed_async(contents)
+        # Generate embeddings (batched, encoded concurrently)
+        embeddings = await self.embedding_model.embed_batched_async(
+            contents, batch_size=batch_size
+        )
         
-        # Store in vector store
-        await self.vector_store.add_async(embeddings, contents, metadata_list)
+        async with self._write_lock:
+            # Store in vector store with a single add
+            await self.vector_store.add_async(embeddings, contents, metadata_list)
+            
+            if self.auto_index:
+                await asyncio.to_thread(self._maybe_upgrade_index)
         
-        # Save to disk
-        self.save()
+        # Saved to disk by the next checkpoint
+        if self.vector_store.storage_path:
+            self.persistence.mark_dirty()
         
         return len(chunks)
     
+    async def embed_query(self, query: str) -> np.ndarray:
+        """Embed a single query string into a normalized vector"""
+        embeddings = await self.embedding_model.embed_async([query])
+        return embeddings[0]
+    
     async def search(
         self,
         query: str,
@@ -461,6 +1027,7 @@ class EmbeddingPipeline:
         user_id: Optional[str] = None,
         document_ids: Optional[List[str]] = None,
         syllabus_tags: Optional[List[str]] = None,
+        query_embedding: Optional[np.ndarray] = None,
     ) -> List[SearchResult]:
         """
         Search for relevant chunks.
@@ -470,16 +1037,18 @@ class EmbeddingPipeline:
             top_k: Number of results
             user_id: Filter by user
             syllabus_tags: Filter by topics
+            query_embedding: Precomputed embedding of the query, if available
             
         Returns:
             List of search results
         """
         # Embed query
-        query_embedding = await self.embedding_model.embed_async([query])
+        if query_embedding is None:
+            query_embedding = await self.embed_query(query)
         
         # Search
         results = await self.vector_store.search_async(
-            query_embedding[0],
+            query_embedding,
             top_k=top_k,
             user_id=user_id,
             document_ids=document_ids,
@@ -492,6 +1061,11 @@ class EmbeddingPipeline:
         """Save the vector store"""
         self.vector_store.save()
     
+    async def _checkpoint(self):
+        """Save the vector store off the event loop, excluding concurrent writers"""
+        async with self._write_lock:
+            await asyncio.to_thread(self.vector_store.save)
+    
     def load(self):
         """Load the vector store"""
         self.vector_store.load()
@@ -503,7 +1077,39 @@ async def create_embedding_pipeline(
     model_name: str = "all-MiniLM-L6-v2",
 ) -> EmbeddingPipeline:
     """Create and initialize an embedding pipeline"""
-    return EmbeddingPipeline(
+    # Loading the model and index is blocking disk I/O; keep it off the event loop
+    return await asyncio.to_thread(
+        EmbeddingPipeline,
         model_name=model_name,
         storage_path=storage_path,
     )
+
+
+# Singleton instance
+_pipeline_instance: Optional[EmbeddingPipeline] = None
+_pipeline_lock = asyncio.Lock()
+
+
+async def get_embedding_pipeline() -> EmbeddingPipeline:
+    """
+    Get or create the shared embedding pipeline singleton.
+    Loading the SentenceTransformer model and FAISS index takes seconds,
+    so it is done once per process (off the event loop) and reused.
+    """
+    global _pipeline_instance
+    if _pipeline_instance is None:
+        async with _pipeline_lock:
+            if _pipeline_instance is None:
+                _pipeline_instance = await asyncio.to_thread(
+                    EmbeddingPipeline,
+                    model_name="all-MiniLM-L6-v2",
+                    storage_path="data/vectors",
+                    persist_interval=settings.RAG_PERSIST_INTERVAL_SECONDS,
+                )
+    return _pipeline_instance
+
+
+async def close_embedding_pipeline() -> None:
+    """Write any pending index changes to disk (called on shutdown)"""
+    if _pipeline_instance is not None:
+        await _pipeline_instance.persistence.close()
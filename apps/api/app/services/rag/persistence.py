@@ -0,0 +1,181 @@
+"""
+Vector Store Persistence
+Coalesce index checkpoints so writes happen off the request path.
+"""
+import asyncio
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import Awaitable, Callable, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Name of the file in a store directory that points at the live generation
+CURRENT_POINTER = "CURRENT"
+GENERATION_PREFIX = "gen-"
+
+
+class PersistenceCoordinator:
+    """
+    Debounced background writer for the vector store.
+    
+    Writers call mark_dirty() instead of saving. The first call after a
+    save starts a timer; when it fires, one save covers every change made
+    in the meantime. flush() saves immediately (e.g. on shutdown).
+    
+    Changes stay marked dirty until a save succeeds, and a save that has
+    started is always allowed to finish: the save runs in a worker thread
+    that cancellation cannot stop, so close() waits for it rather than
+    starting a second save alongside it.
+    """
+    
+    def __init__(
+        self,
+        save: Callable[[], Awaitable[None]],
+        min_interval: float = 30.0,
+    ):
+        self._save = save
+        self.min_interval = min_interval
+        
+        self._dirty = asyncio.Event()
+        self._saving = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+    
+    @property
+    def is_dirty(self) -> bool:
+        """Whether there are changes not yet written to disk"""
+        return self._dirty.is_set()
+    
+    def mark_dirty(self) -> None:
+        """Record that the store changed; a save will follow within min_interval"""
+        self._dirty.set()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+    
+    async def flush(self) -> None:
+        """Write pending changes now"""
+        async with self._saving:
+            if not self._dirty.is_set():
+                return
+            # Cleared before saving so changes made during the save mark
+            # the store dirty again and get their own save
+            self._dirty.clear()
+            try:
+                await self._save()
+            except BaseException:
+                # Keep the changes marked (also if cancelled) so they are retried
+                self._dirty.set()
+                raise
+    
+    async def close(self) -> None:
+        """Stop the background writer after flushing pending changes"""
+        task, self._task = self._task, None
+        if task is not None:
+            # Holding the save lock means no save is in flight, so the
+            # writer is only waiting or sleeping and is safe to cancel
+            async with self._saving:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        await self.flush()
+    
+    async def _run(self) -> None:
+        while True:
+            await self._dirty.wait()
+            await asyncio.sleep(self.min_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                # flush() left the changes marked, so the next cycle retries
+                logger.error(f"Vector store checkpoint failed: {e}")
+
+
+def fsync_file(path: Path) -> None:
+    """Flush a written file's contents to disk"""
+    with open(path, "rb+") as f:
+        os.fsync(f.fileno())
+
+
+def fsync_directory(path: Path) -> None:
+    """
+    Flush a directory's entries (creates, renames) to disk.
+    
+    No-op on platforms that cannot open directories (Windows).
+    """
+    flags = getattr(os, "O_DIRECTORY", None)
+    if flags is None:
+        return
+    fd = os.open(path, os.O_RDONLY | flags)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def replace_atomically(tmp_path: Path, final_path: Path) -> None:
+    """
+    Durably move a fully written temp file over its final path.
+    
+    The temp file is fsynced before the rename and the directory after it,
+    so readers see either the old file or the complete new one, never a
+    partial write, and the rename survives a crash.
+    """
+    fsync_file(tmp_path)
+    os.replace(tmp_path, final_path)
+    fsync_directory(final_path.parent)
+
+
+# ==================== Store generations ====================
+#
+# A store directory holds one subdirectory per saved generation plus a
+# CURRENT file naming the live one. A save writes a complete new
+# generation and then swaps CURRENT with a single atomic rename, so the
+# files a reader loads always come from the same save, even after a
+# crash part-way through writing.
+
+
+def new_generation(root: Path) -> Path:
+    """
+    Create an empty directory for the next generation under root.
+    
+    Names sort by creation time and include the pid, so saves from
+    different processes never share a directory or temp file.
+    """
+    path = root / f"{GENERATION_PREFIX}{time.time_ns():020d}-{os.getpid()}"
+    path.mkdir(parents=True)
+    return path
+
+
+def current_generation(root: Path) -> Optional[Path]:
+    """Directory of the live generation, or None for a store without one"""
+    pointer = root / CURRENT_POINTER
+    if not pointer.exists():
+        return None
+    return root / pointer.read_text(encoding="utf-8").strip()
+
+
+def commit_generation(root: Path, generation: Path) -> None:
+    """
+    Make a fully written generation the live one.
+    
+    The generation's files and directory must already be fsynced. Older
+    generations, including any left behind by failed saves, are removed,
+    except the one just replaced: a reader that resolved CURRENT a moment
+    ago may still be loading it.
+    """
+    previous = current_generation(root)
+    
+    tmp_path = root / f"{CURRENT_POINTER}.{os.getpid()}.tmp"
+    tmp_path.write_text(generation.name, encoding="utf-8")
+    replace_atomically(tmp_path, root / CURRENT_POINTER)
+    
+    keep = {generation.name}
+    if previous is not None:
+        keep.add(previous.name)
+    for path in root.glob(f"{GENERATION_PREFIX}*"):
+        if path.name < generation.name and path.name not in keep:
+            shutil.rmtree(path, ignore_errors=True)
@@ -4,12 +4,14 @@ Combines retrieval with LLM generation for grounded answers with citations.
 """
 import asyncio
 from dataclasses import dataclass, field
-from typing import List, Optional, Dict, Any, Callable
+from typing import List, Optional, Dict, Any, Callable, AsyncIterator, Tuple
 from enum import Enum
 import logging
 import json
 import re
 
+import numpy as np
+
 from app.services.rag.embeddings import EmbeddingPipeline, SearchResult
 from app.core.config import settings
 
@@ -133,8 +135,32 @@ Cite sources using [1], [2] format.
 ## Analysis:"""
 
 
+NO_CONTEXT_ANSWER = "I couldn't find relevant information in the study materials to answer this question. Please try rephrasing or ensure relevant content has been uploaded."
+
+
 # ==================== LLM Clients ====================
 
+# One HTTP client (and connection pool) for all LLM calls in the process
+_http_client = None
+
+
+def get_http_client():
+    """Get the shared httpx client used by the HTTP-based LLM clients"""
+    global _http_client
+    if _http_client is None:
+        import httpx
+        _http_client = httpx.AsyncClient(timeout=120.0)
+    return _http_client
+
+
+async def close_http_client() -> None:
+    """Close the shared LLM HTTP client (called on shutdown)"""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+
 class BaseLLMClient:
     """Base class for LLM clients"""
     
@@ -146,6 +172,24 @@ class BaseLLMClient:
         temperature: float = 0.7,
     ) -> str:
         raise NotImplementedError
+    
+    async def generate_stream(
+        self,
+        prompt: str,
+        system_prompt: str = SYSTEM_PROMPT,
+        max_tokens: int = 1024,
+        temperature: float = 0.7,
+    ) -> AsyncIterator[str]:
+        """
+        Stream the completion as text fragments.
+        Clients without native streaming yield the full completion once.
+        """
+        yield await self.generate(
+            prompt=prompt,
+            system_prompt=system_prompt,
+            max_tokens=max_tokens,
+            temperature=temperature,
+        )
 
 
 class OllamaClient(BaseLLMClient):
@@ -167,33 +211,65 @@ class OllamaClient(BaseLLMClient):
         temperature: float = 0.7,
     ) -> str:
         try:
-            import httpx
-            
-            async with httpx.AsyncClient(timeout=120.0) as client:
-                response = await client.post(
-                    f"{self.base_url}/api/generate",
-                    json={
-                        "model": self.model,
-                        "prompt": prompt,
-                        "system": system_prompt,
-                        "stream": False,
-                        "options": {
-                            "num_predict": max_tokens,
-                            "temperature": temperature,
-                        }
+            response = await get_http_client().post(
+                f"{self.base_url}/api/generate",
+                json={
+                    "model": self.model,
+                    "prompt": prompt,
+                    "system": system_prompt,
+                    "stream": False,
+                    "options": {
+                        "num_predict": max_tokens,
+                        "temperature": temperature,
                     }
-                )
+                }
+            )
+            
+            if response.status_code == 200:
+                data = response.json()
+                return data.get("response", "")
+            else:
+                logger.error(f"Ollama error: {response.status_code}")
+                return ""
                 
-                if response.status_code == 200:
-                    data = response.json()
-                    return data.get("response", "")
-                else:
-                    logger.error(f"Ollama error: {response.status_code}")
-                    return ""
-                    
         except Exception as e:
             logger.error(f"Ollama generation failed: {e}")
             raise
+    
+    async def generate_stream(
+        self,
+        prompt: str,
+        system_prompt: str = SYSTEM_PROMPT,
+        max_tokens: int = 1024,
+        temperature: float = 0.7,
+    ) -> AsyncIterator[str]:
+        """Stream tokens from Ollama's newline-delimited JSON responses"""
+        async with get_http_client().stream(
+            "POST",
+            f"{self.base_url}/api/generate",
+            json={
+                "model": self.model,
+                "prompt": prompt,
+                "system": system_prompt,
+                "stream": True,
+                "options": {
+                    "num_predict": max_tokens,
+                    "temperature": temperature,
+                }
+            },
+        ) as response:
+            if response.status_code != 200:
+                logger.error(f"Ollama error: {response.status_code}")
+                return
+            
+            async for line in response.aiter_lines():
+                if not line:
+                    continue
+                data = json.loads(line)
+                if data.get("response"):
+                    yield data["response"]
+                if data.get("done"):
+                    break
 
 
 class HuggingFaceClient(BaseLLMClient):
@@ -216,37 +292,34 @@ class HuggingFaceClient(BaseLLMClient):
         temperature: float = 0.7,
     ) -> str:
         try:
-            import httpx
-            
             headers = {}
             if self.api_key:
                 headers["Authorization"] = f"Bearer {self.api_key}"
             
             full_prompt = f"{system_prompt}\n\n{prompt}"
             
-            async with httpx.AsyncClient(timeout=120.0) as client:
-                response = await client.post(
-                    f"{self.base_url}/{self.model}",
-                    headers=headers,
-                    json={
-                        "inputs": full_prompt,
-                        "parameters": {
-                            "max_new_tokens": max_tokens,
-                            "temperature": temperature,
-                            "return_full_text": False,
-                        }
+            response = await get_http_client().post(
+                f"{self.base_url}/{self.model}",
+                headers=headers,
+                json={
+                    "inputs": full_prompt,
+                    "parameters": {
+                        "max_new_tokens": max_tokens,
+                        "temperature": temperature,
+                        "return_full_text": False,
                     }
-                )
+                }
+            )
+            
+            if response.status_code == 200:
+                data = response.json()
+                if isinstance(data, list) and len(data) > 0:
+                    return data[0].get("generated_text", "")
+                return ""
+            else:
+                logger.error(f"HuggingFace error: {response.status_code}")
+                return ""
                 
-                if response.status_code == 200:
-                    data = response.json()
-                    if isinstance(data, list) and len(data) > 0:
-                        return data[0].get("generated_text", "")
-                    return ""
-                else:
-                    logger.error(f"HuggingFace error: {response.status_code}")
-                    return ""
-                    
         except Exception as e:
             logger.error(f"HuggingFace generation failed: {e}")
             raise
@@ -319,6 +392,7 @@ class RAGPipeline:
         prompt_template: str = RAG_PROMPT_TEMPLATE,
         max_tokens: int = 1024,
         temperature: float = 0.7,
+        query_embedding: Optional[np.ndarray] = None,
     ) -> RAGResponse:
         """
         Execute RAG query.
@@ -331,34 +405,23 @@ class RAGPipeline:
             prompt_template: Template for prompt construction
             max_tokens: Max tokens for generation
             temperature: LLM temperature
+            query_embedding: Precomputed question embedding, skips re-embedding
             
         Returns:
             RAGResponse with answer and citations
         """
         # Step 1: Retrieve relevant chunks
-        search_results = await self.embedding_pipeline.search(
-            query=question,
-            top_k=self.top_k * 2,  # Fetch more candidate chunks
+        relevant_results = await self._retrieve(
+            question=question,
             user_id=user_id,
             document_ids=document_ids,
             syllabus_tags=syllabus_tags,
+            query_embedding=query_embedding,
         )
         
-        # Filter by minimum relevance
-        print(f"DEBUG: Search Query: {question}")
-        print(f"DEBUG: Raw Results Count: {len(search_results)}")
-        for i, res in enumerate(search_results):
-            print(f"DEBUG: Result {i}: Score={res.score}, Source={res.metadata.source}")
-
-        relevant_results = [
-            r for r in search_results 
-            if r.score >= self.min_relevance_score
-        ]
-        print(f"DEBUG: Relevant Results after filter ({self.min_relevance_score}): {len(relevant_results)}")
-        
         if not relevant_results:
             return RAGResponse(
-                answer="I couldn't find relevant information in the study materials to answer this question. Please try rephrasing or ensure relevant content has been uploaded.",
+                answer=NO_CONTEXT_ANSWER,
                 citations=[],
                 query=question,
                 context_chunks=0,
@@ -383,7 +446,100 @@ class RAGPipeline:
         )
         
         # Step 5: Create citations
-        citations = [
+        citations = self._build_citations(relevant_results)
+        
+        return RAGResponse(
+            answer=answer,
+            citations=citations,
+            query=question,
+            context_chunks=len(relevant_results),
+            model=getattr(self.llm_client, 'model', 'unknown'),
+            confidence=self._confidence(relevant_results),
+        )
+    
+    async def astream(
+        self,
+        question: str,
+        user_id: Optional[str] = None,
+        document_ids: Optional[List[str]] = None,
+        syllabus_tags: Optional[List[str]] = None,
+        prompt_template: str = RAG_PROMPT_TEMPLATE,
+        max_tokens: int = 1024,
+        temperature: float = 0.7,
+        query_embedding: Optional[np.ndarray] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Execute RAG query, streaming the answer as it is generated.
+        
+        Yields events:
+        - {"type": "citation", ...} for each source, right after retrieval
+        - {"type": "token", "text": ...} as the LLM produces text
+        - {"type": "done", "confidence": ..., "model": ..., "context_chunks": ...}
+        """
+        relevant_results = await self._retrieve(
+            question=question,
+            user_id=user_id,
+            document_ids=document_ids,
+            syllabus_tags=syllabus_tags,
+            query_embedding=query_embedding,
+        )
+        
+        if not relevant_results:
+            async for event in self._stream_events([], None, NO_CONTEXT_ANSWER):
+                yield event
+            return
+        
+        prompt = prompt_template.format(
+            context=self._build_context(relevant_results),
+            question=question,
+        )
+        
+        async for event in self._stream_events(
+            relevant_results,
+            self.llm_client.generate_stream(
+                prompt=prompt,
+                max_tokens=max_tokens,
+                temperature=temperature,
+            ),
+        ):
+            yield event
+    
+    async def _retrieve(
+        self,
+        question: str,
+        user_id: Optional[str] = None,
+        document_ids: Optional[List[str]] = None,
+        syllabus_tags: Optional[List[str]] = None,
+        query_embedding: Optional[np.ndarray] = None,
+    ) -> List[SearchResult]:
+        """Retrieve candidate chunks and keep those above the relevance threshold"""
+        search_results = await self.embedding_pipeline.search(
+            query=question,
+            top_k=self.top_k * 2,  # Fetch more candidate chunks
+            user_id=user_id,
+            document_ids=document_ids,
+            syllabus_tags=syllabus_tags,
+            query_embedding=query_embedding,
+        )
+        
+        # Filter by minimum relevance
+        relevant_results = [
+            r for r in search_results 
+            if r.score >= self.min_relevance_score
+        ]
+        if logger.isEnabledFor(logging.DEBUG):
+            # Scores only; the question itself is user content
+            logger.debug(
+                f"Retrieved {len(search_results)} candidates, "
+                f"{len(relevant_results)} above {self.min_relevance_score}: "
+                f"scores={[round(r.score, 3) for r in search_results]}"
+            )
+        
+        return relevant_results
+    
+    def _build_citations(self, results: List[SearchResult]) -> List[Citation]:
+        """Create citations for retrieved chunks"""
+        return [
             Citation(
                 chunk_id=r.chunk_id,
                 source=r.metadata.source or f"Document {r.metadata.document_id[:8]}..." if r.metadata.document_id else "Unknown",
@@ -391,32 +547,61 @@ class RAGPipeline:
                 relevance_score=r.score,
                 page_number=r.metadata.extra.get("page_number"),
             )
-            for r in relevant_results
+            for r in results
         ]
+    
+    @staticmethod
+    def _confidence(results: List[SearchResult]) -> float:
+        """Calculate confidence based on retrieval scores"""
+        if not results:
+            return 0.0
+        avg_score = sum(r.score for r in results) / len(results)
+        return min(avg_score, 1.0)
+    
+    async def _stream_events(
+        self,
+        results: List[SearchResult],
+        tokens: Optional[AsyncIterator[str]],
+        fallback_answer: str = "",
+        citations: Optional[List[Citation]] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Turn retrieval results and an LLM token stream into stream events"""
+        for c in citations if citations is not None else self._build_citations(results):
+            yield {
+                "type": "citation",
+                "chunk_id": c.chunk_id,
+                "source": c.source,
+                "snippet": c.content_snippet[:200] + "..." if len(c.content_snippet) > 200 else c.content_snippet,
+                "relevance_score": c.relevance_score,
+                "page_number": c.page_number,
+            }
         
-        # Calculate confidence based on retrieval scores
-        avg_score = sum(r.score for r in relevant_results) / len(relevant_results)
+        if tokens is None:
+            yield {"type": "token", "text": fallback_answer}
+        else:
+            async for text in tokens:
+                yield {"type": "token", "text": text}
         
-        return RAGResponse(
-            answer=answer,
-            citations=citations,
-            query=question,
-            context_chunks=len(relevant_results),
-            model=getattr(self.llm_client, 'model', 'unknown'),
-            confidence=min(avg_score, 1.0),
-        )
+        yield {
+            "type": "done",
+            "confidence": self._confidence(results),
+            "model": getattr(self.llm_client, 'model', 'unknown'),
+            "context_chunks": len(results),
+        }
     
     async def analytical_query(
         self,
         topic: str,
         user_id: Optional[str] = None,
         syllabus_tags: Optional[List[str]] = None,
+        query_embedding: Optional[np.ndarray] = None,
     ) -> RAGResponse:
         """Generate analytical response for UPSC-style questions"""
         return await self.query(
             question=topic,
             user_id=user_id,
             syllabus_tags=syllabus_tags,
+            query_embedding=query_embedding,
             prompt_template=ANALYTICAL_PROMPT_TEMPLATE,
             max_tokens=2048,
             temperature=0.5,
@@ -429,6 +614,41 @@ class RAGPipeline:
         user_id: Optional[str] = None,
     ) -> RAGResponse:
         """Conversational RAG for multi-turn interactions"""
+        prompt, relevant_results = await self._prepare_conversation(question, history, user_id)
+        
+        answer = await self.llm_client.generate(prompt=prompt)
+        
+        return RAGResponse(
+            answer=answer,
+            citations=self._conversation_citations(relevant_results),
+            query=question,
+            context_chunks=len(relevant_results),
+            model=getattr(self.llm_client, 'model', 'unknown'),
+        )
+    
+    async def astream_conversational(
+        self,
+        question: str,
+        history: List[Dict[str, str]],
+        user_id: Optional[str] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Conversational RAG, streaming events like astream()"""
+        prompt, relevant_results = await self._prepare_conversation(question, history, user_id)
+        
+        async for event in self._stream_events(
+            relevant_results,
+            self.llm_client.generate_stream(prompt=prompt),
+            citations=self._conversation_citations(relevant_results),
+        ):
+            yield event
+    
+    async def _prepare_conversation(
+        self,
+        question: str,
+        history: List[Dict[str, str]],
+        user_id: Optional[str] = None,
+    ) -> Tuple[str, List[SearchResult]]:
+        """Retrieve context for a conversational turn and build its prompt"""
         # Format history
         history_text = "\n".join([
             f"{'Student' if m['role'] == 'user' else 'Tutor'}: {m['content']}"
@@ -455,25 +675,20 @@ class RAGPipeline:
             question=question,
         )
         
-        answer = await self.llm_client.generate(prompt=prompt)
-        
-        citations = [
+        return prompt, relevant_results
+    
+    @staticmethod
+    def _conversation_citations(results: List[SearchResult]) -> List[Citation]:
+        """Citations for a conversational turn (top 3 only)"""
+        return [
             Citation(
                 chunk_id=r.chunk_id,
                 source=r.metadata.source or "Study Material",
                 content_snippet=r.content[:200],
                 relevance_score=r.score,
             )
-            for r in relevant_results[:3]  # Top 3 for conversation
+            for r in results[:3]  # Top 3 for conversation
         ]
-        
-        return RAGResponse(
-            answer=answer,
-            citations=citations,
-            query=question,
-            context_chunks=len(relevant_results),
-            model=getattr(self.llm_client, 'model', 'unknown'),
-        )
     
     def _build_context(self, results: List[SearchResult]) -> str:
         """Build context string with source numbers"""
@@ -546,8 +761,9 @@ async def create_complete_rag_system(
     """
     from app.services.rag.embeddings import EmbeddingPipeline
     
-    # Create embedding pipeline
-    embedding_pipeline = EmbeddingPipeline(
+    # Create embedding pipeline (blocking model/index load, so off the event loop)
+    embedding_pipeline = await asyncio.to_thread(
+        EmbeddingPipeline,
         model_name=embedding_model,
         storage_path=storage_path,
     )
@@ -0,0 +1,164 @@
+"""
+Semantic Query Cache for RAG
+Serve repeated and near-duplicate questions without retrieval or LLM calls.
+"""
+import asyncio
+import hashlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, List, Optional
+import logging
+
+import numpy as np
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _CacheEntry:
+    """A cached response and the embedding slot it occupies"""
+    scope: str
+    slot: int
+    response: Any
+
+
+class QueryCache:
+    """
+    Two-level cache in front of the RAG pipeline.
+
+    Lookups:
+    1. Exact hit on sha256(scope + normalized question)
+    2. Semantic hit: cosine similarity of the question embedding against
+       cached questions in the same scope, above a threshold
+
+    The scope string captures everything besides the question that changes
+    the answer (user, document/topic filters, query type, ...), so answers
+    never leak across users or filters.
+
+    Embeddings are normalized, so cosine similarity is a single matrix-vector
+    product over at most `max_entries` rows. Eviction is LRU.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        similarity_threshold: float = 0.95,
+    ):
+        self.max_entries = max_entries
+        self.similarity_threshold = similarity_threshold
+
+        self._entries: "OrderedDict[str, _CacheEntry]" = OrderedDict()
+        self._vectors: Optional[np.ndarray] = None  # (max_entries, dim)
+        self._slot_keys: List[Optional[str]] = [None] * max_entries
+        self._slot_scopes = np.full(max_entries, None, dtype=object)
+        self._free_slots = list(range(max_entries - 1, -1, -1))
+        self._lock = asyncio.Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(question: str, scope: str) -> str:
+        """Deterministic key for exact-match lookups"""
+        normalized = " ".join(question.lower().split())
+        return hashlib.sha256(f"{scope}|{normalized}".encode()).hexdigest()
+
+    def get(
+        self,
+        key: str,
+        scope: str,
+        embedding: Optional[np.ndarray] = None,
+    ) -> Optional[Any]:
+        """
+        Look up a cached response.
+
+        Args:
+            key: Exact-match key from make_key()
+            scope: Scope the question was asked in
+            embedding: Normalized question embedding for semantic lookup
+
+        Returns:
+            Cached response or None
+        """
+        entry = self._entries.get(key)
+
+        if entry is None and embedding is not None and self._vectors is not None:
+            scores = self._vectors @ embedding.astype(np.float32)
+            scores[self._slot_scopes != scope] = -1.0
+            best = int(np.argmax(scores))
+            if scores[best] >= self.similarity_threshold:
+                key = self._slot_keys[best]
+                entry = self._entries.get(key)
+
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry.response
+
+    async def put(
+        self,
+        key: str,
+        scope: str,
+        embedding: np.ndarray,
+        response: Any,
+    ) -> None:
+        """Store a response, evicting the least recently used entry if full"""
+        async with self._lock:
+            if key in self._entries:
+                self._entries[key].response = response
+                self._entries.move_to_end(key)
+                return
+
+            if self._vectors is None:
+                self._vectors = np.zeros(
+                    (self.max_entries, embedding.shape[-1]), dtype=np.float32
+                )
+
+            if not self._free_slots:
+                _, evicted = self._entries.popitem(last=False)
+                self._release_slot(evicted.slot)
+
+            slot = self._free_slots.pop()
+            self._vectors[slot] = embedding
+            self._slot_keys[slot] = key
+            self._slot_scopes[slot] = scope
+            self._entries[key] = _CacheEntry(scope=scope, slot=slot, response=response)
+
+    async def clear(self) -> None:
+        """Drop all cached responses (e.g. after new material is indexed)"""
+        async with self._lock:
+            for entry in self._entries.values():
+                self._release_slot(entry.slot)
+            self._entries.clear()
+
+    def _release_slot(self, slot: int) -> None:
+        if self._vectors is not None:
+            self._vectors[slot] = 0.0
+        self._slot_keys[slot] = None
+        self._slot_scopes[slot] = None
+        self._free_slots.append(slot)
+
+    @property
+    def size(self) -> int:
+        """Number of cached responses"""
+        return len(self._entries)
+
+
+# Singleton instance
+_query_cache_instance: Optional[QueryCache] = None
+
+
+def get_query_cache() -> QueryCache:
+    """Get or create the RAG query cache singleton"""
+    global _query_cache_instance
+    if _query_cache_instance is None:
+        _query_cache_instance = QueryCache(
+            max_entries=settings.RAG_CACHE_MAX_ENTRIES,
+            similarity_threshold=settings.RAG_CACHE_SIMILARITY_THRESHOLD,
+        )
+    return _query_cache_instance
@@ -11,6 +11,7 @@ from sqlalchemy.orm import selectinload
 import logging
 import random
 
+from app.core.database import dialect_insert
 from app.models.roadmap import (
     UserStudyPlan, StudyPhase, DailyStudyTask, WeeklyPlan,
     PreparationLevel, StudyPreference, TaskStatus, TaskType
@@ -82,6 +83,67 @@ class RoadmapService:
         
         return study_plan
     
+    async def upsert_study_plan(
+        self,
+        user_id: str,
+        target_exam_year: int,
+        preparation_level: str = "beginner",
+        study_preference: str = "moderate",
+        daily_study_hours: float = 6.0,
+        optional_subject: Optional[str] = None,
+        is_working: bool = False,
+        preferred_study_time: str = "morning",
+        medium: str = "english"
+    ) -> UserStudyPlan:
+        """
+        Create the user's study plan, or update its onboarding settings
+        if one exists, in a single INSERT ... ON CONFLICT (user_id) statement.
+        
+        Phases and the first week's tasks are only seeded for a new plan.
+        """
+        today = date.today()
+        plan_id = str(uuid.uuid4())
+        
+        settings_fields = {
+            "target_exam_year": target_exam_year,
+            "preparation_level": preparation_level,
+            "study_preference": study_preference,
+            "daily_study_hours": daily_study_hours,
+            "optional_subject": optional_subject,
+            "is_working": is_working,
+            "preferred_study_time": preferred_study_time,
+            "medium": medium,
+            "onboarding_completed": True,
+        }
+        
+        stmt = (
+            dialect_insert(self.db)(UserStudyPlan)
+            .values(
+                id=plan_id,
+                user_id=user_id,
+                plan_start_date=today,
+                # Estimate prelims/mains dates (usually June / September of target year)
+                target_prelims_date=date(target_exam_year, 6, 1),
+                target_mains_date=date(target_exam_year, 9, 15),
+                **settings_fields,
+            )
+            .on_conflict_do_update(
+                index_elements=[UserStudyPlan.user_id],
+                set_={**settings_fields, "updated_at": datetime.now(timezone.utc)},
+            )
+            .returning(UserStudyPlan)
+        )
+        result = await self.db.execute(stmt, execution_options={"populate_existing": True})
+        study_plan = result.scalar_one()
+        
+        # The generated id only survives if the row was inserted
+        if study_plan.id == plan_id:
+            await self._create_study_phases(study_plan)
+            await self.generate_weekly_tasks(user_id, study_plan.id)
+            await self.db.flush()
+        
+        return study_plan
+    
     async def _create_study_phases(self, study_plan: UserStudyPlan):
         """Create study phases based on available time until exam"""
         
@@ -187,10 +249,22 @@ class RoadmapService:
             # Set first phase as current
             if config["order"] == 1:
                 await self.db.flush()
-                study_plan.current_phase_id = phase.id
+                self._set_current_phase(study_plan, phase, 1)
             
             current_date = end_date
     
+    def _set_current_phase(
+        self,
+        study_plan: UserStudyPlan,
+        phase: StudyPhase,
+        phase_index: int,
+    ):
+        """Point the plan at a phase and refresh its denormalized summary"""
+        study_plan.current_phase_id = phase.id
+        study_plan.current_phase_name = phase.name
+        study_plan.current_phase_index = phase_index
+        study_plan.phase_progress = phase.progress_percentage or 0.0
+    
     # ==================== Daily Task Generation ====================
     
     async def generate_daily_tasks(
@@ -559,11 +633,32 @@ class RoadmapService:
                 task.is_revision
             )
         
+        # Keep the plan's phase summary current in the same commit
+        await self._refresh_phase_summary(task)
+        
         await self.db.commit()
         await self.db.refresh(task)
         
         return task
     
+    async def _refresh_phase_summary(self, task: DailyStudyTask):
+        """Copy the current phase's name and progress onto the task's plan"""
+        
+        result = await self.db.execute(
+            select(UserStudyPlan)
+            .options(selectinload(UserStudyPlan.current_phase))
+            .where(UserStudyPlan.id == task.study_plan_id)
+        )
+        study_plan = result.scalar_one_or_none()
+        
+        if not study_plan or not study_plan.current_phase:
+            return
+        
+        phase = study_plan.current_phase
+        self._set_current_phase(
+            study_plan, phase, study_plan.current_phase_index or phase.order
+        )
+    
     async def _update_topic_progress(
         self,
         user_id: str,
@@ -612,10 +707,7 @@ class RoadmapService:
         # Get study plan
         result = await self.db.execute(
             select(UserStudyPlan)
-            .options(
-                selectinload(UserStudyPlan.current_phase),
-                selectinload(UserStudyPlan.phases)
-            )
+            .options(selectinload(UserStudyPlan.phases))
             .where(UserStudyPlan.user_id == user_id)
             .where(UserStudyPlan.is_active == True)
         )
@@ -672,21 +764,16 @@ class RoadmapService:
         # Get streak (simplified)
         streak = await self._calculate_streak(user_id)
         
-        # Determine current phase info
-        current_phase = study_plan.current_phase
+        # Current phase info comes from the plan's denormalized summary
         phases = sorted(study_plan.phases, key=lambda p: p.order)
-        current_phase_index = next(
-            (i for i, p in enumerate(phases) if p.id == current_phase.id),
-            0
-        ) if current_phase else 0
         
         return {
             "has_plan": True,
             "overall_progress": study_plan.overall_progress,
-            "current_phase": current_phase_index + 1,
+            "current_phase": study_plan.current_phase_index or 1,
             "total_phases": len(phases),
-            "phase_name": current_phase.name if current_phase else "Getting Started",
-            "phase_progress": current_phase.progress_percentage if current_phase else 0,
+            "phase_name": study_plan.current_phase_name or "Getting Started",
+            "phase_progress": study_plan.phase_progress or 0,
             "today_tasks": [self._task_to_dict(t) for t in today_tasks],
             "upcoming_tasks": [self._task_to_dict(t) for t in upcoming_tasks],
             "revision_due": [self._task_to_dict(t) for t in revision_due],
@@ -760,28 +847,78 @@ class RoadmapService:
         if target_date is None:
             target_date = date.today()
         
+        stats = await self.get_stats_for_range(user_id, target_date, target_date)
+        return stats[target_date]
+    
+    async def get_stats_for_range(
+        self,
+        user_id: str,
+        start: date,
+        end: date,
+    ) -> Dict[date, Dict]:
+        """
+        Get daily study statistics for every day in [start, end].
+        
+        Aggregates in a single GROUP BY query instead of one query per day.
+        
+        Args:
+            user_id: User ID
+            start: First day (inclusive)
+            end: Last day (inclusive)
+            
+        Returns:
+            Dict of day -> stats, in the same shape as get_daily_stats()
+        """
         result = await self.db.execute(
-            select(DailyStudyTask)
+            select(
+                DailyStudyTask.scheduled_date,
+                DailyStudyTask.task_type,
+                DailyStudyTask.status,
+                func.count(DailyStudyTask.id),
+                func.sum(func.coalesce(
+                    func.nullif(DailyStudyTask.actual_minutes, 0),
+                    DailyStudyTask.estimated_minutes,
+                    0,
+                )),
+            )
             .where(DailyStudyTask.user_id == user_id)
-            .where(DailyStudyTask.scheduled_date == target_date)
+            .where(DailyStudyTask.scheduled_date.between(start, end))
+            .group_by(
+                DailyStudyTask.scheduled_date,
+                DailyStudyTask.task_type,
+                DailyStudyTask.status,
+            )
         )
-        tasks = list(result.scalars().all())
         
-        completed = [t for t in tasks if t.status == TaskStatus.COMPLETED.value]
-        total_minutes = sum(t.actual_minutes or t.estimated_minutes for t in completed)
-        
-        return {
-            "date": target_date.isoformat(),
-            "tasks_total": len(tasks),
-            "tasks_completed": len(completed),
-            "completion_rate": len(completed) / len(tasks) * 100 if tasks else 0,
-            "study_minutes": total_minutes,
-            "study_hours": round(total_minutes / 60, 1),
-            "by_type": {
-                task_type: len([t for t in completed if t.task_type == task_type])
-                for task_type in [
-                    TaskType.STUDY.value, TaskType.QUIZ.value, 
-                    TaskType.REVISION.value, TaskType.CURRENT_AFFAIRS.value
-                ]
+        tracked_types = [
+            TaskType.STUDY.value, TaskType.QUIZ.value, 
+            TaskType.REVISION.value, TaskType.CURRENT_AFFAIRS.value
+        ]
+        totals: Dict[date, Dict[str, Any]] = {}
+        for day, task_type, task_status, count, minutes in result.all():
+            day_totals = totals.setdefault(day, {"total": 0, "completed": 0, "minutes": 0, "by_type": {}})
+            day_totals["total"] += count
+            if task_status == TaskStatus.COMPLETED.value:
+                day_totals["completed"] += count
+                day_totals["minutes"] += minutes or 0
+                day_totals["by_type"][task_type] = day_totals["by_type"].get(task_type, 0) + count
+        
+        stats = {}
+        for offset in range((end - start).days + 1):
+            day = start + timedelta(days=offset)
+            day_totals = totals.get(day, {"total": 0, "completed": 0, "minutes": 0, "by_type": {}})
+            total_minutes = day_totals["minutes"]
+            stats[day] = {
+                "date": day.isoformat(),
+                "tasks_total": day_totals["total"],
+                "tasks_completed": day_totals["completed"],
+                "completion_rate": day_totals["completed"] / day_totals["total"] * 100 if day_totals["total"] else 0,
+                "study_minutes": total_minutes,
+                "study_hours": round(total_minutes / 60, 1),
+                "by_type": {
+                    task_type: day_totals["by_type"].get(task_type, 0)
+                    for task_type in tracked_types
+                }
             }
-        }
+        
+        return stats
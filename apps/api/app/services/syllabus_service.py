@@ -2,10 +2,12 @@
 Syllabus Service
 Business logic for syllabus management
 """
+from collections import defaultdict
 from typing import Optional, List
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from sqlalchemy.orm import selectinload
+from sqlalchemy import insert, select, update
+from sqlalchemy.orm import raiseload, selectinload
+from sqlalchemy.orm.attributes import set_committed_value
 
 from app.models.syllabus import ExamType, ExamStage, Paper, Subject, Topic
 from app.schemas.syllabus import (
@@ -23,6 +25,28 @@ class SyllabusService:
     def __init__(self, db: AsyncSession):
         self.db = db
     
+    async def _update_returning(self, model, row_id: str, values: dict):
+        """
+        Apply a partial update and return the updated row.
+        
+        A single UPDATE ... RETURNING replaces the fetch / flush / refresh
+        round trips, and doubles as the existence check.
+        
+        Returns:
+            Updated instance, or None if no row has that ID
+        """
+        if not values:
+            return await self.db.get(model, row_id)
+        
+        result = await self.db.execute(
+            update(model)
+            .where(model.id == row_id)
+            .values(**values)
+            .returning(model),
+            execution_options={"populate_existing": True},
+        )
+        return result.scalar_one_or_none()
+    
     # ==================== ExamType ====================
     
     async def list_exam_types(self, include_stages: bool = False) -> List[ExamType]:
@@ -37,10 +61,13 @@ class SyllabusService:
         return list(result.scalars().all())
     
     async def get_exam_type(self, exam_type_id: str) -> Optional[ExamType]:
-        """Get exam type by ID"""
+        """Get exam type by ID with its stages (other relationships raise if touched)"""
         result = await self.db.execute(
             select(ExamType)
-            .options(selectinload(ExamType.exam_stages))
+            .options(
+                selectinload(ExamType.exam_stages).raiseload("*"),
+                raiseload("*"),
+            )
             .where(ExamType.id == exam_type_id)
         )
         return result.scalar_one_or_none()
@@ -70,17 +97,9 @@ class SyllabusService:
         self, exam_type_id: str, data: ExamTypeUpdate
     ) -> Optional[ExamType]:
         """Update exam type"""
-        exam_type = await self.get_exam_type(exam_type_id)
-        if not exam_type:
-            return None
-        
-        update_data = data.model_dump(exclude_unset=True)
-        for field, value in update_data.items():
-            setattr(exam_type, field, value)
-        
-        await self.db.flush()
-        await self.db.refresh(exam_type)
-        return exam_type
+        return await self._update_returning(
+            ExamType, exam_type_id, data.model_dump(exclude_unset=True)
+        )
     
     # ==================== ExamStage ====================
     
@@ -122,17 +141,9 @@ class SyllabusService:
         self, stage_id: str, data: ExamStageUpdate
     ) -> Optional[ExamStage]:
         """Update stage"""
-        stage = await self.get_stage(stage_id)
-        if not stage:
-            return None
-        
-        update_data = data.model_dump(exclude_unset=True)
-        for field, value in update_data.items():
-            setattr(stage, field, value)
-        
-        await self.db.flush()
-        await self.db.refresh(stage)
-        return stage
+        return await self._update_returning(
+            ExamStage, stage_id, data.model_dump(exclude_unset=True)
+        )
     
     # ==================== Paper ====================
     
@@ -177,17 +188,9 @@ class SyllabusService:
         self, paper_id: str, data: PaperUpdate
     ) -> Optional[Paper]:
         """Update paper"""
-        paper = await self.get_paper(paper_id)
-        if not paper:
-            return None
-        
-        update_data = data.model_dump(exclude_unset=True)
-        for field, value in update_data.items():
-            setattr(paper, field, value)
-        
-        await self.db.flush()
-        await self.db.refresh(paper)
-        return paper
+        return await self._update_returning(
+            Paper, paper_id, data.model_dump(exclude_unset=True)
+        )
     
     # ==================== Subject ====================
     
@@ -230,17 +233,9 @@ class SyllabusService:
         self, subject_id: str, data: SubjectUpdate
     ) -> Optional[Subject]:
         """Update subject"""
-        subject = await self.get_subject(subject_id)
-        if not subject:
-            return None
-        
-        update_data = data.model_dump(exclude_unset=True)
-        for field, value in update_data.items():
-            setattr(subject, field, value)
-        
-        await self.db.flush()
-        await self.db.refresh(subject)
-        return subject
+        return await self._update_returning(
+            Subject, subject_id, data.model_dump(exclude_unset=True)
+        )
     
     # ==================== Topic ====================
     
@@ -266,17 +261,64 @@ class SyllabusService:
         return list(result.scalars().all())
     
     async def get_topic(self, topic_id: str) -> Optional[Topic]:
-        """Get topic by ID with children"""
+        """
+        Get topic by ID with its active children.
+        
+        Any other relationship access raises instead of silently issuing
+        a lazy load, so a schema that starts reading one fails loudly.
+        """
         result = await self.db.execute(
             select(Topic)
             .options(
-                selectinload(Topic.children),
-                selectinload(Topic.parent)
+                selectinload(Topic.children.and_(Topic.is_active == True)).raiseload("*"),
+                raiseload("*"),
             )
             .where(Topic.id == topic_id)
         )
         return result.scalar_one_or_none()
     
+    async def get_topic_with_descendants(self, topic_id: str) -> Optional[Topic]:
+        """
+        Get topic by ID with its whole subtree loaded.
+        
+        Children are fetched one level at a time with a single
+        `parent_id IN (...)` query per level, so the cost is one round trip
+        per tree level rather than one per node, and serializing nested
+        children never triggers a lazy load. Inactive topics are skipped,
+        and a topic already in the tree is never added again, so a
+        corrupted parent chain cannot loop forever.
+        """
+        topic = await self.get_topic(topic_id)
+        if not topic:
+            return None
+        
+        visited = {topic.id}
+        frontier = [t for t in topic.children if t.id not in visited]
+        set_committed_value(topic, "children", frontier)
+        visited.update(t.id for t in frontier)
+        while frontier:
+            result = await self.db.execute(
+                select(Topic)
+                .options(raiseload("*"))
+                .where(Topic.parent_id.in_([t.id for t in frontier]))
+                .where(Topic.is_active == True)
+                .order_by(Topic.order)
+            )
+            children_by_parent = defaultdict(list)
+            for child in result.scalars().all():
+                if child.id not in visited:
+                    visited.add(child.id)
+                    children_by_parent[child.parent_id].append(child)
+            
+            next_frontier = []
+            for node in frontier:
+                children = children_by_parent.get(node.id, [])
+                set_committed_value(node, "children", children)
+                next_frontier.extend(children)
+            frontier = next_frontier
+        
+        return topic
+    
     async def create_topic(self, data: TopicCreate) -> Topic:
         """Create new topic"""
         # Determine level based on parent
@@ -303,51 +345,110 @@ class SyllabusService:
         await self.db.refresh(topic)
         return topic
     
+    async def create_topics_bulk(self, items: List[TopicCreate]) -> List[Topic]:
+        """
+        Create many topics with a single multi-row INSERT ... RETURNING.
+        
+        Parent levels are resolved with one query up front, so parents
+        must already exist (import one hierarchy level per request).
+        """
+        parent_ids = {item.parent_id for item in items if item.parent_id}
+        parent_levels = {}
+        if parent_ids:
+            result = await self.db.execute(
+                select(Topic.id, Topic.level).where(Topic.id.in_(parent_ids))
+            )
+            parent_levels = {row.id: row.level or 0 for row in result}
+        
+        rows = [
+            {
+                **item.model_dump(),
+                "code": item.code.lower(),
+                "level": parent_levels[item.parent_id] + 1 if item.parent_id in parent_levels else 0,
+            }
+            for item in items
+        ]
+        result = await self.db.scalars(insert(Topic).returning(Topic), rows)
+        return list(result.all())
+    
     async def update_topic(
         self, topic_id: str, data: TopicUpdate
     ) -> Optional[Topic]:
-        """Update topic"""
-        topic = await self.get_topic(topic_id)
-        if not topic:
-            return None
+        """
+        Update topic.
         
+        Raises:
+            ValueError: If the new parent is the topic itself or one of
+                its descendants
+        """
         update_data = data.model_dump(exclude_unset=True)
-        for field, value in update_data.items():
-            setattr(topic, field, value)
         
         # Update level if parent changed
         if data.parent_id is not None:
             if data.parent_id:
-                parent = await self.get_topic(data.parent_id)
-                topic.level = parent.level + 1 if parent else 0
+                await self._check_no_cycle(topic_id, data.parent_id)
+                parent_level = await self.db.scalar(
+                    select(Topic.level).where(Topic.id == data.parent_id)
+                )
+                update_data["level"] = parent_level + 1 if parent_level is not None else 0
             else:
-                topic.level = 0
+                update_data["level"] = 0
         
-        await self.db.flush()
-        await self.db.refresh(topic)
-        return topic
+        return await self._update_returning(Topic, topic_id, update_data)
+    
+    async def _check_no_cycle(self, topic_id: str, parent_id: str) -> None:
+        """Reject a parent that is the topic itself or below it in the tree"""
+        seen = set()
+        current = parent_id
+        while current and current not in seen:
+            if current == topic_id:
+                raise ValueError("A topic cannot be moved under itself or its own subtopics")
+            seen.add(current)
+            current = await self.db.scalar(
+                select(Topic.parent_id).where(Topic.id == current)
+            )
     
     async def delete_topic(self, topic_id: str) -> bool:
         """Delete topic (soft delete)"""
-        topic = await self.get_topic(topic_id)
-        if not topic:
-            return False
-        
-        topic.is_active = False
-        await self.db.flush()
-        return True
+        result = await self.db.execute(
+            update(Topic)
+            .where(Topic.id == topic_id)
+            .values(is_active=False)
+            .returning(Topic.id)
+        )
+        return result.scalar_one_or_none() is not None
     
     # ==================== Full Syllabus Tree ====================
     
     async def get_full_syllabus(self, exam_code: str) -> Optional[dict]:
-        """Get complete syllabus tree for an exam"""
+        """
+        Get complete syllabus tree for an exam.
+        
+        Each level (stages, papers, subjects, topics) is fetched with one
+        `IN (...)` query and assembled in memory, so the whole tree costs
+        five queries regardless of its size.
+        """
         exam_type = await self.get_exam_type_by_code(exam_code)
         if not exam_type:
             return None
         
-        # Build the tree structure
         stages = await self.list_stages(exam_type.id)
         
+        papers_by_stage = await self._group_active_children(
+            Paper, Paper.exam_stage_id, [s.id for s in stages]
+        )
+        papers = [p for group in papers_by_stage.values() for p in group]
+        
+        subjects_by_paper = await self._group_active_children(
+            Subject, Subject.paper_id, [p.id for p in papers]
+        )
+        subjects = [s for group in subjects_by_paper.values() for s in group]
+        
+        topics_by_subject = await self._group_active_children(
+            Topic, Topic.subject_id, [s.id for s in subjects]
+        )
+        
+        # Build the tree structure
         tree = {
             "exam_type": exam_type,
             "stages": []
@@ -359,18 +460,16 @@ class SyllabusService:
                 "papers": []
             }
             
-            papers = await self.list_papers(stage.id)
-            for paper in papers:
+            for paper in papers_by_stage.get(stage.id, []):
                 paper_data = {
                     "paper": paper,
                     "subjects": []
                 }
                 
-                subjects = await self.list_subjects(paper.id)
-                for subject in subjects:
+                for subject in subjects_by_paper.get(paper.id, []):
                     subject_data = {
                         "subject": subject,
-                        "topics": await self._get_topic_tree(subject.id)
+                        "topics": self._build_topic_tree(topics_by_subject.get(subject.id, []))
                     }
                     paper_data["subjects"].append(subject_data)
                 
@@ -380,16 +479,35 @@ class SyllabusService:
         
         return tree
     
-    async def _get_topic_tree(self, subject_id: str, parent_id: Optional[str] = None) -> List[dict]:
-        """Recursively build topic tree"""
-        topics = await self.list_topics(subject_id, parent_id)
-        result = []
+    async def _group_active_children(self, model, parent_column, parent_ids: List[str]) -> dict:
+        """Fetch active rows of `model` for all parents at once, grouped by parent ID in display order"""
+        grouped = defaultdict(list)
+        if not parent_ids:
+            return grouped
         
+        result = await self.db.execute(
+            select(model)
+            .where(parent_column.in_(parent_ids))
+            .where(model.is_active == True)
+            .order_by(model.order)
+        )
+        for row in result.scalars().all():
+            grouped[getattr(row, parent_column.key)].append(row)
+        return grouped
+    
+    def _build_topic_tree(self, topics: List[Topic]) -> List[dict]:
+        """Nest a subject's active topics under their parents, starting from root topics"""
+        children_by_parent = defaultdict(list)
         for topic in topics:
-            topic_data = {
-                "topic": topic,
-                "children": await self._get_topic_tree(subject_id, topic.id)
-            }
-            result.append(topic_data)
+            children_by_parent[topic.parent_id].append(topic)
+        
+        def build(parent_id: Optional[str]) -> List[dict]:
+            return [
+                {
+                    "topic": topic,
+                    "children": build(topic.id)
+                }
+                for topic in children_by_parent.get(parent_id, [])
+            ]
         
-        return result
+        return build(None)
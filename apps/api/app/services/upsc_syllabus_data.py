@@ -2,7 +2,8 @@
 UPSC Syllabus Seed Data
 Complete syllabus structure based on official UPSC guidelines.
 """
-from typing import Dict, List, Any
+from functools import lru_cache
+from typing import Dict, List, Any, Optional
 
 # UPSC CSE Syllabus Structure
 UPSC_SYLLABUS = {
@@ -853,8 +854,9 @@ STUDY_PHASES = [
 ]
 
 
+@lru_cache(maxsize=1)
 def get_total_syllabus_hours() -> int:
-    """Calculate total study hours required"""
+    """Calculate total study hours required (static data, computed once)"""
     total = 0
     for stage in UPSC_SYLLABUS["stages"]:
         for paper in stage["papers"]:
@@ -880,3 +882,22 @@ def get_subjects_list() -> List[Dict]:
                     "weightage": subject.get("weightage", 0)
                 })
     return subjects
+
+
+def _index_subjects() -> Dict[str, Dict[str, Any]]:
+    """Map subject code -> subject (first occurrence wins, as in a stage/paper walk)"""
+    subjects: Dict[str, Dict[str, Any]] = {}
+    for stage in UPSC_SYLLABUS["stages"]:
+        for paper in stage["papers"]:
+            for subject in paper["subjects"]:
+                subjects.setdefault(subject["code"], subject)
+    return subjects
+
+
+# Subject lookup by code, built once at import
+SUBJECTS_BY_CODE = _index_subjects()
+
+
+def get_subject(subject_code: str) -> Optional[Dict[str, Any]]:
+    """Get a subject's syllabus entry by code"""
+    return SUBJECTS_BY_CODE.get(subject_code)
@@ -8,7 +8,7 @@ from sqlalchemy import select, update
 
 from app.models.user import User
 from app.schemas.user import UserCreate, UserUpdate
-from app.core.security import hash_password
+from app.core.security import hash_password_async
 
 
 class UserService:
@@ -21,16 +21,16 @@ class UserService:
         """
         Get user by ID.
         
+        Served from the session's identity map when the user is already
+        loaded (e.g. by get_current_user), without a database round trip.
+        
         Args:
             user_id: User's UUID
             
         Returns:
             User instance or None
         """
-        result = await self.db.execute(
-            select(User).where(User.id == user_id)
-        )
-        return result.scalar_one_or_none()
+        return await self.db.get(User, user_id)
     
     async def get_by_email(self, email: str) -> Optional[User]:
         """
@@ -58,7 +58,7 @@ class UserService:
             Created User instance
         """
         # Hash the password
-        hashed_password = hash_password(user_data.password)
+        hashed_password = await hash_password_async(user_data.password)
         
         # Create user instance
         user = User(
@@ -96,8 +96,8 @@ class UserService:
         for field, value in update_data.items():
             setattr(user, field, value)
         
+        # updated_at is set client-side, so there is nothing to refresh
         await self.db.flush()
-        await self.db.refresh(user)
         
         return user
     
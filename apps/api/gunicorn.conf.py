@@ -0,0 +1,37 @@
+"""
+Gunicorn configuration for production.
+
+Runs uvicorn workers behind a pre-forking master. With more than one
+worker, the master loads the embedding model before forking, so every
+worker shares its weights copy-on-write instead of loading its own copy;
+each worker still builds its own FAISS index and pipeline in the app
+lifespan. A single worker loads the model itself, as under plain uvicorn.
+
+Defaults to a single worker. The FAISS index, the in-memory rate
+limiters and the local caches are per-process state: with more workers,
+an upload is indexed only by the worker that handled it, and each
+worker's checkpoint overwrites data/vectors with its own partial index.
+Only raise WEB_CONCURRENCY once the index has a single writer (or lives
+in an external store).
+
+Usage: gunicorn app.main:app -c gunicorn.conf.py
+"""
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+worker_class = "uvicorn.workers.UvicornWorker"  # uses uvloop + httptools when installed
+preload_app = workers > 1  # only worth it when there is something to share
+timeout = 120
+
+
+def on_starting(server):
+    """Load the embedding model in the master, before workers are forked"""
+    if server.cfg.workers <= 1:
+        return
+    try:
+        from app.services.rag import load_sentence_transformer
+        load_sentence_transformer("all-MiniLM-L6-v2")
+        server.log.info("Embedding model loaded for sharing across workers")
+    except ImportError as e:
+        server.log.warning(f"Embedding model not preloaded: {e}")
@@ -82,6 +82,19 @@ ON quiz_attempts(user_id, status) WHERE status = 'in_progress';
 CREATE INDEX IF NOT EXISTS idx_question_answers_attempt_id 
 ON question_answers(attempt_id);
 
+-- One answer per question per attempt (submit_answer upsert target).
+-- Older deployments may hold duplicate answers from concurrent resubmits,
+-- which would make the unique index fail: keep only the most recently
+-- updated answer of each (attempt, question) first. Safe to re-run.
+DELETE FROM question_answers AS qa
+USING question_answers AS newer
+WHERE qa.attempt_id = newer.attempt_id
+  AND qa.question_id = newer.question_id
+  AND (qa.updated_at, qa.id) < (newer.updated_at, newer.id);
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_question_answers_attempt_question 
+ON question_answers(attempt_id, question_id);
+
 
 -- ==================== LEARNING ANALYTICS INDEXES ====================
 
@@ -179,6 +192,49 @@ CREATE INDEX IF NOT EXISTS idx_study_analytics
 ON study_sessions(user_id, session_type, duration_minutes);
 
 
+-- ==================== AI USAGE INDEXES ====================
+
+-- Older deployments may hold several rows for one user and day (the
+-- select-then-insert tracker could race), which would make the unique
+-- index below fail: fold each group's counters into its lowest id row,
+-- then drop the rest. Safe to re-run.
+UPDATE ai_usage_logs AS keep
+SET tokens_input = agg.tokens_input,
+    tokens_output = agg.tokens_output,
+    tokens_total = agg.tokens_total,
+    request_count = agg.request_count,
+    cached_count = agg.cached_count,
+    failed_count = agg.failed_count,
+    estimated_cost_usd = agg.estimated_cost_usd,
+    last_request_at = agg.last_request_at
+FROM (
+    SELECT MIN(id) AS keep_id,
+           SUM(tokens_input) AS tokens_input,
+           SUM(tokens_output) AS tokens_output,
+           SUM(tokens_total) AS tokens_total,
+           SUM(request_count) AS request_count,
+           SUM(cached_count) AS cached_count,
+           SUM(failed_count) AS failed_count,
+           SUM(estimated_cost_usd) AS estimated_cost_usd,
+           MAX(last_request_at) AS last_request_at
+    FROM ai_usage_logs
+    GROUP BY user_id, date
+    HAVING COUNT(*) > 1
+) AS agg
+WHERE keep.id = agg.keep_id;
+
+DELETE FROM ai_usage_logs AS dup
+USING ai_usage_logs AS keep
+WHERE dup.user_id = keep.user_id
+  AND dup.date = keep.date
+  AND dup.id > keep.id;
+
+-- One usage row per user per day (conflict target for the usage upsert);
+-- INCLUDE makes the quota lookup an index-only scan
+CREATE UNIQUE INDEX IF NOT EXISTS uq_ai_usage_logs_user_date 
+ON ai_usage_logs(user_id, date) INCLUDE (tokens_total, request_count);
+
+
 -- ==================== FULL-TEXT SEARCH INDEXES ====================
 
 -- Content full-text search (if using PostgreSQL)
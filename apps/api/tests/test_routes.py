@@ -0,0 +1,17 @@
+"""
+Route table regression tests
+"""
+from collections import Counter
+
+from app.api.v1.router import api_router
+
+
+def test_no_duplicate_routes():
+    """Each (path, method) pair is registered by exactly one endpoint"""
+    pairs = Counter(
+        (route.path, method)
+        for route in api_router.routes
+        for method in getattr(route, "methods", None) or ()
+    )
+    duplicates = sorted(pair for pair, count in pairs.items() if count > 1)
+    assert not duplicates, f"Duplicate routes: {duplicates}"